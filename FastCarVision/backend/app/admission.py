@@ -0,0 +1,181 @@
+import asyncio
+import contextvars
+import math
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException, status
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+class Overloaded(HTTPException):
+    """Raised when a stage cannot start the work within its deadline"""
+
+    def __init__(self, stage: str, retry_after: int):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Server busy ({stage}), retry later",
+            headers={"Retry-After": str(retry_after)}
+        )
+        self.stage = stage
+        self.retry_after = retry_after
+
+class StageLimiter:
+    """Concurrency limit plus a bounded wait queue for one pipeline stage
+
+    Work is admitted only if the queue has room and a slot frees up
+    before the deadline; everything else is shed immediately, so admitted
+    requests keep a flat latency under overload.
+    """
+
+    def __init__(self, name: str, concurrency: int, max_queue: int, timeout: float):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+        self.avg_wait = 0.0
+        self.avg_service = 0.0
+        self._wait_at = time.monotonic()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the server's event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+    def recent_wait(self) -> float:
+        """Average queue wait, decayed by the time since the last admission
+
+        Without the decay a burst of slow admissions would keep the stage
+        saturated (and /ready failing) until new traffic arrived, which a
+        load balancer that stopped sending traffic would never do.
+        """
+        idle = time.monotonic() - self._wait_at
+        return self.avg_wait * math.exp(-idle / settings.readiness_wait_decay)
+
+    def _record_wait(self, seconds: float):
+        self.avg_wait = 0.9 * self.recent_wait() + 0.1 * seconds
+        self._wait_at = time.monotonic()
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely to be free"""
+        backlog = (self.waiting + 1) / max(self.concurrency, 1)
+        return max(1, math.ceil(self.avg_service * backlog))
+
+    def _reject(self):
+        self.rejected += 1
+        raise Overloaded(self.name, self.retry_after())
+
+    @asynccontextmanager
+    async def slot(self, shed: bool = True):
+        """Hold one unit of stage concurrency
+
+        With shed=False the caller waits as long as needed; background
+        workers use this since they are already bounded by their own queue.
+        """
+        if shed and self.waiting >= self.max_queue:
+            self._reject()
+
+        self.waiting += 1
+        queued_at = time.monotonic()
+        try:
+            if shed:
+                await asyncio.wait_for(self.semaphore.acquire(), self.timeout)
+            else:
+                await self.semaphore.acquire()
+        except asyncio.TimeoutError:
+            self._record_wait(time.monotonic() - queued_at)
+            self._reject()
+        finally:
+            self.waiting -= 1
+
+        started_at = time.monotonic()
+        self._record_wait(started_at - queued_at)
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self.semaphore.release()
+            self.avg_service = 0.9 * self.avg_service + 0.1 * (time.monotonic() - started_at)
+
+    def is_saturated(self) -> bool:
+        """Whether new work is likely to be shed"""
+        return self.waiting >= self.max_queue or self.recent_wait() > settings.readiness_max_wait
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current queue depth and timing for readiness reporting"""
+        return {
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "concurrency": self.concurrency,
+            "max_queue": self.max_queue,
+            "avg_wait_seconds": round(self.recent_wait(), 4),
+            "avg_service_seconds": round(self.avg_service, 4),
+            "rejected": self.rejected,
+        }
+
+class AdmissionController:
+    """Separate admission limits for the vision, scraping and thumbnail stages"""
+
+    def __init__(self):
+        self.vision = StageLimiter(
+            "vision",
+            settings.vision_concurrency,
+            settings.vision_queue_size,
+            settings.vision_queue_timeout
+        )
+        self.scraping = StageLimiter(
+            "scraping",
+            settings.scrape_concurrency,
+            settings.scrape_queue_size,
+            settings.scrape_queue_timeout
+        )
+        self.thumbnails = StageLimiter(
+            "thumbnails",
+            settings.thumb_concurrency,
+            settings.thumb_queue_size,
+            settings.thumb_queue_timeout
+        )
+        # Inference runs on its own threads so it never blocks the event loop
+        self.vision_executor = ThreadPoolExecutor(
+            max_workers=settings.vision_concurrency,
+            thread_name_prefix="vision"
+        )
+
+    async def run_vision(self, func: Callable, *args, shed: bool = True):
+        """Run a blocking vision call under the vision stage limits"""
+        async with self.vision.slot(shed=shed):
+            loop = asyncio.get_running_loop()
+            # Carry the request context into the thread so stage timings reach it
+            context = contextvars.copy_context()
+            return await loop.run_in_executor(self.vision_executor, context.run, func, *args)
+
+    def ready(self) -> bool:
+        """Whether the instance should receive new traffic"""
+        return not (self.vision.is_saturated() or self.scraping.is_saturated())
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready(),
+            "vision": self.vision.snapshot(),
+            "scraping": self.scraping.snapshot(),
+            "thumbnails": self.thumbnails.snapshot(),
+        }
+
+    def shutdown(self):
+        """Stop the vision worker threads"""
+        self.vision_executor.shutdown(wait=False)
+
+# Global admission controller
+admission_controller = AdmissionController()
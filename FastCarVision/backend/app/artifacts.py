@@ -0,0 +1,212 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+import logging
+import urllib.request
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from .config import settings
+
+# Try to import CLIP with fallback
+try:
+    import clip
+    CLIP_AVAILABLE = True
+except ImportError:
+    CLIP_AVAILABLE = False
+
+# safetensors files are memory-mapped on load instead of unpickled
+try:
+    import safetensors
+    SAFETENSORS_AVAILABLE = True
+except ImportError:
+    SAFETENSORS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+YOLO_ASSET_URL = "https://github.com/ultralytics/assets/releases/download/v0.0.0/{name}"
+
+class ArtifactError(RuntimeError):
+    """A model artifact is missing, corrupt, or would have to be downloaded"""
+
+def artifact_kind(name: str) -> str:
+    """YOLO weights are named by file, CLIP models by architecture"""
+    return "yolo" if name.endswith(".pt") else "clip"
+
+def source_url(name: str) -> Optional[str]:
+    """Where the upstream library itself would download a model from"""
+    if artifact_kind(name) == "yolo":
+        return YOLO_ASSET_URL.format(name=name)
+    if CLIP_AVAILABLE:
+        return clip.clip._MODELS.get(name)
+    return None
+
+def expected_sha256(url: str) -> Optional[str]:
+    """OpenAI publishes CLIP weights under their sha256"""
+    parts = url.rstrip("/").split("/")
+    if len(parts) > 1 and len(parts[-2]) == 64:
+        return parts[-2]
+    return None
+
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def download(url: str, destination: Path, sha256: Optional[str] = None) -> str:
+    """Stream a URL to a file, checking the digest before it is moved into place"""
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    temp = destination.with_name(f"{destination.name}.{os.getpid()}.tmp")
+    digest = hashlib.sha256()
+    with urllib.request.urlopen(url, timeout=60) as response, open(temp, "wb") as f:
+        for chunk in iter(lambda: response.read(1024 * 1024), b""):
+            digest.update(chunk)
+            f.write(chunk)
+
+    if sha256 and digest.hexdigest() != sha256:
+        temp.unlink()
+        raise ArtifactError(f"Checksum mismatch downloading {url}")
+    os.replace(temp, destination)
+    return digest.hexdigest()
+
+def convert_clip(source: Path, destination: Path):
+    """Rewrite an OpenAI CLIP checkpoint as a safetensors state dict"""
+    import torch
+    import safetensors.torch
+    try:
+        # OpenAI ships TorchScript archives; older checkpoints are plain state dicts
+        state_dict = torch.jit.load(str(source), map_location="cpu").state_dict()
+    except RuntimeError:
+        state_dict = torch.load(str(source), map_location="cpu")
+    # Cloning drops shared storage, which safetensors refuses to write
+    tensors = {key: value.detach().clone().contiguous() for key, value in state_dict.items()}
+    safetensors.torch.save_file(tensors, str(destination))
+
+def load_clip_safetensors(path: Path, device: str) -> Tuple[object, object]:
+    """Build CLIP from memory-mapped weights, as clip.load does for a state dict"""
+    if not SAFETENSORS_AVAILABLE:
+        raise ArtifactError(f"{path} is a safetensors file but safetensors is not installed")
+    import safetensors.torch
+    state_dict = safetensors.torch.load_file(str(path), device="cpu")
+    model = clip.clip.build_model(state_dict).to(device)
+    if str(device) == "cpu":
+        model.float()
+    return model, clip.clip._transform(model.visual.input_resolution)
+
+class ArtifactStore:
+    """Named, versioned model weights pre-staged in one directory
+
+    manifest.json pins one version of each model with its sha256, so a
+    container loads exactly the weights it was built with. Files are
+    never modified in place; staging a new version adds a new file.
+
+    verify is "stat" (size and mtime as recorded at staging; a file whose
+    mtime changed is hashed), "sha256" (hash every file on load) or "off".
+    """
+
+    def __init__(self, directory: str, offline: bool = False, verify: str = "stat"):
+        self.directory = Path(directory)
+        self.offline = offline
+        self.verify = verify
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.directory / MANIFEST_NAME
+
+    def manifest(self) -> Dict[str, dict]:
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f).get("artifacts", {})
+        except FileNotFoundError:
+            return {}
+
+    def _write_manifest(self, artifacts: Dict[str, dict]):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        temp = self.manifest_path.with_name(f"{MANIFEST_NAME}.{os.getpid()}.tmp")
+        temp.write_text(json.dumps({"artifacts": artifacts}, indent=2, sort_keys=True) + "\n")
+        os.replace(temp, self.manifest_path)
+
+    def check(self, name: str, entry: dict, full: bool = True) -> Path:
+        """Path of a staged artifact after checking its size and sha256
+
+        With full=False the sha256 is only computed if the file's mtime
+        differs from the one recorded at staging.
+        """
+        path = self.directory / entry["file"]
+        if not path.is_file():
+            raise ArtifactError(f"Model {name} is in the manifest but {path} is missing")
+        stat = path.stat()
+        if stat.st_size != entry["bytes"]:
+            raise ArtifactError(f"Model {name} at {path} has the wrong size")
+        if not full and stat.st_mtime_ns == entry.get("mtime_ns"):
+            return path
+        if sha256_file(path) != entry["sha256"]:
+            raise ArtifactError(f"Checksum mismatch for model {name} at {path}")
+        return path
+
+    def resolve(self, name: str) -> Optional[dict]:
+        """Manifest entry for a model, with its local path
+
+        Returns None for a model that is not staged, leaving the upstream
+        library to fetch it, unless downloads are disabled.
+        """
+        entry = self.manifest().get(name)
+        if entry is None:
+            if self.offline:
+                raise ArtifactError(
+                    f"Model {name} is not staged in {self.directory} and downloads are disabled; "
+                    f"run prepare_models.py fetch"
+                )
+            logger.warning(f"Model {name} is not staged in {self.directory}; it may be downloaded")
+            return None
+
+        if self.verify != "off":
+            started = time.perf_counter()
+            path = self.check(name, entry, full=self.verify == "sha256")
+            logger.info(f"Verified {name} {entry['version']} in {time.perf_counter() - started:.2f}s")
+        else:
+            path = self.directory / entry["file"]
+            if not path.is_file():
+                raise ArtifactError(f"Model {name} is in the manifest but {path} is missing")
+        return dict(entry, path=path)
+
+    def add(self, name: str, source: Path, version: Optional[str] = None,
+            origin: Optional[str] = None, weights_format: str = "torch") -> dict:
+        """Copy a weights file into the store and pin it in the manifest"""
+        digest = sha256_file(source)
+        version = version or digest[:12]
+        kind = artifact_kind(name)
+        stem = name.replace("/", "-")
+        if stem.endswith(".pt"):
+            stem = stem[:-len(".pt")]
+        relative = Path(kind) / f"{stem}-{version}{source.suffix}"
+        destination = self.directory / relative
+        destination.parent.mkdir(parents=True, exist_ok=True)
+
+        temp = destination.with_name(f"{destination.name}.{os.getpid()}.tmp")
+        shutil.copyfile(source, temp)
+        os.replace(temp, destination)
+
+        entry = {
+            "kind": kind,
+            "version": version,
+            "format": weights_format,
+            "file": relative.as_posix(),
+            "sha256": digest,
+            "bytes": destination.stat().st_size,
+            "mtime_ns": destination.stat().st_mtime_ns,
+            "source": origin or str(source),
+            "staged_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }
+        artifacts = self.manifest()
+        artifacts[name] = entry
+        self._write_manifest(artifacts)
+        return entry
+
+# Global artifact store
+artifact_store = ArtifactStore(settings.model_dir, settings.model_offline, settings.model_verify)
@@ -11,11 +11,27 @@ class Settings(BaseSettings):
     # Image Processing
     max_image_size: int = 1024
     supported_formats: List[str] = ["jpg", "jpeg", "png", "bmp"]
+    max_upload_bytes: int = 10 * 1024 * 1024  # Uploads are aborted past this size
+    max_image_pixels: int = 40_000_000  # Width x height limit, checked from the header
+    
+    # Listing Thumbnails
+    thumb_widths: str = "96,150,300,600"  # Comma-separated; requested widths are rounded up to one of these
+    thumb_quality: int = 80  # JPEG quality of generated thumbnails
+    thumb_cache_dir: str = "data/thumbs"
+    thumb_cache_max_bytes: int = 200 * 1024 * 1024  # Least recently used thumbnails are evicted past this
+    thumb_allow_private_hosts: bool = False  # Allow image URLs on private networks (local testing only)
     
     # Model Configuration
     car_detection_model: str = "yolov8n.pt"
     clip_model: str = "ViT-B/32"
     device: str = "cpu"  # Default to CPU
+    vision_stub: bool = False  # Deterministic stand-in for YOLO/CLIP (benchmarks, load tests)
+    vision_stub_latency: float = 0.0  # Seconds of simulated inference per image with the stub
+    
+    # Model Artifacts
+    model_dir: str = "models"  # Weights staged by prepare_models.py, pinned in manifest.json
+    model_offline: bool = False  # Production: only load staged weights, never download
+    model_verify: str = "stat"  # "stat" (size/mtime; hash only touched files), "sha256" (hash every start) or "off"
     
     # FAISS Configuration
     faiss_index_path: str = "data/car_embeddings.index"
@@ -30,6 +46,81 @@ class Settings(BaseSettings):
     enable_autotrader: bool = True
     enable_ebay_motors: bool = False
     enable_cars_com: bool = True
+    demo_listings: bool = False  # Pad sparse results with made-up listings (demos only)
+    parse_cache_size: int = 2000  # Parsed listing elements kept per scraper
+    autotrader_base_url: str = "https://www.autotrader.com"  # Point at a fake marketplace for load tests
+    cars_com_base_url: str = "https://www.cars.com"
+    scraper_transport: str = "live"  # "live", "record" (live + save to fixtures) or "replay" (fixtures only)
+    fixture_dir: str = "data/fixtures"  # WARC files of recorded marketplace responses
+    replay_latency: float = 0.0  # Seconds added to each replayed response
+    page_cache_max_bytes: int = 64 * 1024 * 1024  # Result pages kept for If-None-Match/If-Modified-Since; 0 disables
+    scraper_http2: bool = False  # Fetch result pages over HTTP/2 (requires httpx[http2])
+    
+    # Listing Store
+    listing_store_path: str = "data/listings.db"
+    listing_store_ttl: int = 86400  # Seconds before a stored listing expires
+    search_mode: str = "live"  # "live" or "store-first"
+    store_min_results: int = 10  # Coverage needed to answer from the store
+    store_max_age: int = 3600  # Freshness needed to answer from the store
+    store_search_limit: int = 200  # Rows read from the store before filtering
+    
+    # Warm Crawler (fills the listing store; only runs with search_mode="store-first", which reads it)
+    warm_crawler_enabled: bool = False
+    warm_crawler_concurrency: int = 2
+    warm_crawler_request_budget: int = 120  # Scraper requests per hour
+    warm_crawler_refresh_interval: int = 1800  # Seconds between refreshes of a query
+    warm_crawler_tick: int = 30  # Seconds between scheduling passes
+    warm_crawler_max_queries: int = 200
+    
+    # Background Jobs
+    job_store: str = "sqlite"  # "sqlite" (shared by workers) or "memory" (single worker only)
+    job_store_path: str = "data/jobs.db"
+    job_workers: int = 2
+    job_queue_size: int = 100  # Jobs waiting beyond this are rejected with 503
+    job_ttl: int = 3600  # Seconds finished jobs are kept for polling
+    job_events_poll_interval: float = 1.0  # Seconds between store checks on /jobs/{id}/events
+    
+    # Saved Searches
+    saved_search_path: str = "data/saved_searches.db"  # Shared by all workers; one of them runs the scheduler
+    saved_search_interval: int = 900  # Default seconds between re-runs
+    saved_search_tick: int = 30
+    saved_search_history: int = 1000  # Changes kept per saved search for polling
+    saved_search_removal_misses: int = 2  # Runs a listing must be missing from its source before "removed"
+    webhook_allow_private_hosts: bool = False  # Allow webhooks on private networks (local testing only)
+    
+    # Bulk Export
+    record_detections: bool = False  # Keep detections and CLIP embeddings for export
+    export_batch_size: int = 10000  # Rows per Arrow record batch
+    
+    # Serving
+    serve_workers: int = 1  # Pre-forked worker processes (run_backend.py --workers)
+    torch_threads: int = 0  # Inference threads per worker; 0 = the worker's share of cores
+    serve_pin_cpus: bool = False  # Pin each worker to its share of cores
+    
+    # Admission Control
+    vision_concurrency: int = 2  # Images processed in parallel
+    vision_queue_size: int = 8  # Requests allowed to wait for a vision slot
+    vision_queue_timeout: float = 5.0  # Seconds to wait before shedding with 503
+    scrape_concurrency: int = 20  # Searches run in parallel
+    scrape_queue_size: int = 100
+    scrape_queue_timeout: float = 10.0
+    thumb_concurrency: int = 4  # Thumbnails fetched and resized in parallel (cache hits skip the limit)
+    thumb_queue_size: int = 32
+    thumb_queue_timeout: float = 5.0
+    readiness_max_wait: float = 2.0  # Average queue wait that marks the instance not ready
+    readiness_wait_decay: float = 10.0  # Seconds for an idle stage's average wait to fall by 1/e
+
+    # Tracing
+    trace_sample_rate: float = 0.0  # Fraction of requests traced; 0 disables tracing, even for sampled traceparents
+    trace_export_path: str = "data/traces.jsonl"  # Finished spans, one JSON object per line
+
+    # Profiling
+    profiling_enabled: bool = False  # Expose POST /admin/profile
+    admin_token: str = ""  # Required in X-Admin-Token; profiling stays off while empty
+    profile_max_seconds: float = 60.0  # Upper bound on one profiling session
+    profile_max_requests: int = 100  # Upper bound on requests profiled in one session
+    profile_sample_interval: float = 0.01  # Seconds between stack samples
+    profile_slow_callback: float = 0.05  # Loop callbacks slower than this are reported
     
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -0,0 +1,159 @@
+import asyncio
+import heapq
+import itertools
+import time
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from .config import settings
+from .models import CarDetection
+from .scrapers import ScrapingOrchestrator, scraping_orchestrator
+
+logger = logging.getLogger(__name__)
+
+# Seed queries that are worth keeping warm even before anyone asks
+POPULAR_QUERIES = [
+    ("Toyota", "Camry"), ("Toyota", "Corolla"), ("Toyota", "RAV4"),
+    ("Honda", "Accord"), ("Honda", "Civic"), ("Honda", "CR-V"),
+    ("Ford", "F-150"), ("Ford", "Explorer"), ("Chevrolet", "Silverado"),
+    ("Nissan", "Altima"), ("Jeep", "Wrangler"), ("Tesla", "Model 3"),
+]
+
+QueryKey = Tuple[str, str, Optional[int]]
+
+class WarmQuery:
+    """Scheduling state for one make/model/year query"""
+
+    def __init__(self, key: QueryKey, score: float):
+        self.key = key
+        self.score = score
+        self.next_due = 0.0
+        self.last_run: Optional[float] = None
+
+class WarmCrawler:
+    """Background task that keeps popular searches fresh in the listing store"""
+
+    def __init__(self, orchestrator: ScrapingOrchestrator):
+        self.orchestrator = orchestrator
+        self.queries: Dict[QueryKey, WarmQuery] = {}
+        self.queue: List[Tuple[float, float, int, QueryKey]] = []  # (next_due, -score, seq, key)
+        self._seq = itertools.count()  # Tie-breaker so keys are never compared
+        self.tokens = float(settings.warm_crawler_request_budget)
+        self.last_refill = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+
+        for make, model in POPULAR_QUERIES:
+            self._track((make, model, None), score=1.0)
+
+    def _track(self, key: QueryKey, score: float):
+        """Add or re-prioritize a query and schedule it"""
+        query = self.queries.get(key)
+        if query is None:
+            if len(self.queries) >= settings.warm_crawler_max_queries:
+                # Forget the least popular query to make room
+                weakest = min(self.queries.values(), key=lambda q: q.score)
+                if weakest.score >= score:
+                    return
+                del self.queries[weakest.key]
+            query = self.queries[key] = WarmQuery(key, score)
+            self._push(query)
+        else:
+            # Already scheduled; due queries are ranked by their current score
+            query.score += score
+
+    def _push(self, query: WarmQuery):
+        """Schedule a query at its next due time"""
+        heapq.heappush(self.queue, (query.next_due, -query.score, next(self._seq), query.key))
+
+    def record_query(self, car_detection: CarDetection):
+        """Note a user search so its query is kept warm"""
+        if "Unknown" in (car_detection.make, car_detection.model):
+            return
+        self._track((car_detection.make, car_detection.model, car_detection.year), score=1.0)
+
+    def _refill(self):
+        """Refill the hourly request budget"""
+        now = time.monotonic()
+        budget = settings.warm_crawler_request_budget
+        self.tokens = min(budget, self.tokens + (now - self.last_refill) * budget / 3600)
+        self.last_refill = now
+
+    def _pop_due(self) -> List[WarmQuery]:
+        """Pop due queries, most popular first, that fit the remaining budget"""
+        now = time.time()
+        due = {}
+        while self.queue and self.queue[0][0] <= now:
+            next_due, _, _, key = heapq.heappop(self.queue)
+            query = self.queries.get(key)
+            # Skip stale heap entries left behind by re-prioritization
+            if query is not None and query.next_due == next_due:
+                due[key] = query
+
+        cost = max(len(self.orchestrator.scrapers), 1)
+        selected = []
+        for query in sorted(due.values(), key=lambda q: q.score, reverse=True):
+            if self.tokens >= cost:
+                self.tokens -= cost
+                selected.append(query)
+            else:
+                # Out of budget: try again on the next tick
+                self._push(query)
+
+        return selected
+
+    async def _refresh(self, query: WarmQuery, semaphore: asyncio.Semaphore):
+        """Scrape one query; results land in the listing store"""
+        make, model, year = query.key
+        async with semaphore:
+            try:
+                await self.orchestrator.scrape_all(CarDetection(
+                    make=make, model=model, year=year, confidence=1.0
+                ))
+            except Exception as e:
+                logger.error(f"Warm crawl failed for {make} {model}: {e}")
+
+        query.last_run = time.time()
+        query.next_due = query.last_run + settings.warm_crawler_refresh_interval
+        query.score *= 0.9  # Decay so stale popularity fades
+        self._push(query)
+
+    async def run(self):
+        """Main loop: refresh due queries within the concurrency and budget limits"""
+        semaphore = asyncio.Semaphore(settings.warm_crawler_concurrency)
+        logger.info(f"Warm crawler started with {len(self.queries)} queries")
+
+        while True:
+            self._refill()
+            batch = self._pop_due()
+            if batch:
+                logger.info(f"Warm crawler refreshing {len(batch)} queries")
+                await asyncio.gather(*(self._refresh(q, semaphore) for q in batch))
+            await asyncio.sleep(settings.warm_crawler_tick)
+
+    def start(self):
+        """Start the crawler on the running event loop
+
+        Only searches in store-first mode read what it stores, so with any
+        other SEARCH_MODE it stays off rather than spend scraper budget.
+        """
+        if settings.search_mode != "store-first":
+            logger.warning(
+                f"Warm crawler not started: SEARCH_MODE={settings.search_mode} searches never read "
+                f"the listings it stores; set SEARCH_MODE=store-first to use it"
+            )
+            return
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        """Cancel the crawler task"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+# Global warm crawler
+warm_crawler = WarmCrawler(scraping_orchestrator)
@@ -0,0 +1,113 @@
+import re
+import hashlib
+import random
+from typing import Dict, List, Optional, Set, Tuple
+
+from .records import ListingRecord
+from .utils import canonicalize_url
+
+# Title words that say nothing about which vehicle it is
+STOPWORDS = {"used", "new", "certified", "pre-owned", "preowned", "cpo", "for", "sale", "the", "a", "with"}
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+(?:-[a-z0-9]+)*')
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+class ListingDeduplicator:
+    """Streaming cross-source duplicate filter for listings
+
+    Exact duplicates are caught by canonical URL and VIN. Near-duplicates
+    (the same car posted on two marketplaces) are found with MinHash/LSH
+    over normalized title, price and mileage tokens, so each listing costs
+    a constant number of bucket lookups instead of a scan of all results.
+    Near-duplicates only count across sources: two similar listings on
+    one marketplace are two cars, e.g. a dealer's identical trims.
+    """
+
+    def __init__(self, num_perm: int = 32, bands: int = 8, threshold: float = 0.7):
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+
+        # Fixed seed so signatures are comparable across instances
+        rng = random.Random(1505)
+        self.permutations = [
+            (rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME))
+            for _ in range(self.rows * bands)
+        ]
+
+        self.seen_keys: Set[str] = set()
+        self.buckets: Dict[Tuple[int, tuple], List[int]] = {}
+        self.entries: List[Tuple[str, Set[str], Optional[int], Optional[int]]] = []
+
+    def _tokens(self, listing: ListingRecord, price: Optional[int], mileage: Optional[int]) -> Set[str]:
+        """Normalized token set describing the vehicle"""
+        tokens = {
+            token for token in TOKEN_PATTERN.findall(listing.title.lower())
+            if token not in STOPWORDS
+        }
+        # Coarse buckets so small formatting differences still collide
+        if price is not None:
+            tokens.add(f"p:{price // 500}")
+        if mileage is not None:
+            tokens.add(f"m:{mileage // 2000}")
+        return tokens
+
+    def _signature(self, tokens: Set[str]) -> List[int]:
+        """MinHash signature of a token set"""
+        hashes = [
+            int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), 'little')
+            for token in tokens
+        ]
+        return [
+            min(((a * h + b) % MERSENNE_PRIME) & MAX_HASH for h in hashes)
+            for a, b in self.permutations
+        ]
+
+    def _is_match(self, source: str, tokens: Set[str], price: Optional[int], mileage: Optional[int], index: int) -> bool:
+        """Verify an LSH candidate from another source with exact Jaccard and numeric tolerance"""
+        other_source, other_tokens, other_price, other_mileage = self.entries[index]
+
+        if source == other_source:
+            return False
+        if price is not None and other_price is not None and abs(price - other_price) > max(price, other_price) * 0.02:
+            return False
+        if mileage is not None and other_mileage is not None and abs(mileage - other_mileage) > 500:
+            return False
+
+        union = len(tokens | other_tokens)
+        return union > 0 and len(tokens & other_tokens) / union >= self.threshold
+
+    def add(self, listing: ListingRecord) -> bool:
+        """Record a listing; return False if it duplicates one already seen"""
+        keys = [f"url:{canonicalize_url(listing.listing_url)}"]
+        if listing.vin:
+            keys.append(f"vin:{listing.vin.strip().upper()}")
+        if any(key in self.seen_keys for key in keys):
+            return False
+
+        price = listing.price_value
+        mileage = listing.mileage_value
+        tokens = self._tokens(listing, price, mileage)
+
+        band_keys = []
+        if tokens:
+            signature = self._signature(tokens)
+            for band in range(self.bands):
+                band_key = (band, tuple(signature[band * self.rows:(band + 1) * self.rows]))
+                for index in self.buckets.get(band_key, ()):
+                    if self._is_match(listing.source, tokens, price, mileage, index):
+                        return False
+                band_keys.append(band_key)
+
+        index = len(self.entries)
+        self.entries.append((listing.source, tokens, price, mileage))
+        self.seen_keys.update(keys)
+        for band_key in band_keys:
+            self.buckets.setdefault(band_key, []).append(index)
+
+        return True
+
+    def filter(self, listings: List[ListingRecord]) -> List[ListingRecord]:
+        """Return the listings that are not duplicates, in order"""
+        return [listing for listing in listings if self.add(listing)]
@@ -0,0 +1,96 @@
+import ipaddress
+import socket
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+from urllib.parse import urljoin, urlparse
+
+import aiohttp
+from aiohttp.abc import AbstractResolver
+from aiohttp.resolver import DefaultResolver
+
+logger = logging.getLogger(__name__)
+
+MAX_REDIRECTS = 3
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+class BlockedHost(OSError):
+    """A URL points at an address outside the public internet
+
+    An OSError so that, raised from the resolver, aiohttp reports it as a
+    connection error carrying this exception.
+    """
+
+def is_public_address(host: str) -> bool:
+    """Whether an IP address is globally routable"""
+    return ipaddress.ip_address(host.split("%")[0]).is_global
+
+def check_url(url: str, allow_private: bool = False):
+    """Reject non-http(s) URLs and IP literals outside the public internet
+
+    Hostnames are checked when they are resolved, by GuardedResolver.
+    """
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise ValueError("URL must be http(s) with a host")
+    if allow_private:
+        return
+    try:
+        public = is_public_address(parsed.hostname)
+    except ValueError:
+        return  # A hostname, not an IP literal
+    if not public:
+        raise BlockedHost(f"{parsed.hostname} is not a public address")
+
+def blocked_by_guard(error: Exception) -> bool:
+    """Whether an aiohttp error was raised because the host resolved to a blocked address"""
+    return isinstance(error, aiohttp.ClientConnectorError) and isinstance(error.os_error, BlockedHost)
+
+class GuardedResolver(AbstractResolver):
+    """aiohttp's default resolver, refusing names that resolve to non-public addresses
+
+    The check runs on the very addresses the connector then connects to,
+    so a DNS answer that changes between a check and the connect (DNS
+    rebinding) cannot slip through.
+    """
+
+    def __init__(self, allow_private: bool = False):
+        self.allow_private = allow_private
+        self._resolver = DefaultResolver()
+
+    async def resolve(self, host: str, port: int = 0, family: int = socket.AF_INET):
+        addresses = await self._resolver.resolve(host, port, family)
+        if not self.allow_private:
+            for address in addresses:
+                if not is_public_address(address["host"]):
+                    raise BlockedHost(f"{host} resolves to non-public address {address['host']}")
+        return addresses
+
+    async def close(self):
+        await self._resolver.close()
+
+def create_session(allow_private: bool = False, timeout: Optional[aiohttp.ClientTimeout] = None) -> aiohttp.ClientSession:
+    """Session for fetching user-supplied URLs; must be created on the running loop"""
+    connector = aiohttp.TCPConnector(resolver=GuardedResolver(allow_private))
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+@asynccontextmanager
+async def guarded_request(session: aiohttp.ClientSession, method: str, url: str,
+                          allow_private: bool = False, max_redirects: int = MAX_REDIRECTS,
+                          **kwargs) -> AsyncIterator[aiohttp.ClientResponse]:
+    """Make a request, following redirects only to URLs that pass check_url
+
+    With max_redirects=0 a redirect response is returned as it is.
+    """
+    for _ in range(max_redirects + 1):
+        check_url(url, allow_private)
+        async with session.request(method, url, allow_redirects=False, **kwargs) as response:
+            location = response.headers.get("Location")
+            if response.status not in REDIRECT_STATUSES or not location or max_redirects == 0:
+                yield response
+                return
+            url = urljoin(str(response.url), location)
+            if response.status == 303:
+                method = "GET"
+                kwargs.pop("data", None)
+    raise aiohttp.ClientError(f"More than {max_redirects} redirects")
@@ -0,0 +1,216 @@
+import io
+import logging
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+import numpy as np
+
+from .config import settings
+from .store import listing_store
+
+# pyarrow is only needed for bulk exports
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as pa_dataset
+    import pyarrow.ipc
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DATASETS = ("listings", "detections")
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# Hive-style partition column of each dataset's Parquet export
+PARTITION_COLUMNS = {
+    "listings": "source",
+    "detections": "detected_date",
+}
+
+def _category():
+    """Dictionary-encoded string type for low-cardinality columns"""
+    return pa.dictionary(pa.int32(), pa.string())
+
+def listing_schema() -> "pa.Schema":
+    """Arrow schema of exported listings"""
+    return pa.schema([
+        ("listing_url", pa.string()),
+        ("title", pa.string()),
+        ("price", pa.string()),
+        ("price_value", pa.int64()),
+        ("year", pa.int16()),
+        ("make", _category()),
+        ("model", _category()),
+        ("trim", pa.string()),
+        ("mileage", pa.string()),
+        ("mileage_value", pa.int64()),
+        ("location", pa.string()),
+        ("dealer", pa.string()),
+        ("image_url", pa.string()),
+        ("source", pa.string()),
+        ("vin", pa.string()),
+        ("scraped_at", pa.timestamp("us", tz="UTC")),
+    ])
+
+def detection_schema() -> "pa.Schema":
+    """Arrow schema of exported detections; embeddings are fixed-size float32 lists"""
+    return pa.schema([
+        ("detected_at", pa.timestamp("us", tz="UTC")),
+        ("detected_date", pa.date32()),
+        ("make", _category()),
+        ("model", _category()),
+        ("year", pa.int16()),
+        ("body_type", _category()),
+        ("color", _category()),
+        ("confidence", pa.float32()),
+        ("embedding", pa.list_(pa.float32(), settings.embedding_dim)),
+    ])
+
+def schema_for(dataset: str) -> "pa.Schema":
+    return listing_schema() if dataset == "listings" else detection_schema()
+
+def _timestamps(seconds) -> "pa.Array":
+    """Unix seconds (floats) to a microsecond timestamp array"""
+    micros = (np.asarray(seconds, dtype=np.float64) * 1e6).astype(np.int64)
+    return pa.array(micros, type=pa.timestamp("us", tz="UTC"))
+
+class Vocabulary:
+    """Dictionary of one categorical column that only grows during an export
+
+    IPC files allow a single dictionary per field, so later batches may
+    only append to it (written as dictionary deltas), never replace it.
+    """
+
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def encode(self, values) -> "pa.DictionaryArray":
+        indices = []
+        for value in values:
+            if value is None:
+                indices.append(None)
+                continue
+            position = self.index.get(value)
+            if position is None:
+                position = self.index[value] = len(self.values)
+                self.values.append(value)
+            indices.append(position)
+        return pa.DictionaryArray.from_arrays(
+            pa.array(indices, type=pa.int32()), pa.array(self.values, type=pa.string())
+        )
+
+def _embeddings(blobs) -> "pa.Array":
+    """Pack float32 blobs into one contiguous fixed-size list array; bad or missing blobs become nulls"""
+    dim = settings.embedding_dim
+    flat = np.zeros((len(blobs), dim), dtype=np.float32)
+    valid = np.zeros(len(blobs), dtype=bool)
+
+    for i, blob in enumerate(blobs):
+        if blob is not None and len(blob) == dim * 4:
+            flat[i] = np.frombuffer(blob, dtype="<f4")
+            valid[i] = True
+
+    values = pa.array(flat.reshape(-1))
+    validity = pa.array(valid).buffers()[1]
+    return pa.Array.from_buffers(
+        pa.list_(pa.float32(), dim), len(blobs), [validity], children=[values]
+    )
+
+def listing_batch(rows: List[tuple], vocabularies: Dict[str, Vocabulary]) -> "pa.RecordBatch":
+    """Build a typed record batch from listings rows"""
+    (listing_url, title, price, price_value, year, make, model, trim, mileage,
+     mileage_value, location, dealer, image_url, source, vin, scraped_at) = zip(*rows)
+
+    return pa.RecordBatch.from_arrays([
+        pa.array(listing_url, type=pa.string()),
+        pa.array(title, type=pa.string()),
+        pa.array(price, type=pa.string()),
+        pa.array(price_value, type=pa.int64()),
+        pa.array(year, type=pa.int16()),
+        vocabularies["make"].encode(make),
+        vocabularies["model"].encode(model),
+        pa.array(trim, type=pa.string()),
+        pa.array(mileage, type=pa.string()),
+        pa.array(mileage_value, type=pa.int64()),
+        pa.array(location, type=pa.string()),
+        pa.array(dealer, type=pa.string()),
+        pa.array(image_url, type=pa.string()),
+        pa.array(source, type=pa.string()),
+        pa.array(vin, type=pa.string()),
+        _timestamps(scraped_at),
+    ], schema=listing_schema())
+
+def detection_batch(rows: List[tuple], vocabularies: Dict[str, Vocabulary]) -> "pa.RecordBatch":
+    """Build a typed record batch from detections rows"""
+    detected_at, make, model, year, body_type, color, confidence, embedding = zip(*rows)
+    days = (np.asarray(detected_at, dtype=np.float64) // 86400).astype(np.int32)
+
+    return pa.RecordBatch.from_arrays([
+        _timestamps(detected_at),
+        pa.array(days, type=pa.date32()),
+        vocabularies["make"].encode(make),
+        vocabularies["model"].encode(model),
+        pa.array(year, type=pa.int16()),
+        vocabularies["body_type"].encode(body_type),
+        vocabularies["color"].encode(color),
+        pa.array(confidence, type=pa.float32()),
+        _embeddings(embedding),
+    ], schema=detection_schema())
+
+def iter_record_batches(dataset: str, batch_size: int = 10000) -> Iterator["pa.RecordBatch"]:
+    """Read a dataset from the listing store as Arrow record batches"""
+    build = listing_batch if dataset == "listings" else detection_batch
+    vocabularies = defaultdict(Vocabulary)
+    for rows in listing_store.iter_batches(dataset, batch_size):
+        yield build(rows, vocabularies)
+
+def _ipc_options() -> "pa.ipc.IpcWriteOptions":
+    return pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+
+def stream_ipc(dataset: str, batch_size: int = 10000) -> Iterator[bytes]:
+    """Arrow IPC stream of a dataset, yielded a batch at a time for HTTP streaming"""
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, schema_for(dataset), options=_ipc_options()) as writer:
+        for batch in iter_record_batches(dataset, batch_size):
+            writer.write_batch(batch)
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+    yield sink.getvalue()
+
+def write_ipc_file(dataset: str, path: Path, batch_size: int = 10000) -> int:
+    """Write an Arrow IPC file, which readers can memory-map without copying"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rows = 0
+    with pa.OSFile(str(path), "wb") as sink:
+        with pa.ipc.new_file(sink, schema_for(dataset), options=_ipc_options()) as writer:
+            for batch in iter_record_batches(dataset, batch_size):
+                writer.write_batch(batch)
+                rows += batch.num_rows
+    logger.info(f"Exported {rows} {dataset} to {path}")
+    return rows
+
+def write_parquet(dataset: str, directory: Path, batch_size: int = 10000) -> int:
+    """Write a Hive-partitioned Parquet dataset, streaming batch by batch"""
+    rows = 0
+
+    def counted():
+        nonlocal rows
+        for batch in iter_record_batches(dataset, batch_size):
+            rows += batch.num_rows
+            yield batch
+
+    pa_dataset.write_dataset(
+        counted(),
+        str(directory),
+        schema=schema_for(dataset),
+        format="parquet",
+        partitioning=[PARTITION_COLUMNS[dataset]],
+        partitioning_flavor="hive",
+        existing_data_behavior="delete_matching"
+    )
+    logger.info(f"Exported {rows} {dataset} to {directory}")
+    return rows
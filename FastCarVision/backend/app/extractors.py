@@ -0,0 +1,220 @@
+import json
+import logging
+from typing import List, Dict, Any, Optional, Iterator
+
+# Prefer orjson for parsing embedded blobs, fall back to the stdlib
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Markers for JSON embedded in marketplace result pages
+JSON_LD_MARKER = b'application/ld+json'
+STATE_MARKERS = (
+    b'__NEXT_DATA__',
+    b'__INITIAL_STATE__',
+    b'__PRELOADED_STATE__',
+    b'__APOLLO_STATE__',
+)
+SCRIPT_END = b'</script>'
+
+VEHICLE_TYPES = {"car", "vehicle", "motorvehicle", "motorcycle", "busorcoach"}
+# Properties that set a vehicle typed as a plain schema.org Product apart
+# from accessories and ads on the same page
+VEHICLE_FIELDS = (
+    'vehicleIdentificationNumber', 'vin', 'vehicleModelDate',
+    'mileageFromOdometer', 'vehicleEngine', 'bodyType',
+)
+MAX_NODES = 50000  # Bound the walk over very large state blobs
+
+def loads(data: bytes) -> Any:
+    """Parse JSON bytes with the fastest available parser"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+class StructuredDataExtractor:
+    """Locate and decode listing data embedded as JSON in a result page"""
+
+    def find_blobs(self, page: bytes) -> Iterator[bytes]:
+        """Yield raw JSON payloads from JSON-LD and hydration-state scripts"""
+        # JSON-LD: <script type="application/ld+json">{...}</script>
+        pos = page.find(JSON_LD_MARKER)
+        while pos != -1:
+            start = page.find(b'>', pos)
+            end = page.find(SCRIPT_END, start)
+            if start == -1 or end == -1:
+                break
+            yield page[start + 1:end]
+            pos = page.find(JSON_LD_MARKER, end)
+
+        # Hydration state: <script id="__NEXT_DATA__">{...}</script>
+        # or window.__INITIAL_STATE__ = {...};</script>
+        for marker in STATE_MARKERS:
+            pos = page.find(marker)
+            if pos == -1:
+                continue
+            end = page.find(SCRIPT_END, pos)
+            if end == -1:
+                continue
+            start = page.find(b'{', pos, end)
+            if start == -1:
+                continue
+            blob = page[start:end].rstrip()
+            if blob.endswith(b';'):
+                blob = blob[:-1]
+            yield blob
+
+    def extract(self, page: bytes) -> List[Dict[str, Any]]:
+        """Return normalized listing fields found in embedded JSON"""
+        items = []
+        seen_urls = set()
+
+        for blob in self.find_blobs(page):
+            try:
+                data = loads(blob)
+            except ValueError:
+                continue
+
+            for node in self._iter_vehicle_nodes(data):
+                fields = self._map_vehicle(node)
+                if fields and fields['listing_url'] not in seen_urls:
+                    seen_urls.add(fields['listing_url'])
+                    items.append(fields)
+
+        return items
+
+    def _iter_vehicle_nodes(self, data: Any) -> Iterator[Dict[str, Any]]:
+        """Walk a decoded blob and yield dicts that describe a vehicle"""
+        stack = [data]
+        visited = 0
+
+        while stack and visited < MAX_NODES:
+            node = stack.pop()
+            visited += 1
+
+            if isinstance(node, list):
+                stack.extend(reversed(node))
+                continue
+            if not isinstance(node, dict):
+                continue
+
+            if self._is_vehicle(node):
+                yield node
+                continue
+
+            for value in node.values():
+                if isinstance(value, (dict, list)):
+                    stack.append(value)
+
+    def _is_vehicle(self, node: Dict[str, Any]) -> bool:
+        """Check whether a dict looks like a single vehicle listing"""
+        node_type = node.get('@type')
+        if not isinstance(node_type, list):
+            node_type = [node_type]
+        types = {t.lower() for t in node_type if isinstance(t, str)}
+        if types & VEHICLE_TYPES:
+            return True
+        if 'product' in types:
+            return any(key in node for key in VEHICLE_FIELDS)
+        if types:
+            return False
+
+        # Hydration state objects have no schema.org type, so look for
+        # the combination of vehicle and listing keys
+        has_vehicle = 'make' in node or 'vin' in node or 'vehicleIdentificationNumber' in node
+        has_listing = any(key in node for key in ('url', 'vdpUrl', 'listingUrl', 'href'))
+        return has_vehicle and has_listing
+
+    def _map_vehicle(self, node: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Map a schema.org Car or hydration-state vehicle to listing fields"""
+        offers = node.get('offers')
+        if isinstance(offers, list):
+            offers = offers[0] if offers else None
+        if not isinstance(offers, dict):
+            offers = {}
+
+        url = _first(node, 'url', 'vdpUrl', 'listingUrl', 'href') or offers.get('url')
+        make = _name(_first(node, 'brand', 'manufacturer', 'make'))
+        model = _name(node.get('model'))
+        year = _to_int(_first(node, 'vehicleModelDate', 'modelDate', 'year', 'productionDate'))
+        title = _name(_first(node, 'name', 'title', 'heading'))
+
+        if not title and make and model:
+            title = f"{year} {make} {model}" if year else f"{make} {model}"
+        if not isinstance(url, str) or not title:
+            return None
+
+        seller = offers.get('seller') or node.get('dealer')
+
+        return {
+            'title': title,
+            'price': _first(offers, 'price', 'lowPrice') or _first(node, 'price', 'listPrice'),
+            'year': year,
+            'make': make,
+            'model': model,
+            'mileage': _value(_first(node, 'mileageFromOdometer', 'mileage', 'odometer')),
+            'location': _locality(_first(offers, 'availableAtOrFrom') or node.get('location')),
+            'dealer': _name(seller) or node.get('dealerName'),
+            'image_url': _image(_first(node, 'image', 'imageUrl', 'primaryPhotoUrl', 'thumbnail')),
+            'listing_url': url,
+            'vin': _first(node, 'vehicleIdentificationNumber', 'vin'),
+        }
+
+def _first(node: Dict[str, Any], *keys: str) -> Any:
+    """Return the first non-empty value among keys"""
+    for key in keys:
+        value = node.get(key)
+        if value not in (None, '', [], {}):
+            return value
+    return None
+
+def _name(value: Any) -> Optional[str]:
+    """Unwrap schema.org Thing objects to their name"""
+    if isinstance(value, dict):
+        value = value.get('name')
+    if isinstance(value, (int, float)):
+        value = str(value)
+    return value.strip() if isinstance(value, str) and value.strip() else None
+
+def _value(value: Any) -> Any:
+    """Unwrap schema.org QuantitativeValue objects"""
+    if isinstance(value, dict):
+        return value.get('value')
+    return value
+
+def _to_int(value: Any) -> Optional[int]:
+    """Coerce year-like values such as 2020 or "2020-01-01" to int"""
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value[:4].isdigit():
+        return int(value[:4])
+    return None
+
+def _locality(value: Any) -> Optional[str]:
+    """Format a schema.org Place/PostalAddress as "City, ST" """
+    if isinstance(value, str):
+        return value
+    if not isinstance(value, dict):
+        return None
+    address = value.get('address', value)
+    if isinstance(address, str):
+        return address
+    parts = [address.get('addressLocality') or address.get('city'),
+             address.get('addressRegion') or address.get('state')]
+    parts = [p for p in parts if isinstance(p, str) and p]
+    return ", ".join(parts) if parts else None
+
+def _image(value: Any) -> Optional[str]:
+    """Pick a single image URL from a string, list or ImageObject"""
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if isinstance(value, dict):
+        value = value.get('url') or value.get('contentUrl')
+    return value if isinstance(value, str) else None
+
+# Global extractor, shared by all scrapers
+structured_extractor = StructuredDataExtractor()
@@ -0,0 +1,125 @@
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Mapping, Optional
+
+from .config import settings
+
+# aiohttp and httpx decode brotli responses when a brotli package is installed
+try:
+    import brotli  # noqa: F401
+    BROTLI_AVAILABLE = True
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        BROTLI_AVAILABLE = True
+    except ImportError:
+        BROTLI_AVAILABLE = False
+
+# httpx with h2 is optional and only used when SCRAPER_HTTP2 is set
+try:
+    import httpx
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# aiohttp.ClientSession, or httpx.AsyncClient when HTTP/2 is enabled
+PageClient = Any
+
+def accept_encoding() -> str:
+    """Content codings this process can decode"""
+    return "gzip, deflate, br" if BROTLI_AVAILABLE else "gzip, deflate"
+
+class PageResponse:
+    """Status, headers and decoded body of one page fetch"""
+
+    __slots__ = ("status", "reason", "headers", "body", "wire_bytes")
+
+    def __init__(self, status: int, reason: str, headers: Mapping[str, str], body: bytes, wire_bytes: int):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+        self.wire_bytes = wire_bytes
+
+async def fetch(client: PageClient, url: str, headers: Dict[str, str]) -> PageResponse:
+    """GET a page over either client type"""
+    if HTTP2_AVAILABLE and isinstance(client, httpx.AsyncClient):
+        response = await client.get(url, headers=headers)
+        return PageResponse(
+            response.status_code, response.reason_phrase, response.headers,
+            response.content, response.num_bytes_downloaded
+        )
+
+    async with client.get(url, headers=headers, timeout=settings.request_timeout) as response:
+        body = await response.read()
+        # aiohttp decompresses transparently; Content-Length still gives the
+        # compressed size, and chunked responses fall back to the decoded size
+        wire_bytes = response.content_length if response.content_length is not None else len(body)
+        return PageResponse(response.status, response.reason or "", response.headers, body, wire_bytes)
+
+def create_http2_client() -> PageClient:
+    """httpx client that multiplexes requests to the same host over one connection"""
+    limits = httpx.Limits(max_connections=settings.max_concurrent_requests)
+    return httpx.AsyncClient(http2=True, limits=limits, timeout=settings.request_timeout)
+
+class CachedPage:
+    __slots__ = ("body", "etag", "last_modified", "stored_at")
+
+    def __init__(self, body: bytes, etag: Optional[str], last_modified: Optional[str]):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = time.time()
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers for revalidating this page"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+class PageCache:
+    """Result pages with their validators, bounded by total body size
+
+    Only pages that came with an ETag or Last-Modified are kept, since
+    anything else cannot be revalidated.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._pages: OrderedDict = OrderedDict()
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        page = self._pages.get(url)
+        if page is not None:
+            self._pages.move_to_end(url)
+        return page
+
+    def put(self, url: str, headers: Mapping[str, str], body: bytes):
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if not (etag or last_modified) or len(body) > self.max_bytes:
+            self.discard(url)
+            return
+
+        self.discard(url)
+        self._pages[url] = CachedPage(body, etag, last_modified)
+        self.total_bytes += len(body)
+        while self.total_bytes > self.max_bytes:
+            _, evicted = self._pages.popitem(last=False)
+            self.total_bytes -= len(evicted.body)
+
+    def discard(self, url: str):
+        page = self._pages.pop(url, None)
+        if page is not None:
+            self.total_bytes -= len(page.body)
+
+# Global page cache
+page_cache = PageCache(settings.page_cache_max_bytes)
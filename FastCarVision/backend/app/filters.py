@@ -0,0 +1,68 @@
+import numpy as np
+from typing import List, Optional
+
+from .models import ListingFilter
+from .records import ListingRecord
+
+class ListingColumns:
+    """Columnar view of a result set for vectorized filtering and ranking
+
+    Missing values are stored as NaN, so they never satisfy a range filter
+    and always sort last.
+    """
+
+    def __init__(self, listings: List[ListingRecord]):
+        self.listings = listings
+        count = len(listings)
+        self.price = np.fromiter(
+            (l.price_value if l.price_value is not None else np.nan for l in listings),
+            dtype=np.float64, count=count
+        )
+        self.mileage = np.fromiter(
+            (l.mileage_value if l.mileage_value is not None else np.nan for l in listings),
+            dtype=np.float64, count=count
+        )
+        self.year = np.fromiter(
+            (l.year if l.year is not None else np.nan for l in listings),
+            dtype=np.float64, count=count
+        )
+
+    def mask(self, listing_filter: ListingFilter) -> np.ndarray:
+        """Boolean mask of rows matching every bound in the filter"""
+        mask = np.ones(len(self.listings), dtype=bool)
+
+        with np.errstate(invalid='ignore'):
+            if listing_filter.min_price is not None:
+                mask &= self.price >= listing_filter.min_price
+            if listing_filter.max_price is not None:
+                mask &= self.price <= listing_filter.max_price
+            if listing_filter.max_mileage is not None:
+                mask &= self.mileage <= listing_filter.max_mileage
+            if listing_filter.min_year is not None:
+                mask &= self.year >= listing_filter.min_year
+            if listing_filter.max_year is not None:
+                mask &= self.year <= listing_filter.max_year
+
+        return mask
+
+    def select(self, listing_filter: ListingFilter, limit: Optional[int] = None) -> List[ListingRecord]:
+        """Filter, sort and truncate, returning listings in ranked order"""
+        indices = np.flatnonzero(self.mask(listing_filter))
+
+        if listing_filter.sort_by:
+            key = listing_filter.sort_by.lstrip('-')
+            values = getattr(self, key)[indices]
+            if listing_filter.sort_by.startswith('-'):
+                values = -values  # NaN stays NaN, so missing values stay last
+            indices = indices[np.argsort(values, kind='stable')]
+
+        if limit is not None:
+            indices = indices[:limit]
+
+        return [self.listings[i] for i in indices]
+
+def apply_filter(listings: List[ListingRecord], listing_filter: Optional[ListingFilter], limit: Optional[int] = None) -> List[ListingRecord]:
+    """Filter and rank listings; a no-op apart from truncation without a filter"""
+    if listing_filter is None or not listings:
+        return listings[:limit] if limit is not None else listings
+    return ListingColumns(listings).select(listing_filter, limit)
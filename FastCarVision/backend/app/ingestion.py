@@ -0,0 +1,195 @@
+import io
+import logging
+import os
+from typing import Optional
+
+from fastapi import HTTPException, UploadFile, status
+from fastapi.responses import JSONResponse
+from PIL import Image
+from starlette.datastructures import Headers
+
+from .config import settings
+from .metrics import stage
+
+logger = logging.getLogger(__name__)
+
+SNIFF_BYTES = 32  # Enough for every signature below
+# Room for multipart boundaries and headers around the image itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+# Leading bytes of each image format, mapped to the names used in supported_formats
+SIGNATURES = [
+    (b"\xff\xd8\xff", ("jpg", "jpeg")),
+    (b"\x89PNG\r\n\x1a\n", ("png",)),
+    (b"BM", ("bmp",)),
+    (b"GIF87a", ("gif",)),
+    (b"GIF89a", ("gif",)),
+    (b"II*\x00", ("tif", "tiff")),
+    (b"MM\x00*", ("tif", "tiff")),
+]
+
+def sniff_format(head: bytes) -> Optional[str]:
+    """Image format name from the first bytes of a file, or None if unknown"""
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    for magic, names in SIGNATURES:
+        if head.startswith(magic):
+            return names[0]
+    return None
+
+def is_supported(image_format: Optional[str]) -> bool:
+    """Whether a sniffed format is enabled in settings"""
+    if image_format is None:
+        return False
+    supported = {f.lower() for f in settings.supported_formats}
+    for _, names in SIGNATURES:
+        if image_format in names:
+            return bool(supported.intersection(names))
+    return image_format in supported
+
+def max_upload_label() -> str:
+    """Human-readable upload size limit"""
+    if settings.max_upload_bytes >= 1024 * 1024:
+        return f"{settings.max_upload_bytes / (1024 * 1024):g}MB"
+    return f"{settings.max_upload_bytes / 1024:g}KB"
+
+def too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Image file too large (max {max_upload_label()})"
+    )
+
+class BodyTooLarge(Exception):
+    """Raised from receive() once a request body passes the limit"""
+
+class BodySizeLimitMiddleware:
+    """
+    Cap request bodies at the upload limit before Starlette spools them
+
+    A declared Content-Length over the limit is refused without reading
+    the body. Bodies of unknown length (chunked uploads) are counted as
+    they arrive and cut off with 413 as soon as they pass the limit.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        limit = settings.max_upload_bytes + MULTIPART_OVERHEAD
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length and content_length.isdigit():
+            if int(content_length) > limit:
+                await self._reject(scope, receive, send)
+            else:
+                # The server never delivers more than the declared length
+                await self.app(scope, receive, send)
+            return
+
+        received = 0
+        exceeded = False
+        started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    exceeded = True
+                    raise BodyTooLarge()
+            return message
+
+        async def guarded_send(message):
+            nonlocal started
+            if exceeded:
+                # Whatever error the app made of the aborted body is replaced below
+                return
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not exceeded:
+                raise
+        if exceeded and not started:
+            logger.info(f"Rejected {scope.get('path')}: body over {max_upload_label()}")
+            await self._reject(scope, receive, send)
+
+    async def _reject(self, scope, receive, send):
+        response = JSONResponse(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            content={"detail": f"Image file too large (max {max_upload_label()})"}
+        )
+        await response(scope, receive, send)
+
+def spooled_size(file) -> int:
+    """Size of an already received upload, without reading it"""
+    position = file.tell()
+    file.seek(0, os.SEEK_END)
+    size = file.tell()
+    file.seek(position)
+    return size
+
+async def read_upload(file: UploadFile) -> bytes:
+    """
+    Read an uploaded image, rejecting it from its first bytes and its size
+    before the contents are loaded into memory
+
+    The body itself is capped while it is received, by
+    BodySizeLimitMiddleware; here the image part is checked on its own.
+    """
+    if not file.content_type or not file.content_type.startswith('image/'):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File must be an image"
+        )
+
+    head = await file.read(SNIFF_BYTES)
+    if not head:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Empty file"
+        )
+
+    if not is_supported(sniff_format(head)):
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Unsupported image format (supported: {', '.join(settings.supported_formats)})"
+        )
+
+    if spooled_size(file.file) > settings.max_upload_bytes:
+        logger.info(f"Rejected upload {file.filename}: over {max_upload_label()}")
+        raise too_large()
+
+    # One read of the whole file, so the contents are never copied again
+    await file.seek(0)
+    with stage("upload_read"):
+        return await file.read()
+
+def open_image(contents: bytes) -> Image.Image:
+    """
+    Open an image lazily and check its dimensions from the header, so
+    decompression bombs are rejected before any pixel data is decoded
+    """
+    try:
+        image = Image.open(io.BytesIO(contents))
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid or corrupt image"
+        )
+
+    width, height = image.size
+    if width * height > settings.max_image_pixels:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Image dimensions too large ({width}x{height})"
+        )
+
+    return image
@@ -0,0 +1,303 @@
+import abc
+import asyncio
+import contextvars
+import io
+import sqlite3
+import threading
+import time
+import uuid
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from PIL import Image
+
+from .config import settings
+from .models import JobStatus, JobStageEvent, SearchResults
+from .vision import vision_model
+from .scrapers import scraping_orchestrator
+from .admission import admission_controller
+from .metrics import stage
+from .tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+class JobStore(abc.ABC):
+    """Where job state lives; subclasses decide how it is persisted"""
+
+    @abc.abstractmethod
+    def save(self, job: JobStatus):
+        """Insert or replace a job's state"""
+
+    @abc.abstractmethod
+    def get(self, job_id: str) -> Optional[JobStatus]:
+        """Load a job's state, or None if unknown"""
+
+    @abc.abstractmethod
+    def delete_older_than(self, cutoff: datetime) -> int:
+        """Delete finished jobs last updated before cutoff"""
+
+    def open(self):
+        """Create backing storage at startup"""
+
+    def reopen(self):
+        """Re-establish connections in a forked worker"""
+
+class InMemoryJobStore(JobStore):
+    """Job state in a dict; lost on restart"""
+
+    def __init__(self):
+        self.jobs: Dict[str, JobStatus] = {}
+
+    def save(self, job: JobStatus):
+        self.jobs[job.job_id] = job
+
+    def get(self, job_id: str) -> Optional[JobStatus]:
+        return self.jobs.get(job_id)
+
+    def delete_older_than(self, cutoff: datetime) -> int:
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job.status in TERMINAL_STATUSES and job.updated_at < cutoff
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
+        return len(expired)
+
+class SqliteJobStore(JobStore):
+    """Job state in SQLite so it survives restarts and is shared by workers
+
+    Opened on first use (or by open() at startup).
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._open_lock = threading.Lock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.open()
+        return self._conn
+
+    def open(self):
+        with self._open_lock:
+            if self._conn is not None:
+                return
+            if self.db_path != ":memory:":
+                Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            conn = self._connect()
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "job_id TEXT PRIMARY KEY, status TEXT NOT NULL, "
+                "updated_at REAL NOT NULL, data TEXT NOT NULL)"
+            )
+            self._conn = conn
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def reopen(self):
+        self._lock = threading.Lock()
+        self._open_lock = threading.Lock()
+        if self._conn is not None and self.db_path != ":memory:":
+            self._conn = self._connect()
+
+    def save(self, job: JobStatus):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO jobs (job_id, status, updated_at, data) VALUES (?, ?, ?, ?)",
+                (job.job_id, job.status, job.updated_at.timestamp(), job.json())
+            )
+
+    def get(self, job_id: str) -> Optional[JobStatus]:
+        with self._lock:
+            row = self.conn.execute("SELECT data FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return JobStatus.parse_raw(row[0]) if row else None
+
+    def delete_older_than(self, cutoff: datetime) -> int:
+        with self._lock, self.conn:
+            cursor = self.conn.execute(
+                "DELETE FROM jobs WHERE status IN ('completed', 'failed') AND updated_at < ?",
+                (cutoff.timestamp(),)
+            )
+        return cursor.rowcount
+
+def create_job_store() -> JobStore:
+    """Build the job store selected in settings"""
+    if settings.job_store == "sqlite":
+        return SqliteJobStore(settings.job_store_path)
+    return InMemoryJobStore()
+
+def decode_image(contents: bytes) -> Image.Image:
+    """Fully decode image bytes"""
+    with stage("decode"):
+        image = Image.open(io.BytesIO(contents))
+        image.load()
+    return image
+
+class JobQueueFull(Exception):
+    """Raised when the job queue cannot accept more work"""
+
+class JobManager:
+    """Runs the recognition-and-search pipeline on a bounded background queue"""
+
+    def __init__(self, store: JobStore):
+        self.store = store
+        self.queue: Optional[asyncio.Queue] = None
+        self.workers: List[asyncio.Task] = []
+        self.subscribers: Dict[str, List[asyncio.Queue]] = {}
+
+    def start(self):
+        """Start the worker pool on the running event loop"""
+        if self.queue is not None:
+            return
+        self.queue = asyncio.Queue(maxsize=settings.job_queue_size)
+        loop = asyncio.get_running_loop()
+        self.workers = [loop.create_task(self._worker()) for _ in range(settings.job_workers)]
+        self.workers.append(loop.create_task(self._cleanup()))
+        logger.info(f"Job manager started with {settings.job_workers} workers")
+
+    async def stop(self):
+        """Cancel workers; queued jobs are abandoned"""
+        for task in self.workers:
+            task.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+        self.queue = None
+
+    async def _store_call(self, func, *args):
+        """Run a store method on a thread, since SQLite calls block"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, func, *args)
+
+    async def submit(self, contents: bytes) -> JobStatus:
+        """Queue an image for processing and return its initial status"""
+        if self.queue is None:
+            self.start()
+        if self.queue.full():
+            raise JobQueueFull()
+
+        job = JobStatus(
+            job_id=str(uuid.uuid4()),
+            status="queued",
+            stage="queued",
+            stages=[JobStageEvent(stage="queued")]
+        )
+        await self._store_call(self.store.save, job)
+        try:
+            # Carry the submitting request's span so the job continues its trace
+            self.queue.put_nowait((job.job_id, contents, tracer.current_span()))
+        except asyncio.QueueFull:
+            # Filled up while the job was being saved
+            job.error = "Job queue is full"
+            await self._update(job, "failed", status="failed", detail=job.error)
+            raise JobQueueFull()
+        return job
+
+    async def get(self, job_id: str) -> Optional[JobStatus]:
+        """Current status of a job"""
+        return await self._store_call(self.store.get, job_id)
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        """Receive status updates of a job run by this process
+
+        A job may run in another worker, so subscribers should also poll
+        the store.
+        """
+        updates: asyncio.Queue = asyncio.Queue()
+        self.subscribers.setdefault(job_id, []).append(updates)
+        return updates
+
+    def unsubscribe(self, job_id: str, updates: asyncio.Queue):
+        """Stop receiving updates"""
+        queues = self.subscribers.get(job_id, [])
+        if updates in queues:
+            queues.remove(updates)
+        if not queues:
+            self.subscribers.pop(job_id, None)
+
+    async def _update(self, job: JobStatus, stage: str, status: str = "running", detail: Optional[str] = None):
+        """Record a stage transition and notify subscribers"""
+        job.stage = stage
+        job.status = status
+        job.updated_at = datetime.now()
+        job.stages.append(JobStageEvent(stage=stage, at=job.updated_at, detail=detail))
+        await self._store_call(self.store.save, job)
+        for updates in self.subscribers.get(job.job_id, []):
+            updates.put_nowait(job)
+
+    async def _run(self, job: JobStatus, contents: bytes):
+        """Decode, detect and search for one job"""
+        start_time = time.time()
+        loop = asyncio.get_running_loop()
+
+        await self._update(job, "decoding")
+        image = await loop.run_in_executor(None, contextvars.copy_context().run, decode_image, contents)
+
+        await self._update(job, "detecting")
+        # Jobs are already bounded by the job queue, so they wait for a slot instead of shedding
+        job.detected_cars = await admission_controller.run_vision(vision_model.process_image, image, shed=False)
+        if not job.detected_cars:
+            raise ValueError("No cars detected in the image")
+
+        primary_car = job.detected_cars[0]
+        await self._update(job, "searching", detail=f"{primary_car.make} {primary_car.model}")
+        async with admission_controller.scraping.slot(shed=False):
+            listings = await scraping_orchestrator.search(primary_car)
+
+        query = f"{primary_car.make} {primary_car.model}"
+        if primary_car.year:
+            query = f"{primary_car.year} {query}"
+        job.result = SearchResults.construct(
+            query=query,
+            total_results=len(listings),
+            listings=listings,
+            processing_time=time.time() - start_time,
+            sources_used=list(set(listing.source for listing in listings))
+        )
+        await self._update(job, "completed", status="completed")
+
+    async def _worker(self):
+        """Process queued jobs one at a time"""
+        while True:
+            job_id, contents, parent_span = await self.queue.get()
+            job = None
+            try:
+                job = await self.get(job_id)
+                if job is None:
+                    logger.warning(f"Job {job_id} expired before it ran")
+                    continue
+                with tracer.span("job", parent=parent_span, job_id=job_id):
+                    await self._run(job, contents)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job {job_id} failed: {e}")
+                if job is not None:
+                    job.error = str(e)
+                    await self._update(job, "failed", status="failed", detail=str(e))
+            finally:
+                self.queue.task_done()
+
+    async def _cleanup(self):
+        """Drop finished jobs once they are older than the TTL"""
+        while True:
+            await asyncio.sleep(60)
+            cutoff = datetime.fromtimestamp(time.time() - settings.job_ttl)
+            try:
+                removed = await self._store_call(self.store.delete_older_than, cutoff)
+                if removed:
+                    logger.info(f"Removed {removed} expired jobs")
+            except Exception as e:
+                logger.error(f"Job cleanup failed: {e}")
+
+# Global job manager
+job_manager = JobManager(create_job_store())
@@ -1,14 +1,14 @@
+import asyncio
 import time
 import uuid
 import logging
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
-from fastapi import FastAPI, File, UploadFile, HTTPException, status
+from fastapi import FastAPI, File, UploadFile, HTTPException, Depends, Query, Request, WebSocket, WebSocketDisconnect, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from PIL import Image
-import io
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.websockets import WebSocketState
 
 from .config import settings
 from .models import (
@@ -16,10 +16,44 @@ from .models import (
     SearchResults, 
     HealthCheck, 
     ErrorResponse,
-    CarDetection
+    CarDetection,
+    CarListing,
+    ListingFilter,
+    DetectionSearchResults,
+    MultiSearchResults,
+    SavedSearch,
+    SavedSearchCreate,
+    SavedSearchChanges,
+    JobCreated,
+    JobStatus
 )
 from .vision import vision_model
 from .scrapers import scraping_orchestrator
+from .store import listing_store
+from .crawler import warm_crawler
+from .saved_searches import saved_search_manager
+from .jobs import job_manager, JobQueueFull, TERMINAL_STATUSES
+from .admission import admission_controller
+from .ingestion import BodySizeLimitMiddleware, read_upload, open_image
+from .responses import encoded_response
+from .serving import is_primary_worker
+from .metrics import (
+    PROMETHEUS_AVAILABLE,
+    CONTENT_TYPE_LATEST,
+    REQUEST_SECONDS,
+    REQUESTS_IN_FLIGHT,
+    QUEUE_DEPTH,
+    MULTIPROCESS,
+    gauge_function,
+    publish_gauges,
+    start_request_timings,
+    server_timing_header,
+    render_metrics
+)
+from .export import PYARROW_AVAILABLE, DATASETS, ARROW_STREAM_MEDIA_TYPE, stream_ipc
+from .tracing import tracer
+from .profiling import profiler
+from .thumbnails import thumbnail_service, snap_width, etag_for, etag_matches
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -41,6 +75,82 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Refuse oversized bodies while they are received, whether or not their length is declared
+app.add_middleware(BodySizeLimitMiddleware)
+
+@app.middleware("http")
+async def time_requests(request: Request, call_next):
+    """Record request latency, report per-stage timings in Server-Timing and open the root span"""
+    timings = start_request_timings()
+    start_time = time.perf_counter()
+    REQUESTS_IN_FLIGHT.inc()
+    status_code = 500
+    with tracer.span(request.method, traceparent=request.headers.get("traceparent"),
+                     **{"http.method": request.method, "http.target": request.url.path}) as span:
+        try:
+            with profiler.track_request(request.url.path):
+                response = await call_next(request)
+            status_code = response.status_code
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            total = time.perf_counter() - start_time
+            endpoint = request.scope.get("endpoint")
+            route = endpoint.__name__ if endpoint else "unmatched"
+            REQUEST_SECONDS.labels(route, request.method, str(status_code)).observe(total)
+            if span.sampled:
+                span.name = f"{request.method} {route}"
+                span.set_attribute("http.status_code", status_code)
+    
+    response.headers["Server-Timing"] = server_timing_header(timings, total)
+    if span.sampled:
+        response.headers["traceparent"] = span.traceparent
+    return response
+
+gauge_function(QUEUE_DEPTH.labels("vision"), lambda: admission_controller.vision.waiting)
+gauge_function(QUEUE_DEPTH.labels("scraping"), lambda: admission_controller.scraping.waiting)
+gauge_function(QUEUE_DEPTH.labels("thumbnails"), lambda: admission_controller.thumbnails.waiting)
+gauge_function(QUEUE_DEPTH.labels("jobs"), lambda: job_manager.queue.qsize() if job_manager.queue else 0)
+
+gauge_publisher: Optional[asyncio.Task] = None
+
+async def publish_queue_depths():
+    """Keep this worker's queue depths current for /metrics, which any worker may serve"""
+    while True:
+        publish_gauges()
+        await asyncio.sleep(1.0)
+
+@app.on_event("startup")
+async def startup():
+    """Open the stores and start background tasks"""
+    listing_store.open()
+    saved_search_manager.store.open()
+    job_manager.store.open()
+    # With pre-forked workers one crawler and one saved search scheduler
+    # are enough, since their stores are shared
+    if is_primary_worker():
+        if settings.warm_crawler_enabled:
+            warm_crawler.start()
+        saved_search_manager.start()
+    job_manager.start()
+    if MULTIPROCESS:
+        global gauge_publisher
+        gauge_publisher = asyncio.create_task(publish_queue_depths())
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Release resources held for the lifetime of the app"""
+    if gauge_publisher is not None:
+        gauge_publisher.cancel()
+    await warm_crawler.stop()
+    await saved_search_manager.stop()
+    await job_manager.stop()
+    await scraping_orchestrator.close()
+    await thumbnail_service.close()
+    listing_store.close()
+    saved_search_manager.store.close()
+    admission_controller.shutdown()
+    tracer.shutdown()
+
 @app.get("/", response_model=dict)
 async def root():
     """Root endpoint with API information"""
@@ -73,6 +183,61 @@ async def health_check():
             detail="Service unhealthy"
         )
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: per-stage latency histograms, scraper counters and queue gauges"""
+    if not PROMETHEUS_AVAILABLE:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Metrics require prometheus_client"
+        )
+    return Response(render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
+@app.get("/thumb")
+async def listing_thumbnail(
+    request: Request,
+    url: str = Query(..., max_length=2048, description="Listing image URL"),
+    w: int = Query(150, gt=0, le=2000, description="Width in pixels, rounded up to a cached size")
+):
+    """
+    Listing image resized for display, cached on disk and revalidated with ETags
+    """
+    data = await thumbnail_service.thumbnail(url, snap_width(w))
+    etag = etag_for(data)
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=604800"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(data, media_type="image/jpeg", headers=headers)
+
+@app.post("/admin/profile")
+async def profile_worker(
+    request: Request,
+    seconds: float = Query(10.0, gt=0, description="Sampling time, or the time limit in request mode"),
+    requests: int = Query(0, ge=0, description="Profile the next N requests matching route instead"),
+    route: Optional[str] = Query(None, description="Path prefix of the requests to profile"),
+    format: str = Query("json", regex="^(json|collapsed)$")
+):
+    """
+    Sample this worker's stacks, event-loop lag and slowest loop callbacks.
+    Admin only: needs PROFILING_ENABLED and the X-Admin-Token header.
+    """
+    profiler.authorize(request)
+    result = await profiler.profile(seconds, requests, route)
+    if format == "collapsed":
+        return Response(result["collapsed"], media_type="text/plain")
+    return result
+
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness probe: 503 while the vision or scraping queues are saturated,
+    so a load balancer can route new traffic elsewhere
+    """
+    snapshot = admission_controller.snapshot()
+    if not snapshot["ready"]:
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=snapshot)
+    return snapshot
+
 @app.post("/upload-image", response_model=ImageUploadResponse)
 async def upload_car_image(file: UploadFile = File(...)):
     """
@@ -81,26 +246,13 @@ async def upload_car_image(file: UploadFile = File(...)):
     start_time = time.time()
     
     try:
-        # Validate file type
-        if not file.content_type or not file.content_type.startswith('image/'):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="File must be an image"
-            )
-        
-        # Read and validate image
-        contents = await file.read()
-        if len(contents) > 10 * 1024 * 1024:  # 10MB limit
-            raise HTTPException(
-                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                detail="Image file too large (max 10MB)"
-            )
+        # Read and validate image; size, format and dimensions are checked
+        # before any pixel data is decoded
+        contents = await read_upload(file)
+        image = open_image(contents)
         
-        # Process image
-        image = Image.open(io.BytesIO(contents))
-        
-        # Detect cars in the image
-        detected_cars = vision_model.process_image(image)
+        # Detect cars in the image; sheds with 503 when the vision queue is full
+        detected_cars = await admission_controller.run_vision(vision_model.process_image, image)
         
         processing_time = time.time() - start_time
         image_id = str(uuid.uuid4())
@@ -123,38 +275,63 @@ async def upload_car_image(file: UploadFile = File(...)):
             detail="Failed to process image"
         )
 
-@app.post("/search-cars", response_model=SearchResults)
-async def search_car_listings(car_detection: CarDetection):
-    """
-    Search for car listings based on detected car attributes
-    """
+def get_listing_filter(
+    min_price: Optional[int] = Query(None, ge=0),
+    max_price: Optional[int] = Query(None, ge=0),
+    max_mileage: Optional[int] = Query(None, ge=0),
+    min_year: Optional[int] = None,
+    max_year: Optional[int] = None,
+    sort_by: Optional[str] = Query(None, regex=r'^-?(price|mileage|year)$')
+) -> ListingFilter:
+    """Build a listing filter from query parameters"""
+    return ListingFilter(
+        min_price=min_price,
+        max_price=max_price,
+        max_mileage=max_mileage,
+        min_year=min_year,
+        max_year=max_year,
+        sort_by=sort_by
+    )
+
+def build_search_results(car_detection: CarDetection, listings: List[CarListing], processing_time: float) -> SearchResults:
+    """Wrap listings for a detection in a SearchResults response"""
+    # Get unique sources
+    sources_used = list(set(listing.source for listing in listings))
+    
+    query = f"{car_detection.make} {car_detection.model}"
+    if car_detection.year:
+        query = f"{car_detection.year} {query}"
+    
+    # Listings are already validated CarListing models, so skip re-validation
+    return SearchResults.construct(
+        query=query,
+        total_results=len(listings),
+        listings=listings,
+        processing_time=processing_time,
+        sources_used=sources_used
+    )
+
+async def run_search(car_detection: CarDetection, mode: Optional[str], listing_filter: Optional[ListingFilter]) -> SearchResults:
+    """Search listings for one detection under the scraping admission limits"""
     start_time = time.time()
     
     try:
         logger.info(f"Searching for {car_detection.make} {car_detection.model}")
+        warm_crawler.record_query(car_detection)
         
-        # Run web scraping
-        listings = await scraping_orchestrator.scrape_all(car_detection)
+        # Run web scraping (or serve from the listing store)
+        async with admission_controller.scraping.slot():
+            listings = await scraping_orchestrator.search(car_detection, mode, listing_filter)
         
         processing_time = time.time() - start_time
+        results = build_search_results(car_detection, listings, processing_time)
         
-        # Get unique sources
-        sources_used = list(set(listing.source for listing in listings))
+        logger.info(f"Found {len(listings)} listings in {processing_time:.2f}s from {len(results.sources_used)} sources")
         
-        query = f"{car_detection.make} {car_detection.model}"
-        if car_detection.year:
-            query = f"{car_detection.year} {query}"
-        
-        logger.info(f"Found {len(listings)} listings in {processing_time:.2f}s from {len(sources_used)} sources")
-        
-        return SearchResults(
-            query=query,
-            total_results=len(listings),
-            listings=listings,
-            processing_time=processing_time,
-            sources_used=sources_used
-        )
+        return results
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error searching car listings: {e}")
         raise HTTPException(
@@ -162,8 +339,27 @@ async def search_car_listings(car_detection: CarDetection):
             detail="Failed to search car listings"
         )
 
+@app.post("/search-cars", response_model=SearchResults)
+async def search_car_listings(
+    request: Request,
+    car_detection: CarDetection,
+    mode: Optional[str] = None,
+    listing_filter: Optional[ListingFilter] = Depends(get_listing_filter)
+):
+    """
+    Search for car listings based on detected car attributes
+    
+    mode: "live" always scrapes, "store-first" answers from the local
+    listing store when it has enough fresh matches.
+    Results can be filtered by price, mileage and year ranges and sorted
+    with sort_by (price, mileage or year, prefix - for descending).
+    Send Accept: application/msgpack for a MessagePack response.
+    """
+    results = await run_search(car_detection, mode, listing_filter)
+    return encoded_response(request, results)
+
 @app.post("/process-and-search", response_model=SearchResults)
-async def process_image_and_search(file: UploadFile = File(...)):
+async def process_image_and_search(request: Request, file: UploadFile = File(...)):
     """
     Complete pipeline: upload image, detect car, and search for listings
     """
@@ -183,7 +379,7 @@ async def process_image_and_search(file: UploadFile = File(...)):
         primary_car = upload_response.detected_cars[0]
         
         # Search for listings
-        search_results = await search_car_listings(primary_car)
+        search_results = await run_search(primary_car, settings.search_mode, None)
         
         # Update processing time to include both steps
         total_processing_time = time.time() - start_time
@@ -191,7 +387,7 @@ async def process_image_and_search(file: UploadFile = File(...)):
         
         logger.info(f"Complete pipeline finished in {total_processing_time:.2f}s")
         
-        return search_results
+        return encoded_response(request, search_results)
     
     except HTTPException:
         raise
@@ -202,12 +398,227 @@ async def process_image_and_search(file: UploadFile = File(...)):
             detail="Failed to process image and search"
         )
 
+@app.post("/process-and-search-all", response_model=MultiSearchResults)
+async def process_image_and_search_all(request: Request, file: UploadFile = File(...)):
+    """
+    Complete pipeline for every vehicle in the image: detections with
+    identical attributes are merged, then all searches run concurrently
+    """
+    start_time = time.time()
+    
+    try:
+        upload_response = await upload_car_image(file)
+        
+        if not upload_response.detected_cars:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No cars detected in the image"
+            )
+        
+        # Merge detections by attribute, keeping the most confident one
+        groups = {}
+        for car in upload_response.detected_cars:
+            key = (car.make, car.model, car.year, car.body_type, car.color)
+            if key not in groups:
+                groups[key] = [car, 0]
+            elif car.confidence > groups[key][0].confidence:
+                groups[key][0] = car
+            groups[key][1] += 1
+        
+        detections = [car for car, _ in groups.values()]
+        for car in detections:
+            warm_crawler.record_query(car)
+        
+        search_start = time.time()
+        async with admission_controller.scraping.slot():
+            all_listings = await scraping_orchestrator.search_many(detections, settings.search_mode)
+        search_time = time.time() - search_start
+        
+        total_processing_time = time.time() - start_time
+        logger.info(f"Multi-car pipeline: {len(upload_response.detected_cars)} detections, "
+                    f"{len(detections)} searches in {total_processing_time:.2f}s")
+        
+        return encoded_response(request, MultiSearchResults.construct(
+            total_detections=len(upload_response.detected_cars),
+            groups=[
+                DetectionSearchResults.construct(
+                    detection=car,
+                    detection_count=count,
+                    results=build_search_results(car, listings, search_time)
+                )
+                for (car, count), listings in zip(groups.values(), all_listings)
+            ],
+            processing_time=total_processing_time
+        ))
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in multi-car pipeline: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to process image and search"
+        )
+
+@app.post("/jobs", response_model=JobCreated, status_code=status.HTTP_202_ACCEPTED)
+async def create_job(file: UploadFile = File(...)):
+    """
+    Queue the full recognition-and-search pipeline and return immediately.
+    Poll /jobs/{job_id} or subscribe to /jobs/{job_id}/events for progress.
+    """
+    contents = await read_upload(file)
+    open_image(contents)  # Reject bad headers now rather than in the worker
+    
+    try:
+        job = await job_manager.submit(contents)
+    except JobQueueFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Job queue is full, try again later",
+            headers={"Retry-After": "5"}
+        )
+    
+    logger.info(f"Queued job {job.job_id}")
+    
+    return JobCreated(
+        job_id=job.job_id,
+        status=job.status,
+        status_url=f"/jobs/{job.job_id}",
+        events_url=f"/jobs/{job.job_id}/events"
+    )
+
+@app.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(request: Request, job_id: str):
+    """Current stage, progress history and (when finished) results of a job"""
+    job = await job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return encoded_response(request, job)
+
+@app.websocket("/jobs/{job_id}/events")
+async def job_events(websocket: WebSocket, job_id: str):
+    """Stream a job's status on every stage change until it finishes
+    
+    Updates from this worker arrive immediately; a job running in another
+    worker is picked up by polling the shared job store.
+    """
+    await websocket.accept()
+    
+    updates = job_manager.subscribe(job_id)
+    try:
+        job = await job_manager.get(job_id)
+        if job is None:
+            await websocket.send_json({"error": "Job not found"})
+            return
+        
+        sent_stages = 0
+        while True:
+            if len(job.stages) != sent_stages:
+                await websocket.send_text(job.json())
+                sent_stages = len(job.stages)
+            if job.status in TERMINAL_STATUSES:
+                break
+            try:
+                job = await asyncio.wait_for(updates.get(), settings.job_events_poll_interval)
+            except asyncio.TimeoutError:
+                job = await job_manager.get(job_id)
+                if job is None:
+                    await websocket.send_json({"error": "Job expired"})
+                    return
+    except WebSocketDisconnect:
+        pass
+    finally:
+        job_manager.unsubscribe(job_id, updates)
+        # Closing again after the client has gone raises
+        if websocket.client_state == WebSocketState.CONNECTED:
+            await websocket.close()
+
+@app.post("/saved-searches", response_model=SavedSearch)
+async def create_saved_search(request: SavedSearchCreate):
+    """
+    Watch a make/model; new, changed and removed listings are reported
+    through /saved-searches/{id}/changes and the optional webhook
+    """
+    try:
+        return saved_search_manager.create(request)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+@app.get("/saved-searches", response_model=List[SavedSearch])
+async def list_saved_searches():
+    """List saved searches"""
+    return saved_search_manager.list()
+
+@app.delete("/saved-searches/{search_id}")
+async def delete_saved_search(search_id: str):
+    """Stop watching a saved search"""
+    if not saved_search_manager.delete(search_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Saved search not found"
+        )
+    return {"deleted": search_id}
+
+@app.get("/saved-searches/{search_id}/changes", response_model=SavedSearchChanges)
+async def get_saved_search_changes(search_id: str, since: int = 0):
+    """Poll for listing changes newer than the `since` cursor"""
+    changes = saved_search_manager.changes_since(search_id, since)
+    if changes is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Saved search not found"
+        )
+    return changes
+
+@app.post("/saved-searches/{search_id}/run", response_model=SavedSearchChanges)
+async def run_saved_search(search_id: str):
+    """Re-run a saved search immediately and return its changes"""
+    if saved_search_manager.get(search_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Saved search not found"
+        )
+    
+    changes = await saved_search_manager.run(search_id)
+    cursor = changes[-1].seq if changes else saved_search_manager.last_seq(search_id)
+    return SavedSearchChanges(search_id=search_id, cursor=cursor, changes=changes)
+
+@app.get("/export/{dataset}")
+async def export_dataset(dataset: str, batch_size: int = Query(settings.export_batch_size, ge=1, le=100000)):
+    """
+    Stream all stored listings or recorded detections as an Arrow IPC
+    stream with typed columns (prices and mileage as integers, CLIP
+    embeddings as fixed-size float32 lists)
+    """
+    if not PYARROW_AVAILABLE:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Bulk export requires pyarrow"
+        )
+    if dataset not in DATASETS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown dataset (available: {', '.join(DATASETS)})"
+        )
+    
+    # A sync generator, so Starlette reads the store in a worker thread
+    return StreamingResponse(
+        stream_ipc(dataset, batch_size),
+        media_type=ARROW_STREAM_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="{dataset}.arrows"'}
+    )
+
 @app.get("/supported-formats")
 async def get_supported_formats():
     """Get supported image formats"""
     return {
         "supported_formats": settings.supported_formats,
-        "max_file_size": "10MB"
+        "max_file_size": max_upload_label(),
+        "max_image_pixels": settings.max_image_pixels,
+        "max_image_size": settings.max_image_size
     }
 
 @app.exception_handler(Exception)
@@ -0,0 +1,149 @@
+import os
+import time
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+
+# prometheus_client is optional; without it stages are still reported in
+# the Server-Timing header and /metrics is disabled
+try:
+    from prometheus_client import (
+        CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess, CONTENT_TYPE_LATEST
+    )
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+    CONTENT_TYPE_LATEST = "text/plain"
+
+# Pre-forked workers write their samples to files in this directory (set
+# by serve_prefork before the app is imported) and /metrics sums them
+MULTIPROCESS = PROMETHEUS_AVAILABLE and bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+logger = logging.getLogger(__name__)
+
+# Buckets from 1 ms to 30 s: covers header parsing up to slow marketplace fetches
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class _NoopMetric:
+    """Stand-in for prometheus metrics when the client is not installed"""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, value: float):
+        pass
+
+    def inc(self, value: float = 1):
+        pass
+
+    def dec(self, value: float = 1):
+        pass
+
+    def set_function(self, func):
+        pass
+
+    def set(self, value: float):
+        pass
+
+if PROMETHEUS_AVAILABLE:
+    STAGE_SECONDS = Histogram(
+        "fastcarvision_stage_seconds", "Time spent in each pipeline stage",
+        ["stage"], buckets=LATENCY_BUCKETS
+    )
+    REQUEST_SECONDS = Histogram(
+        "fastcarvision_request_seconds", "Total request time",
+        ["route", "method", "status"], buckets=LATENCY_BUCKETS
+    )
+    SCRAPER_RESPONSES = Counter(
+        "fastcarvision_scraper_responses_total", "Marketplace HTTP responses by status",
+        ["source", "status"]
+    )
+    SCRAPER_BYTES = Counter(
+        "fastcarvision_scraper_bytes_total", "Marketplace page bytes, on the wire and after decoding",
+        ["source", "kind"]
+    )
+    PAGE_CACHE = Counter(
+        "fastcarvision_page_cache_total", "Page fetches by conditional cache outcome (hit = 304 reused)",
+        ["source", "result"]
+    )
+    LISTINGS_PARSED = Counter(
+        "fastcarvision_listings_parsed_total", "Listings parsed from marketplace pages",
+        ["source", "method"]
+    )
+    # Summed over live workers when several processes report
+    REQUESTS_IN_FLIGHT = Gauge(
+        "fastcarvision_requests_in_flight", "Requests currently being handled",
+        multiprocess_mode="livesum"
+    )
+    QUEUE_DEPTH = Gauge(
+        "fastcarvision_queue_depth", "Work waiting in each queue", ["queue"],
+        multiprocess_mode="livesum"
+    )
+else:
+    STAGE_SECONDS = REQUEST_SECONDS = SCRAPER_RESPONSES = LISTINGS_PARSED = _NoopMetric()
+    SCRAPER_BYTES = PAGE_CACHE = _NoopMetric()
+    REQUESTS_IN_FLIGHT = QUEUE_DEPTH = _NoopMetric()
+
+# Per-request stage durations for the Server-Timing header. The dict is
+# created by the middleware and mutated in place, so tasks and executor
+# calls running in a copy of the request context add to the same one.
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+def start_request_timings() -> Dict[str, float]:
+    """Begin collecting stage timings for the current request"""
+    timings: Dict[str, float] = {}
+    _request_timings.set(timings)
+    return timings
+
+def record_stage(name: str, seconds: float):
+    """Record a stage duration in the histogram and the current request's timings"""
+    STAGE_SECONDS.labels(name).observe(seconds)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+@contextmanager
+def stage(name: str):
+    """Time a block of sync or async code as a pipeline stage"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - start)
+
+def server_timing_header(timings: Dict[str, float], total: float) -> str:
+    """Format timings as a Server-Timing header value (durations in ms)"""
+    parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items()]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+# Gauges read from a function; in multiprocess mode they are copied into
+# the worker's sample files by publish_gauges instead
+_gauge_functions: List[Tuple[object, Callable[[], float]]] = []
+
+def gauge_function(gauge, func: Callable[[], float]):
+    """Report a gauge from func, in this process or across workers"""
+    if MULTIPROCESS:
+        _gauge_functions.append((gauge, func))
+    else:
+        gauge.set_function(func)
+
+def publish_gauges():
+    """Write the current value of function gauges for the other workers to read"""
+    for gauge, func in _gauge_functions:
+        gauge.set(func())
+
+def mark_process_dead(pid: int):
+    """Drop the live gauges of a worker that exited"""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(pid)
+
+def render_metrics() -> bytes:
+    """Current metrics in the Prometheus text format, across all workers"""
+    if MULTIPROCESS:
+        publish_gauges()
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest()
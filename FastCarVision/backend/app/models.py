@@ -13,18 +13,33 @@ class CarDetection(BaseModel):
 class CarListing(BaseModel):
     title: str
     price: Optional[str] = None
+    price_value: Optional[int] = Field(None, description="Price in whole dollars")
     year: Optional[int] = None
     make: str
     model: str
+    trim: Optional[str] = None
     mileage: Optional[str] = None
+    mileage_value: Optional[int] = Field(None, description="Odometer reading in miles")
     location: Optional[str] = None
     dealer: Optional[str] = None
     image_url: Optional[str] = None
     listing_url: str
     source: str  # autotrader, ebay, cars.com, etc.
+    vin: Optional[str] = None
     scraped_at: datetime = Field(default_factory=datetime.now)
     similarity_score: Optional[float] = None
 
+class ListingFilter(BaseModel):
+    min_price: Optional[int] = Field(None, ge=0)
+    max_price: Optional[int] = Field(None, ge=0)
+    max_mileage: Optional[int] = Field(None, ge=0)
+    min_year: Optional[int] = None
+    max_year: Optional[int] = None
+    sort_by: Optional[str] = Field(
+        None, regex=r'^-?(price|mileage|year)$',
+        description="price, mileage or year; prefix with - for descending"
+    )
+
 class ImageUploadResponse(BaseModel):
     message: str
     image_id: str
@@ -38,6 +53,63 @@ class SearchResults(BaseModel):
     processing_time: float
     sources_used: List[str]
 
+class SavedSearchCreate(BaseModel):
+    make: str
+    model: str
+    year: Optional[int] = None
+    interval: Optional[int] = Field(None, ge=60, description="Seconds between re-runs")
+    webhook_url: Optional[str] = Field(None, description="URL that receives change batches")
+
+class SavedSearch(SavedSearchCreate):
+    id: str
+    created_at: datetime = Field(default_factory=datetime.now)
+    last_run: Optional[datetime] = None
+    tracked_listings: int = 0
+
+class ListingChange(BaseModel):
+    seq: int
+    change: str  # added, changed, removed
+    fingerprint: str
+    listing: CarListing
+    detected_at: datetime = Field(default_factory=datetime.now)
+
+class SavedSearchChanges(BaseModel):
+    search_id: str
+    cursor: int  # Pass back as `since` to receive only newer changes
+    changes: List[ListingChange]
+
+class DetectionSearchResults(BaseModel):
+    detection: CarDetection
+    detection_count: int  # Detections with identical attributes merged into this group
+    results: SearchResults
+
+class MultiSearchResults(BaseModel):
+    total_detections: int
+    groups: List[DetectionSearchResults]
+    processing_time: float
+
+class JobStageEvent(BaseModel):
+    stage: str  # queued, decoding, detecting, searching, completed, failed
+    at: datetime = Field(default_factory=datetime.now)
+    detail: Optional[str] = None
+
+class JobStatus(BaseModel):
+    job_id: str
+    status: str  # queued, running, completed, failed
+    stage: str
+    stages: List[JobStageEvent] = []
+    detected_cars: List[CarDetection] = []
+    result: Optional[SearchResults] = None
+    error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.now)
+    updated_at: datetime = Field(default_factory=datetime.now)
+
+class JobCreated(BaseModel):
+    job_id: str
+    status: str
+    status_url: str
+    events_url: str  # WebSocket with stage-by-stage updates
+
 class HealthCheck(BaseModel):
     status: str
     timestamp: datetime
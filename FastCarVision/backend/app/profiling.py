@@ -0,0 +1,259 @@
+import asyncio
+import heapq
+import os
+import secrets
+import sys
+import threading
+import time
+import logging
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+MAX_STACK_DEPTH = 64
+MAX_SLOW_CALLBACKS = 20
+LAG_INTERVAL = 0.05
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class StackSampler:
+    """Samples the stacks of every thread from a background thread
+
+    Stacks are kept folded (root first, frames joined by ';') with a count,
+    which is the collapsed format flamegraph.pl and speedscope read.
+    Sampling can be gated so only intervals with matching requests in
+    flight are counted.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.active = threading.Event()
+        self.active.set()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            if not self.active.is_set():
+                continue
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                labels = []
+                while frame is not None and len(labels) < MAX_STACK_DEPTH:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(labels))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """Stacks in collapsed format, most frequent first"""
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+class LoopMonitor:
+    """Measures event-loop lag and the longest-running loop callbacks
+
+    Lag is how late a periodic sleep wakes up. Callback durations come from
+    wrapping asyncio's Handle._run for the duration of the session; with a
+    loop that does not use asyncio handles (uvloop) only lag is reported.
+    """
+
+    def __init__(self, slow_threshold: float):
+        self.slow_threshold = slow_threshold
+        self.lags: List[float] = []
+        self.slow_callbacks: List[Tuple[float, int, str]] = []
+        self.callback_timing = False
+        self._task: Optional[asyncio.Task] = None
+        self._original_run = None
+        self._seq = 0
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        self._task = loop.create_task(self._measure_lag())
+        if isinstance(loop, asyncio.BaseEventLoop):
+            self._patch_handles()
+
+    async def stop(self):
+        if self._original_run is not None:
+            asyncio.events.Handle._run = self._original_run
+            self._original_run = None
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _measure_lag(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + LAG_INTERVAL
+            await asyncio.sleep(LAG_INTERVAL)
+            self.lags.append(max(0.0, loop.time() - expected))
+
+    def _patch_handles(self):
+        monitor = self
+        original_run = asyncio.events.Handle._run
+
+        def timed_run(handle):
+            start = time.perf_counter()
+            try:
+                return original_run(handle)
+            finally:
+                duration = time.perf_counter() - start
+                if duration >= monitor.slow_threshold:
+                    monitor._record_slow(duration, handle)
+
+        self._original_run = original_run
+        asyncio.events.Handle._run = timed_run
+        self.callback_timing = True
+
+    def _record_slow(self, duration: float, handle):
+        # Keep only the slowest callbacks; the sequence number breaks ties
+        self._seq += 1
+        # Task steps are bound methods of the task; its repr names the coroutine
+        callback = getattr(handle._callback, "__self__", None)
+        if not isinstance(callback, asyncio.Future):
+            callback = handle._callback
+        entry = (duration, self._seq, repr(callback)[:300])
+        if len(self.slow_callbacks) < MAX_SLOW_CALLBACKS:
+            heapq.heappush(self.slow_callbacks, entry)
+        else:
+            heapq.heappushpop(self.slow_callbacks, entry)
+
+    def summary(self) -> Dict[str, Any]:
+        lags = sorted(self.lags)
+        return {
+            "loop_lag_ms": {
+                "samples": len(lags),
+                "mean": round(sum(lags) / len(lags) * 1000, 2) if lags else 0.0,
+                "p99": round(lags[min(len(lags) - 1, int(len(lags) * 0.99))] * 1000, 2) if lags else 0.0,
+                "max": round(lags[-1] * 1000, 2) if lags else 0.0,
+            },
+            "callback_timing": self.callback_timing,
+            "slow_callbacks": [
+                {"duration_ms": round(duration * 1000, 2), "callback": callback}
+                for duration, _, callback in sorted(self.slow_callbacks, reverse=True)
+            ],
+        }
+
+class Profiler:
+    """On-demand profiling of this worker, one session at a time
+
+    A session either runs for a fixed time or until a number of requests
+    matching a route prefix have finished; in request mode stacks are only
+    sampled while a matching request is in flight.
+    """
+
+    def __init__(self):
+        self.running = False
+        self._route: Optional[str] = None
+        self._remaining = 0
+        self._in_flight = 0
+        self._sampler: Optional[StackSampler] = None
+        self._done: Optional[asyncio.Event] = None
+
+    def authorize(self, request: Request):
+        """Reject the call unless profiling is enabled and the admin token matches"""
+        if not settings.profiling_enabled or not settings.admin_token:
+            # Look like any unknown route while disabled
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+        token = request.headers.get("X-Admin-Token", "")
+        if not secrets.compare_digest(token.encode(), settings.admin_token.encode()):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid admin token")
+
+    async def profile(self, seconds: float, requests: int = 0, route: Optional[str] = None) -> Dict[str, Any]:
+        """Sample this worker for a time window or for the next matching requests"""
+        if self.running:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A profiling session is already running")
+
+        seconds = min(max(seconds, 0.1), settings.profile_max_seconds)
+        requests = min(max(requests, 0), settings.profile_max_requests)
+        interval = max(settings.profile_sample_interval, 0.001)
+
+        self.running = True
+        sampler = StackSampler(interval)
+        monitor = LoopMonitor(settings.profile_slow_callback)
+        if requests:
+            self._route = route or "/"
+            self._remaining = requests
+            self._in_flight = 0
+            self._done = asyncio.Event()
+            sampler.active.clear()
+        self._sampler = sampler
+
+        start = time.perf_counter()
+        sampler.start()
+        monitor.start()
+        try:
+            if requests:
+                # The time limit still applies, so a quiet route cannot hold the session
+                try:
+                    await asyncio.wait_for(self._done.wait(), timeout=seconds)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await asyncio.sleep(seconds)
+        finally:
+            sampler.stop()
+            await monitor.stop()
+            profiled = min(requests, requests - self._remaining) if requests else None
+            self.running = False
+            self._route = None
+            self._sampler = None
+            self._done = None
+
+        logger.info(f"Profiled worker {os.getpid()} for {time.perf_counter() - start:.1f}s ({sampler.samples} samples)")
+        result = {
+            "pid": os.getpid(),
+            "mode": "requests" if requests else "time",
+            "route": route if requests else None,
+            "requests_profiled": profiled,
+            "duration": round(time.perf_counter() - start, 3),
+            "interval": interval,
+            "samples": sampler.samples,
+            "collapsed": sampler.collapsed(),
+        }
+        result.update(monitor.summary())
+        return result
+
+    @contextmanager
+    def track_request(self, path: str):
+        """Gate request-mode sampling on matching requests being in flight"""
+        if self._route is None or not path.startswith(self._route) or self._remaining <= 0:
+            yield
+            return
+
+        self._in_flight += 1
+        self._sampler.active.set()
+        try:
+            yield
+        finally:
+            self._in_flight -= 1
+            self._remaining -= 1
+            if self._sampler is not None and self._in_flight == 0:
+                self._sampler.active.clear()
+            if self._remaining <= 0 and self._done is not None:
+                self._done.set()
+
+# Global profiler
+profiler = Profiler()
@@ -0,0 +1,75 @@
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from .models import CarListing
+
+class ListingRecord:
+    """Compact listing used inside the scraping pipeline
+
+    Scrapers, deduplication, filtering and the listing store all work on
+    these plain slotted objects; only the final top-k is turned into
+    pydantic CarListing models at the API boundary. Every record parsed
+    from one page shares that page's scraped_at timestamp.
+    """
+
+    __slots__ = (
+        "title", "price", "price_value", "year", "make", "model", "trim",
+        "mileage", "mileage_value", "location", "dealer", "image_url",
+        "listing_url", "source", "vin", "scraped_at",
+    )
+
+    def __init__(
+        self,
+        title: str,
+        listing_url: str,
+        source: str,
+        scraped_at: datetime,
+        make: str = "Unknown",
+        model: str = "Unknown",
+        price: Optional[str] = None,
+        price_value: Optional[int] = None,
+        year: Optional[int] = None,
+        trim: Optional[str] = None,
+        mileage: Optional[str] = None,
+        mileage_value: Optional[int] = None,
+        location: Optional[str] = None,
+        dealer: Optional[str] = None,
+        image_url: Optional[str] = None,
+        vin: Optional[str] = None
+    ):
+        self.title = title
+        self.listing_url = listing_url
+        self.source = source
+        self.scraped_at = scraped_at
+        self.make = make
+        self.model = model
+        self.price = price
+        self.price_value = price_value
+        self.year = year
+        self.trim = trim
+        self.mileage = mileage
+        self.mileage_value = mileage_value
+        self.location = location
+        self.dealer = dealer
+        self.image_url = image_url
+        self.vin = vin
+
+    def copy(self, scraped_at: Optional[datetime] = None) -> "ListingRecord":
+        """Shallow copy, optionally with a new scraped_at"""
+        record = ListingRecord.__new__(ListingRecord)
+        for name in self.__slots__:
+            setattr(record, name, getattr(self, name))
+        if scraped_at is not None:
+            record.scraped_at = scraped_at
+        return record
+
+    def to_listing(self) -> CarListing:
+        """Build the API model; fields were validated while parsing, so skip re-validation"""
+        return CarListing.construct(**{name: getattr(self, name) for name in self.__slots__})
+
+    def __repr__(self) -> str:
+        return f"ListingRecord({self.source}: {self.title!r})"
+
+def to_listings(records: Iterable[ListingRecord]) -> List[CarListing]:
+    """Convert the final result set to CarListing models"""
+    return [record.to_listing() for record in records]
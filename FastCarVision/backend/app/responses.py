@@ -0,0 +1,60 @@
+import json
+from datetime import datetime
+from typing import Any
+
+from fastapi import Request
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+# Fast encoders are optional; the stdlib json module is the fallback
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+def _default(obj: Any) -> Any:
+    """Encode values the serializers don't handle natively"""
+    if isinstance(obj, BaseModel):
+        # Field values as stored; nested models come back through here
+        return obj.__dict__
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not serializable")
+
+def encode_json(content: Any) -> bytes:
+    """Serialize to JSON bytes with the fastest available encoder"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, default=_default, separators=(",", ":")).encode("utf-8")
+
+def encode_msgpack(content: Any) -> bytes:
+    """Serialize to MessagePack, with datetimes as ISO strings like the JSON output"""
+    return msgpack.packb(content, default=_default, use_bin_type=True, datetime=False)
+
+def wants_msgpack(request: Request) -> bool:
+    """Whether the client asked for MessagePack in its Accept header"""
+    if not MSGPACK_AVAILABLE:
+        return False
+    accept = request.headers.get("accept", "")
+    return any(media_type in accept for media_type in MSGPACK_MEDIA_TYPES)
+
+def encoded_response(request: Request, content: Any, status_code: int = 200) -> Response:
+    """
+    Serialize an internally built model straight to the wire format the
+    client negotiated. Returning a Response skips FastAPI's re-validation
+    against response_model and its jsonable_encoder pass; response_model
+    is still used for the OpenAPI schema.
+    """
+    if wants_msgpack(request):
+        return Response(encode_msgpack(content), status_code=status_code, media_type=MSGPACK_MEDIA_TYPES[0])
+    return Response(encode_json(content), status_code=status_code, media_type=JSON_MEDIA_TYPE)
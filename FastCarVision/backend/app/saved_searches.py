@@ -0,0 +1,410 @@
+import asyncio
+import sqlite3
+import threading
+import time
+import uuid
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+import aiohttp
+
+from .config import settings
+from .models import (
+    CarDetection,
+    CarListing,
+    SavedSearch,
+    SavedSearchCreate,
+    SavedSearchChanges,
+    ListingChange
+)
+from .records import ListingRecord
+from .scrapers import ScrapingOrchestrator, scraping_orchestrator
+from .egress import BlockedHost, check_url, create_session, guarded_request
+from .utils import canonicalize_url, listing_fingerprint
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS saved_searches (
+    id TEXT PRIMARY KEY,
+    next_due REAL NOT NULL,
+    data TEXT NOT NULL  -- SavedSearch as JSON
+);
+CREATE TABLE IF NOT EXISTS saved_search_listings (
+    search_id TEXT NOT NULL,
+    url TEXT NOT NULL,  -- canonical listing URL
+    fingerprint TEXT NOT NULL,
+    misses INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL,  -- CarListing as JSON
+    PRIMARY KEY (search_id, url)
+);
+CREATE TABLE IF NOT EXISTS saved_search_changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    search_id TEXT NOT NULL,
+    data TEXT NOT NULL  -- ListingChange as JSON
+);
+CREATE INDEX IF NOT EXISTS idx_saved_search_changes_search ON saved_search_changes (search_id, seq);
+"""
+
+class SavedSearchState:
+    """A saved search plus its last snapshot, loaded for one run"""
+
+    def __init__(self, search: SavedSearch,
+                 snapshot: Optional[Dict[str, Tuple[str, CarListing]]] = None,
+                 misses: Optional[Dict[str, int]] = None):
+        self.search = search
+        self.snapshot = snapshot if snapshot is not None else {}  # url -> (fingerprint, listing)
+        self.misses = misses if misses is not None else {}  # url -> consecutive runs it was missing from its source
+
+class SavedSearchStore:
+    """SQLite-backed saved searches, snapshots and change log
+
+    Shared by every worker process, so a search created, polled or run
+    through any of them sees the same state. Change sequence numbers come
+    from the database and are unique across workers.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._open_lock = threading.Lock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.open()
+        return self._conn
+
+    def open(self):
+        """Create the database and its schema if this process has not yet"""
+        with self._open_lock:
+            if self._conn is not None:
+                return
+            if self.db_path != ":memory:":
+                Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            conn = self._connect()
+            conn.executescript(SCHEMA)
+            self._conn = conn
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def reopen(self):
+        """Open a fresh connection in a forked worker"""
+        self._lock = threading.Lock()
+        self._open_lock = threading.Lock()
+        if self._conn is not None and self.db_path != ":memory:":
+            self._conn = self._connect()
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def add(self, search: SavedSearch):
+        """Insert a search, due on the next scheduler tick"""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO saved_searches (id, next_due, data) VALUES (?, 0, ?)",
+                (search.id, search.json())
+            )
+
+    def get(self, search_id: str) -> Optional[SavedSearch]:
+        with self._lock:
+            row = self.conn.execute("SELECT data FROM saved_searches WHERE id = ?", (search_id,)).fetchone()
+        return SavedSearch.parse_raw(row[0]) if row else None
+
+    def list(self) -> List[SavedSearch]:
+        with self._lock:
+            rows = self.conn.execute("SELECT data FROM saved_searches ORDER BY rowid").fetchall()
+        return [SavedSearch.parse_raw(row[0]) for row in rows]
+
+    def delete(self, search_id: str) -> bool:
+        """Remove a search with its snapshot and change log"""
+        with self._lock, self.conn:
+            cursor = self.conn.execute("DELETE FROM saved_searches WHERE id = ?", (search_id,))
+            self.conn.execute("DELETE FROM saved_search_listings WHERE search_id = ?", (search_id,))
+            self.conn.execute("DELETE FROM saved_search_changes WHERE search_id = ?", (search_id,))
+        return cursor.rowcount > 0
+
+    def due(self, now: float) -> List[str]:
+        """IDs of searches whose next run is due"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id FROM saved_searches WHERE next_due <= ? ORDER BY next_due", (now,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def load_state(self, search_id: str) -> Optional[SavedSearchState]:
+        """A search with its current snapshot, or None if it was deleted"""
+        search = self.get(search_id)
+        if search is None:
+            return None
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT url, fingerprint, misses, data FROM saved_search_listings WHERE search_id = ?",
+                (search_id,)
+            ).fetchall()
+        snapshot = {url: (fingerprint, CarListing.parse_raw(data)) for url, fingerprint, _, data in rows}
+        misses = {url: count for url, _, count, _ in rows if count}
+        return SavedSearchState(search, snapshot, misses)
+
+    def save_run(self, state: SavedSearchState, changes: List[ListingChange], next_due: float):
+        """Replace a search's snapshot and append its changes, assigning their seq
+
+        Nothing is written if the search was deleted while it ran.
+        """
+        search = state.search
+        with self._lock, self.conn:
+            cursor = self.conn.execute(
+                "UPDATE saved_searches SET next_due = ?, data = ? WHERE id = ?",
+                (next_due, search.json(), search.id)
+            )
+            if cursor.rowcount == 0:
+                return
+
+            self.conn.execute("DELETE FROM saved_search_listings WHERE search_id = ?", (search.id,))
+            self.conn.executemany(
+                "INSERT INTO saved_search_listings (search_id, url, fingerprint, misses, data) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (search.id, url, fingerprint, state.misses.get(url, 0), listing.json())
+                    for url, (fingerprint, listing) in state.snapshot.items()
+                ]
+            )
+            for change in changes:
+                cursor = self.conn.execute(
+                    "INSERT INTO saved_search_changes (search_id, data) VALUES (?, ?)",
+                    (search.id, change.json())
+                )
+                change.seq = cursor.lastrowid
+
+            # Keep only the newest saved_search_history changes for polling
+            self.conn.execute(
+                "DELETE FROM saved_search_changes WHERE search_id = ? AND seq <= ("
+                "SELECT seq FROM saved_search_changes WHERE search_id = ? "
+                "ORDER BY seq DESC LIMIT 1 OFFSET ?)",
+                (search.id, search.id, settings.saved_search_history)
+            )
+
+    def changes_since(self, search_id: str, since: int) -> List[ListingChange]:
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT seq, data FROM saved_search_changes WHERE search_id = ? AND seq > ? ORDER BY seq",
+                (search_id, since)
+            ).fetchall()
+        changes = []
+        for seq, data in rows:
+            change = ListingChange.parse_raw(data)
+            change.seq = seq
+            changes.append(change)
+        return changes
+
+    def last_seq(self, search_id: str) -> int:
+        """Sequence number of a search's newest change, or 0"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT MAX(seq) FROM saved_search_changes WHERE search_id = ?", (search_id,)
+            ).fetchone()
+        return row[0] or 0
+
+class SavedSearchManager:
+    """Re-runs saved searches on a schedule and records listing diffs"""
+
+    def __init__(self, orchestrator: ScrapingOrchestrator, store: SavedSearchStore):
+        self.orchestrator = orchestrator
+        self.store = store
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def create(self, request: SavedSearchCreate) -> SavedSearch:
+        """Register a new saved search; it runs on the next scheduler tick
+        
+        Raises ValueError for a webhook URL that is not http(s) or points
+        at a non-public address.
+        """
+        if request.webhook_url:
+            try:
+                check_url(request.webhook_url, settings.webhook_allow_private_hosts)
+            except BlockedHost as e:
+                raise ValueError(f"Webhook URL not allowed: {e}")
+        search = SavedSearch(id=str(uuid.uuid4()), **request.dict())
+        self.store.add(search)
+        logger.info(f"Saved search {search.id} created for {search.make} {search.model}")
+        return search
+
+    def get(self, search_id: str) -> Optional[SavedSearch]:
+        """Look up a saved search by ID"""
+        return self.store.get(search_id)
+
+    def list(self) -> List[SavedSearch]:
+        """Return all saved searches"""
+        return self.store.list()
+
+    def delete(self, search_id: str) -> bool:
+        """Remove a saved search and its history"""
+        self._locks.pop(search_id, None)
+        return self.store.delete(search_id)
+
+    def changes_since(self, search_id: str, since: int = 0) -> Optional[SavedSearchChanges]:
+        """Return changes newer than the `since` cursor"""
+        if self.store.get(search_id) is None:
+            return None
+
+        changes = self.store.changes_since(search_id, since)
+        cursor = changes[-1].seq if changes else max(since, 0)
+        return SavedSearchChanges(search_id=search_id, cursor=cursor, changes=changes)
+
+    def last_seq(self, search_id: str) -> int:
+        """Cursor that skips every change recorded so far"""
+        return self.store.last_seq(search_id)
+
+    def _diff(self, state: SavedSearchState, listings: List[ListingRecord], responded: Set[str]) -> List[ListingChange]:
+        """Compare a run against the previous snapshot by canonical URL and fingerprint
+        
+        Updates the state in place; the changes get their seq when they
+        are saved. listings is the full, untruncated result set and responded the
+        sources that returned anything. A listing is only reported removed
+        once it has been missing from its own source for
+        saved_search_removal_misses runs in a row; runs where its source
+        failed or came back empty do not count.
+        """
+        current = {}
+        for listing in listings:
+            if listing.source == "demo":
+                continue
+            current[canonicalize_url(listing.listing_url)] = (listing_fingerprint(listing), listing)
+
+        changes = []
+        now = datetime.now()
+
+        for url, (fingerprint, record) in current.items():
+            state.misses.pop(url, None)
+            previous = state.snapshot.get(url)
+            if previous is None:
+                kind = "added"
+            elif previous[0] != fingerprint:
+                kind = "changed"
+            else:
+                continue
+            listing = record.to_listing()
+            state.snapshot[url] = (fingerprint, listing)
+            changes.append(ListingChange(
+                seq=0, change=kind, fingerprint=fingerprint,
+                listing=listing, detected_at=now
+            ))
+
+        for url, (fingerprint, listing) in list(state.snapshot.items()):
+            if url in current or listing.source not in responded:
+                continue
+            misses = state.misses.get(url, 0) + 1
+            if misses < settings.saved_search_removal_misses:
+                state.misses[url] = misses
+                continue
+            state.misses.pop(url, None)
+            del state.snapshot[url]
+            changes.append(ListingChange(
+                seq=0, change="removed", fingerprint=fingerprint,
+                listing=listing, detected_at=now
+            ))
+
+        return changes
+
+    async def run(self, search_id: str) -> List[ListingChange]:
+        """Run one saved search now and record/deliver its changes"""
+        loop = asyncio.get_running_loop()
+        lock = self._locks.setdefault(search_id, asyncio.Lock())
+
+        async with lock:
+            state = await loop.run_in_executor(None, self.store.load_state, search_id)
+            if state is None:
+                return []
+
+            search = state.search
+            # Diff each source's own listings: which copy of a cross-post
+            # survives deduplication depends on which sources responded,
+            # and would show up as spurious added/removed pairs
+            listings, responded = await self.orchestrator.scrape_sources(CarDetection(
+                make=search.make, model=search.model, year=search.year, confidence=1.0
+            ), deduplicate=False)
+
+            if listings:
+                changes = self._diff(state, listings, responded)
+            else:
+                # Every source failed or came back empty; that says nothing about the listings
+                logger.warning(f"Saved search {search_id} got no results, keeping its snapshot")
+                changes = []
+            search.last_run = datetime.now()
+            search.tracked_listings = len(state.snapshot)
+            next_due = time.time() + (search.interval or settings.saved_search_interval)
+            await loop.run_in_executor(None, self.store.save_run, state, changes, next_due)
+
+        if changes:
+            logger.info(f"Saved search {search_id}: {len(changes)} changes")
+            if search.webhook_url:
+                await self._deliver(search, changes)
+
+        return changes
+
+    async def _deliver(self, search: SavedSearch, changes: List[ListingChange]):
+        """POST a change batch to the search's webhook
+        
+        The address is checked again at connect time and redirects are
+        not followed, so a webhook cannot be pointed at internal hosts.
+        """
+        payload = SavedSearchChanges(search_id=search.id, cursor=changes[-1].seq, changes=changes)
+        timeout = aiohttp.ClientTimeout(total=settings.request_timeout)
+
+        try:
+            async with create_session(settings.webhook_allow_private_hosts, timeout) as session:
+                async with guarded_request(
+                    session, "POST", search.webhook_url, settings.webhook_allow_private_hosts,
+                    max_redirects=0,
+                    data=payload.json(),
+                    headers={'Content-Type': 'application/json'}
+                ) as response:
+                    if response.status >= 300:
+                        logger.warning(f"Webhook for saved search {search.id} returned HTTP {response.status}")
+        except Exception as e:
+            logger.error(f"Error delivering webhook for saved search {search.id}: {e}")
+
+    async def run_scheduler(self):
+        """Re-run due saved searches forever"""
+        while True:
+            try:
+                due = self.store.due(time.time())
+            except sqlite3.Error as e:
+                logger.error(f"Could not load due saved searches: {e}")
+                due = []
+            for search_id in due:
+                try:
+                    await self.run(search_id)
+                except Exception as e:
+                    logger.error(f"Saved search {search_id} failed: {e}")
+            await asyncio.sleep(settings.saved_search_tick)
+
+    def start(self):
+        """Start the scheduler on the running event loop
+
+        Only one process should run it; the others serve from the store.
+        """
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run_scheduler())
+
+    async def stop(self):
+        """Cancel the scheduler task"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+# Global saved search manager
+saved_search_manager = SavedSearchManager(scraping_orchestrator, SavedSearchStore(settings.saved_search_path))
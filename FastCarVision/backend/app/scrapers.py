@@ -1,16 +1,65 @@
 import aiohttp
 import asyncio
 from bs4 import BeautifulSoup
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set, Tuple
 import logging
 import re
 from urllib.parse import urlencode, urljoin
-from .models import CarListing, CarDetection
+from .models import CarListing, CarDetection, ListingFilter
 from .config import settings
+from .extractors import structured_extractor
+from .utils import parse_int
+from .title_parser import title_parser
 import random
+import time
+import hashlib
+from collections import OrderedDict
+from datetime import datetime
+from .store import listing_store
+from .dedup import ListingDeduplicator
+from .filters import apply_filter
+from .records import ListingRecord, to_listings
+from .metrics import stage, SCRAPER_RESPONSES, SCRAPER_BYTES, PAGE_CACHE, LISTINGS_PARSED
+from .tracing import tracer
+from .transport import fixture_store
+from .fetching import PageClient, HTTP2_AVAILABLE, accept_encoding, fetch, create_http2_client, page_cache
 
 logger = logging.getLogger(__name__)
 
+# Opening <div> tags with a class attribute, and any div tag, in raw page bytes
+DIV_WITH_CLASS = re.compile(rb'<div\b[^>]*?\bclass\s*=\s*(?:"([^"]*)"|\'([^\']*)\')', re.IGNORECASE)
+DIV_TAG = re.compile(rb'<(/?)div\b[^>]*>', re.IGNORECASE)
+
+def split_listing_fragments(page: bytes, selector: re.Pattern, limit: int) -> List[bytes]:
+    """Raw markup of the divs with a class name matching selector in full, without parsing the page
+
+    Each fragment runs from its opening tag to the matching </div>,
+    found by counting nested div tags. If one fragment holds another
+    match (e.g. a results wrapper) nothing is returned, so the caller
+    falls back to parsing the whole page.
+    """
+    fragments = []
+    end = 0
+    for match in DIV_WITH_CLASS.finditer(page):
+        classes = (match.group(1) or match.group(2) or b'').decode('latin-1').split()
+        if not any(selector.fullmatch(name) for name in classes):
+            continue
+        if match.start() < end:
+            return []  # More than one listing in the previous fragment
+        if len(fragments) >= limit:
+            break
+
+        depth = 0
+        for tag in DIV_TAG.finditer(page, match.start()):
+            depth += -1 if tag.group(1) else 1
+            if depth == 0:
+                end = tag.end()
+                break
+        else:
+            end = len(page)
+        fragments.append(page[match.start():end])
+    return fragments
+
 class BaseScraper:
     def __init__(self):
         self.base_url = ""
@@ -18,28 +67,96 @@ class BaseScraper:
             'User-Agent': settings.user_agent,
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
+            'Accept-Encoding': accept_encoding(),
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1',
         }
+        # Parsed listings keyed by a hash of their raw element markup, so
+        # repeat scrapes skip re-parsing elements that have not changed
+        self._parse_cache: OrderedDict = OrderedDict()
+        # In-flight fetches, so concurrent searches that need the same
+        # results page share one request
+        self._inflight: Dict[str, asyncio.Future] = {}
+    
+    async def get_page(self, session: PageClient, url: str) -> Optional[bytes]:
+        """Get raw page bytes, coalescing concurrent requests for the same URL"""
+        pending = self._inflight.get(url)
+        with tracer.span("get_page", **{"http.url": url, "source": self.source, "coalesced": pending is not None}) as span:
+            if pending is None:
+                # The fetch task copies this context, so it reports its status on this span
+                pending = asyncio.ensure_future(self._fetch_page(session, url))
+                self._inflight[url] = pending
+                pending.add_done_callback(lambda _: self._inflight.pop(url, None))
+            
+            content = await asyncio.shield(pending)
+            span.set_attribute("http.response_bytes", len(content) if content is not None else 0)
+            return content
     
-    async def get_page(self, session: aiohttp.ClientSession, url: str) -> Optional[str]:
-        """Get page content with error handling"""
+    async def _fetch_page(self, session: PageClient, url: str) -> Optional[bytes]:
+        """Fetch raw page bytes with error handling, revalidating cached pages"""
+        if settings.scraper_transport == "replay":
+            return await self._replay_page(url)
+        
+        # Fixtures need full bodies, so recording never sends validators
+        cached = page_cache.get(url) if settings.scraper_transport != "record" else None
+        headers = {**self.headers, **cached.validators()} if cached else self.headers
+        
         try:
-            async with session.get(
-                url, 
-                headers=self.headers, 
-                timeout=settings.request_timeout
-            ) as response:
-                if response.status == 200:
-                    return await response.text()
-                else:
-                    logger.warning(f"HTTP {response.status} for {url}")
-                    return None
+            with stage(f"fetch_{self.source}"):
+                response = await fetch(session, url, headers)
+            
+            SCRAPER_RESPONSES.labels(self.source, str(response.status)).inc()
+            SCRAPER_BYTES.labels(self.source, "wire").inc(response.wire_bytes)
+            span = tracer.current_span()
+            span.set_attribute("http.status_code", response.status)
+            span.set_attribute("http.response_wire_bytes", response.wire_bytes)
+            if settings.scraper_transport == "record":
+                # File writes stay off the event loop
+                await asyncio.get_running_loop().run_in_executor(
+                    None, fixture_store.record,
+                    self.source, url, response.status, response.reason, response.headers, response.body
+                )
+            
+            if response.status == 304 and cached is not None:
+                PAGE_CACHE.labels(self.source, "hit").inc()
+                SCRAPER_BYTES.labels(self.source, "decoded").inc(len(cached.body))
+                return cached.body
+            
+            PAGE_CACHE.labels(self.source, "miss" if cached else "uncached").inc()
+            if response.status == 200:
+                SCRAPER_BYTES.labels(self.source, "decoded").inc(len(response.body))
+                page_cache.put(url, response.headers, response.body)
+                # Keep the body as bytes: the structured-data scan works on
+                # bytes and BeautifulSoup detects the encoding itself
+                return response.body
+            else:
+                logger.warning(f"HTTP {response.status} for {url}")
+                return None
         except Exception as e:
+            SCRAPER_RESPONSES.labels(self.source, "error").inc()
             logger.error(f"Error fetching {url}: {e}")
             return None
     
+    async def _replay_page(self, url: str) -> Optional[bytes]:
+        """Serve a page from recorded fixtures instead of the network"""
+        if settings.replay_latency > 0:
+            await asyncio.sleep(settings.replay_latency)
+        
+        with stage(f"fetch_{self.source}"):
+            if fixture_store.loaded:
+                recorded = fixture_store.get(url)
+            else:
+                # The first lookup reads every WARC file
+                recorded = await asyncio.get_running_loop().run_in_executor(None, fixture_store.get, url)
+        if recorded is None:
+            SCRAPER_RESPONSES.labels(self.source, "replay_miss").inc()
+            logger.warning(f"No recorded response for {url}")
+            return None
+        
+        SCRAPER_RESPONSES.labels(self.source, str(recorded.status)).inc()
+        tracer.current_span().set_attribute("http.status_code", recorded.status)
+        return recorded.body if recorded.status == 200 else None
+    
     def parse_price(self, price_text: str) -> Optional[str]:
         """Extract and clean price from text"""
         if not price_text:
@@ -55,13 +172,137 @@ class BaseScraper:
             return None
         
         # Look for patterns like "50,000 miles" or "50K"
-        mileage_match = re.search(r'[\d,]+[kK]?(\s*miles?)?', mileage_text)
+        mileage_match = re.search(r'[\d,]+(\.\d+)?([kK]\b)?(\s*miles?)?', mileage_text)
         return mileage_match.group() if mileage_match else None
+    
+    def parse_price_value(self, price_text: Optional[str]) -> Optional[int]:
+        """Price as whole dollars, e.g. "$15,999" -> 15999"""
+        return parse_int(price_text)
+    
+    def parse_mileage_value(self, mileage_text: Optional[str]) -> Optional[int]:
+        """Mileage as an integer, e.g. "50K miles" -> 50000"""
+        return parse_int(mileage_text)
+    
+    def apply_title_parser(self, listings: List[ListingRecord]) -> List[ListingRecord]:
+        """Fill make, model, year and trim from titles, batched per page"""
+        parsed_titles = title_parser.parse_batch([listing.title for listing in listings])
+        
+        for listing, parsed in zip(listings, parsed_titles):
+            # Structured data wins where it already provided a value
+            if parsed.make and listing.make == "Unknown":
+                listing.make = parsed.make
+            if parsed.model and listing.model == "Unknown":
+                listing.model = parsed.model
+            if listing.year is None:
+                listing.year = parsed.year
+            if listing.trim is None:
+                listing.trim = parsed.trim
+        
+        return listings
+    
+    def parse_fragment_cached(self, fragment: bytes, parse, scraped_at: datetime) -> Optional[ListingRecord]:
+        """Parse one listing's raw markup, skipping the HTML parser for markup seen before"""
+        key = hashlib.blake2b(fragment, digest_size=16).digest()
+        
+        cached = self._parse_cache.get(key)
+        if cached is not None:
+            self._parse_cache.move_to_end(key)
+            return cached.copy(scraped_at=scraped_at)
+        
+        element = BeautifulSoup(fragment, 'html.parser').div
+        listing = parse(element, scraped_at) if element is not None else None
+        if listing:
+            self._parse_cache[key] = listing
+            if len(self._parse_cache) > settings.parse_cache_size:
+                self._parse_cache.popitem(last=False)
+        return listing
+    
+    def parse_page(self, page: bytes, selector: re.Pattern, parse) -> List[ListingRecord]:
+        """Parse up to 10 listings from a results page, timed per source"""
+        with stage(f"parse_{self.source}"):
+            # Prefer listing data embedded as JSON, fall back to walking the DOM
+            listings = self.extract_structured_listings(page)
+            if listings:
+                listings = listings[:10]
+                LISTINGS_PARSED.labels(self.source, "structured").inc(len(listings))
+                return listings
+            
+            listings = []
+            scraped_at = datetime.now()  # Shared by every listing on the page
+            
+            # Cut listing containers out of the raw page, so only markup not
+            # seen before goes through the HTML parser (limit to first 10 results)
+            fragments = split_listing_fragments(page, selector, 10)
+            if fragments:
+                for fragment in fragments:
+                    try:
+                        listing = self.parse_fragment_cached(fragment, parse, scraped_at)
+                        if listing:
+                            listings.append(listing)
+                    except Exception as e:
+                        logger.error(f"Error parsing {self.source} listing: {e}")
+            else:
+                # Markup the raw scan cannot see (e.g. unquoted class attributes)
+                soup = BeautifulSoup(page, 'html.parser')
+                for element in soup.find_all('div', class_=selector)[:10]:
+                    try:
+                        listing = parse(element, scraped_at)
+                        if listing:
+                            listings.append(listing)
+                    except Exception as e:
+                        logger.error(f"Error parsing {self.source} listing: {e}")
+            
+            listings = self.apply_title_parser(listings)
+            LISTINGS_PARSED.labels(self.source, "dom").inc(len(listings))
+            return listings
+    
+    def extract_structured_listings(self, page: bytes) -> List[ListingRecord]:
+        """Fast path: build listings from embedded JSON-LD/hydration state"""
+        listings = []
+        scraped_at = datetime.now()
+        
+        for fields in structured_extractor.extract(page):
+            try:
+                price_value = fields['price']
+                if isinstance(price_value, str):
+                    digits = re.sub(r'[^\d.]', '', price_value).split('.')[0]
+                    price_value = int(digits) if digits else None
+                price_value = int(price_value) if isinstance(price_value, (int, float)) else None
+                
+                mileage_value = fields['mileage']
+                if isinstance(mileage_value, str):
+                    mileage_value = self.parse_mileage_value(mileage_value)
+                mileage_value = int(mileage_value) if isinstance(mileage_value, (int, float)) else None
+                
+                listings.append(ListingRecord(
+                    title=fields['title'],
+                    price=f"${price_value:,}" if price_value is not None else None,
+                    price_value=price_value,
+                    year=fields['year'],
+                    make=fields['make'] or "Unknown",
+                    model=fields['model'] or "Unknown",
+                    mileage=f"{mileage_value:,} miles" if mileage_value is not None else None,
+                    mileage_value=mileage_value,
+                    location=fields['location'] if isinstance(fields['location'], str) else None,
+                    dealer=fields['dealer'] if isinstance(fields['dealer'], str) else None,
+                    image_url=fields['image_url'],
+                    listing_url=urljoin(self.base_url, fields['listing_url']),
+                    source=self.source,
+                    scraped_at=scraped_at,
+                    vin=fields['vin'] if isinstance(fields['vin'], str) else None
+                ))
+            except Exception as e:
+                logger.error(f"Error mapping structured {self.source} listing: {e}")
+                continue
+        
+        return self.apply_title_parser(listings)
 
 class AutoTraderScraper(BaseScraper):
+    LISTING_SELECTOR = re.compile(r'^(?:listing-item|inventory-listing)$')
+    
     def __init__(self):
         super().__init__()
-        self.base_url = "https://www.autotrader.com"
+        self.base_url = settings.autotrader_base_url.rstrip("/")
         self.source = "autotrader"
     
     def build_search_url(self, car_detection: CarDetection) -> str:
@@ -82,7 +323,7 @@ class AutoTraderScraper(BaseScraper):
         
         return f"{self.base_url}/cars-for-sale/all-cars?{urlencode(params)}"
     
-    async def scrape_listings(self, session: aiohttp.ClientSession, car_detection: CarDetection) -> List[CarListing]:
+    async def scrape_listings(self, session: PageClient, car_detection: CarDetection) -> List[ListingRecord]:
         """Scrape AutoTrader listings"""
         url = self.build_search_url(car_detection)
         html = await self.get_page(session, url)
@@ -90,24 +331,13 @@ class AutoTraderScraper(BaseScraper):
         if not html:
             return []
         
-        soup = BeautifulSoup(html, 'html.parser')
-        listings = []
-        
-        # Find listing containers (this selector may need adjustment)
-        listing_elements = soup.find_all('div', class_=re.compile(r'listing-item|inventory-listing'))
-        
-        for element in listing_elements[:10]:  # Limit to first 10 results
-            try:
-                listing = self._parse_autotrader_listing(element)
-                if listing:
-                    listings.append(listing)
-            except Exception as e:
-                logger.error(f"Error parsing AutoTrader listing: {e}")
-                continue
-        
-        return listings
+        return self.parse_results(html)
     
-    def _parse_autotrader_listing(self, element) -> Optional[CarListing]:
+    def parse_results(self, page: bytes) -> List[ListingRecord]:
+        """Listings from an AutoTrader results page"""
+        return self.parse_page(page, self.LISTING_SELECTOR, self._parse_autotrader_listing)
+    
+    def _parse_autotrader_listing(self, element, scraped_at: datetime) -> Optional[ListingRecord]:
         """Parse individual AutoTrader listing"""
         try:
             # These selectors are approximations and may need adjustment
@@ -128,37 +358,31 @@ class AutoTraderScraper(BaseScraper):
             link = urljoin(self.base_url, link_elem['href'])
             image_url = image_elem['src'] if image_elem else None
             
-            # Extract make/model from title
-            make, model = self._extract_make_model(title)
-            
-            return CarListing(
+            return ListingRecord(
                 title=title,
                 price=price,
-                make=make,
-                model=model,
+                price_value=self.parse_price_value(price),
+                make="Unknown",  # Filled in per page by apply_title_parser
+                model="Unknown",
                 mileage=mileage,
+                mileage_value=self.parse_mileage_value(mileage),
                 location=location,
                 listing_url=link,
                 source=self.source,
+                scraped_at=scraped_at,
                 image_url=image_url
             )
         
         except Exception as e:
             logger.error(f"Error parsing listing element: {e}")
             return None
-    
-    def _extract_make_model(self, title: str) -> tuple:
-        """Extract make and model from listing title"""
-        # Simple extraction - in production you'd use a more sophisticated approach
-        words = title.split()
-        if len(words) >= 2:
-            return words[1], words[2] if len(words) > 2 else "Unknown"
-        return "Unknown", "Unknown"
 
 class CarsComScraper(BaseScraper):
+    LISTING_SELECTOR = re.compile(r'^(?:vehicle-card|listing)$')
+    
     def __init__(self):
         super().__init__()
-        self.base_url = "https://www.cars.com"
+        self.base_url = settings.cars_com_base_url.rstrip("/")
         self.source = "cars.com"
     
     def build_search_url(self, car_detection: CarDetection) -> str:
@@ -182,7 +406,7 @@ class CarsComScraper(BaseScraper):
         
         return f"{self.base_url}/shopping/results/?{urlencode(params)}"
     
-    async def scrape_listings(self, session: aiohttp.ClientSession, car_detection: CarDetection) -> List[CarListing]:
+    async def scrape_listings(self, session: PageClient, car_detection: CarDetection) -> List[ListingRecord]:
         """Scrape Cars.com listings"""
         url = self.build_search_url(car_detection)
         html = await self.get_page(session, url)
@@ -190,24 +414,13 @@ class CarsComScraper(BaseScraper):
         if not html:
             return []
         
-        soup = BeautifulSoup(html, 'html.parser')
-        listings = []
-        
-        # Find listing containers
-        listing_elements = soup.find_all('div', class_=re.compile(r'vehicle-card|listing'))
-        
-        for element in listing_elements[:10]:
-            try:
-                listing = self._parse_cars_listing(element)
-                if listing:
-                    listings.append(listing)
-            except Exception as e:
-                logger.error(f"Error parsing Cars.com listing: {e}")
-                continue
-        
-        return listings
+        return self.parse_results(html)
+    
+    def parse_results(self, page: bytes) -> List[ListingRecord]:
+        """Listings from a Cars.com results page"""
+        return self.parse_page(page, self.LISTING_SELECTOR, self._parse_cars_listing)
     
-    def _parse_cars_listing(self, element) -> Optional[CarListing]:
+    def _parse_cars_listing(self, element, scraped_at: datetime) -> Optional[ListingRecord]:
         """Parse individual Cars.com listing"""
         # Similar structure to AutoTrader parser
         try:
@@ -222,26 +435,19 @@ class CarsComScraper(BaseScraper):
             price = self.parse_price(price_elem.get_text(strip=True)) if price_elem else None
             link = urljoin(self.base_url, link_elem['href'])
             
-            make, model = self._extract_make_model(title)
-            
-            return CarListing(
+            return ListingRecord(
                 title=title,
                 price=price,
-                make=make,
-                model=model,
+                price_value=self.parse_price_value(price),
+                make="Unknown",  # Filled in per page by apply_title_parser
+                model="Unknown",
                 listing_url=link,
-                source=self.source
+                source=self.source,
+                scraped_at=scraped_at
             )
         
         except Exception:
             return None
-    
-    def _extract_make_model(self, title: str) -> tuple:
-        """Extract make and model from listing title"""
-        words = title.split()
-        if len(words) >= 2:
-            return words[0], words[1]
-        return "Unknown", "Unknown"
 
 class ScrapingOrchestrator:
     def __init__(self):
@@ -253,47 +459,152 @@ class ScrapingOrchestrator:
         if settings.enable_cars_com:
             self.scrapers.append(CarsComScraper())
         
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._http2_client: Optional[PageClient] = None
+        
+        if settings.scraper_http2 and not HTTP2_AVAILABLE:
+            logger.warning("SCRAPER_HTTP2 needs httpx[http2]; fetching pages over aiohttp")
+        
         logger.info(f"Initialized {len(self.scrapers)} scrapers")
     
-    async def scrape_all(self, car_detection: CarDetection) -> List[CarListing]:
+    def get_session(self) -> aiohttp.ClientSession:
+        """Shared HTTP session, created on first use so it binds to the running loop"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=settings.max_concurrent_requests)
+            timeout = aiohttp.ClientTimeout(total=settings.request_timeout)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self._session
+    
+    def get_page_client(self) -> PageClient:
+        """Client for result pages: HTTP/2 multiplexed when enabled, else the shared session"""
+        if settings.scraper_http2 and HTTP2_AVAILABLE:
+            if self._http2_client is None or self._http2_client.is_closed:
+                self._http2_client = create_http2_client()
+            return self._http2_client
+        return self.get_session()
+    
+    async def close(self):
+        """Close the shared HTTP session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        if self._http2_client is not None:
+            await self._http2_client.aclose()
+        self._http2_client = None
+    
+    async def scrape_all(self, car_detection: CarDetection, listing_filter: Optional[ListingFilter] = None) -> List[CarListing]:
         """Run all scrapers concurrently"""
         if not self.scrapers:
             logger.warning("No scrapers enabled")
             return []
         
-        connector = aiohttp.TCPConnector(limit=settings.max_concurrent_requests)
-        timeout = aiohttp.ClientTimeout(total=settings.request_timeout)
+        with tracer.span("scrape_all", make=car_detection.make, model=car_detection.model, scrapers=len(self.scrapers)) as span:
+            listings = await self._scrape_all(car_detection, listing_filter)
+            span.set_attribute("listings", len(listings))
+            return listings
+    
+    async def scrape_sources(self, car_detection: CarDetection, deduplicate: bool = True) -> Tuple[List[ListingRecord], Set[str]]:
+        """Every listing from all scrapers, plus the sources that returned any
         
-        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
-            # Run all scrapers concurrently
-            tasks = [
-                scraper.scrape_listings(session, car_detection) 
-                for scraper in self.scrapers
-            ]
-            
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            # Combine results
-            all_listings = []
-            for result in results:
-                if isinstance(result, list):
-                    all_listings.extend(result)
-                elif isinstance(result, Exception):
-                    logger.error(f"Scraper failed: {result}")
-            
-            # Add some randomization to simulate more realistic results
-            if len(all_listings) < 5:
-                all_listings.extend(self._generate_demo_listings(car_detection))
+        A source missing from the set failed or came back empty, so its
+        absent listings say nothing about whether they are gone. With
+        deduplicate=False cross-posts are kept, one copy per source.
+        """
+        session = self.get_page_client()
+        
+        # Run all scrapers concurrently
+        results = await asyncio.gather(*(
+            self._scrape_and_store(scraper, session, car_detection)
+            for scraper in self.scrapers
+        ), return_exceptions=True)
+        
+        # Deduplicate in scraper order rather than completion order, so
+        # the copy of a cross-post that is kept does not vary between runs
+        deduplicator = ListingDeduplicator()
+        all_listings = []
+        responded = set()
+        for result in results:
+            if isinstance(result, BaseException):
+                logger.error(f"Scraper failed: {result}")
+                continue
+            if result:
+                responded.add(result[0].source)
+            all_listings.extend(deduplicator.filter(result) if deduplicate else result)
+        
+        return all_listings, responded
+    
+    async def _scrape_all(self, car_detection: CarDetection, listing_filter: Optional[ListingFilter]) -> List[CarListing]:
+        all_listings, _ = await self.scrape_sources(car_detection)
+        
+        # Made-up listings are only ever mixed in when explicitly asked for
+        if settings.demo_listings and len(all_listings) < 5:
+            all_listings.extend(self._generate_demo_listings(car_detection))
+        
+        # Filter and rank the merged set, then build API models for the top 20 only
+        return to_listings(apply_filter(all_listings, listing_filter, limit=20))
+    
+    async def _scrape_and_store(self, scraper: BaseScraper, session: PageClient, car_detection: CarDetection) -> List[ListingRecord]:
+        """Run one scraper and persist its listings as soon as they arrive"""
+        listings = await scraper.scrape_listings(session, car_detection)
+        
+        if listings:
+            loop = asyncio.get_running_loop()
+            try:
+                await loop.run_in_executor(None, listing_store.upsert_listings, listings)
+            except Exception as e:
+                logger.error(f"Error storing {scraper.source} listings: {e}")
+        
+        return listings
+    
+    async def search(self, car_detection: CarDetection, mode: Optional[str] = None, listing_filter: Optional[ListingFilter] = None) -> List[CarListing]:
+        """Search listings, answering from the local store when it is good enough"""
+        mode = mode or settings.search_mode
+        
+        if mode == "store-first" and "Unknown" not in (car_detection.make, car_detection.model):
+            loop = asyncio.get_running_loop()
+            count, newest = await loop.run_in_executor(None, listing_store.coverage, car_detection)
             
-            return all_listings[:20]  # Return top 20 results
+            if count >= settings.store_min_results and newest and time.time() - newest <= settings.store_max_age:
+                logger.info(f"Serving {car_detection.make} {car_detection.model} from listing store ({count} listings)")
+                listings = await loop.run_in_executor(None, listing_store.search, car_detection, settings.store_search_limit)
+                # The store keeps every source's copy of a cross-post
+                listings = ListingDeduplicator().filter(listings)
+                return to_listings(apply_filter(listings, listing_filter, limit=20))
+        
+        return await self.scrape_all(car_detection, listing_filter)
     
-    def _generate_demo_listings(self, car_detection: CarDetection) -> List[CarListing]:
+    async def search_many(self, detections: List[CarDetection], mode: Optional[str] = None, listing_filter: Optional[ListingFilter] = None) -> List[List[CarListing]]:
+        """Search for several detections concurrently over the shared session
+        
+        Detections that produce the same query are searched once, and
+        identical result pages are fetched once via get_page coalescing.
+        """
+        searches: Dict[Tuple[str, str, Optional[int]], asyncio.Future] = {}
+        for detection in detections:
+            key = (detection.make, detection.model, detection.year)
+            if key not in searches:
+                searches[key] = asyncio.ensure_future(self.search(detection, mode, listing_filter))
+        
+        await asyncio.gather(*searches.values(), return_exceptions=True)
+        
+        results = []
+        for detection in detections:
+            future = searches[(detection.make, detection.model, detection.year)]
+            if future.exception() is not None:
+                logger.error(f"Search failed for {detection.make} {detection.model}: {future.exception()}")
+                results.append([])
+            else:
+                results.append(future.result())
+        return results
+    
+    def _generate_demo_listings(self, car_detection: CarDetection) -> List[ListingRecord]:
         """Generate demo listings for demonstration purposes"""
         demo_listings = []
+        scraped_at = datetime.now()
         
         makes = ["Toyota", "Honda", "Ford", "Chevrolet", "Nissan", "BMW", "Mercedes"] 
         models = ["Camry", "Accord", "F-150", "Cruze", "Altima", "3 Series", "C-Class"]
-        prices = ["$15,999", "$22,500", "$18,750", "$28,900", "$31,200"]
+        prices = [15999, 22500, 18750, 28900, 31200]
         years = [2018, 2019, 2020, 2021, 2022]
         
         for i in range(5):
@@ -301,18 +612,22 @@ class ScrapingOrchestrator:
             model = random.choice(models)
             year = random.choice(years)
             price = random.choice(prices)
+            mileage = random.randint(15, 80) * 1000
             
-            demo_listings.append(CarListing(
+            demo_listings.append(ListingRecord(
                 title=f"{year} {make} {model}",
-                price=price,
+                price=f"${price:,}",
+                price_value=price,
                 year=year,
                 make=make,
                 model=model,
-                mileage=f"{random.randint(15, 80)},000 miles",
+                mileage=f"{mileage:,} miles",
+                mileage_value=mileage,
                 location="Demo Location",
                 dealer="Demo Dealer",
                 listing_url=f"https://example.com/listing/{i}",
-                source="demo"
+                source="demo",
+                scraped_at=scraped_at
             ))
         
         return demo_listings
@@ -0,0 +1,166 @@
+import gc
+import os
+import random
+import shutil
+import signal
+import socket
+import tempfile
+import time
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import uvicorn
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Index of this process among the pre-forked workers; None when not pre-forked
+worker_id: Optional[int] = None
+
+def is_primary_worker() -> bool:
+    """Whether this process should run singleton background tasks"""
+    return worker_id in (None, 0)
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    """Listening socket created once in the master and inherited by every worker"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+def split_cpus(workers: int) -> List[List[int]]:
+    """Divide the CPUs available to this process evenly between workers"""
+    if hasattr(os, "sched_getaffinity"):
+        cpus = sorted(os.sched_getaffinity(0))
+    else:
+        cpus = list(range(os.cpu_count() or 1))
+    share = max(1, len(cpus) // workers)
+    return [cpus[(i * share) % len(cpus):][:share] for i in range(workers)]
+
+def _after_fork(index: int, cpus: List[int]):
+    """Reset per-process state that must not be shared with the master"""
+    global worker_id
+    worker_id = index
+    random.seed()
+
+    if settings.serve_pin_cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+
+    # Size intra-op parallelism to this worker's share of the cores, so
+    # workers don't oversubscribe the machine
+    threads = settings.torch_threads or len(cpus)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+    from .store import listing_store
+    from .jobs import job_manager
+    from .saved_searches import saved_search_manager
+    listing_store.reopen()
+    job_manager.store.reopen()
+    saved_search_manager.store.reopen()
+
+    logger.info(f"Worker {index} (pid {os.getpid()}) started with {threads} inference threads")
+
+def _run_worker(app, sock: socket.socket, index: int, cpus: List[int]):
+    """Serve requests on the inherited socket until told to stop"""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    _after_fork(index, cpus)
+
+    config = uvicorn.Config(app, log_level="info")
+    server = uvicorn.Server(config)
+    server.run(sockets=[sock])
+
+def serve_prefork(host: str, port: int, workers: int):
+    """
+    Load the app and its models once, then fork workers that share the
+    weights copy-on-write and accept connections from one socket
+    """
+    if not hasattr(os, "fork"):
+        raise RuntimeError("Pre-fork serving needs os.fork (not available on this platform)")
+
+    if workers > 1 and settings.job_store == "memory":
+        # A job would only be visible to the worker that accepted it
+        raise RuntimeError("JOB_STORE=memory keeps jobs per worker; use JOB_STORE=sqlite with several workers")
+
+    # Each worker writes its metrics to this directory and /metrics sums
+    # them; it has to be set before prometheus_client is first imported
+    own_metrics_dir = "PROMETHEUS_MULTIPROC_DIR" not in os.environ
+    if own_metrics_dir:
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="fastcarvision-metrics-")
+    else:
+        # Samples left by a previous run would be counted again
+        metrics_dir = Path(os.environ["PROMETHEUS_MULTIPROC_DIR"])
+        metrics_dir.mkdir(parents=True, exist_ok=True)
+        for path in metrics_dir.glob("*.db"):
+            path.unlink()
+
+    # Importing the app loads YOLO and CLIP in the master process
+    from .main import app
+    from .metrics import mark_process_dead
+
+    sock = bind_socket(host, port)
+    cpu_shares = split_cpus(workers)
+
+    # Move everything allocated so far to the permanent generation, so the
+    # collector never writes to (and un-shares) the pages holding it
+    gc.collect()
+    gc.freeze()
+
+    children: Dict[int, int] = {}
+    stopping = False
+
+    def spawn(index: int):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _run_worker(app, sock, index, cpu_shares[index])
+            except Exception as e:
+                logger.exception(f"Worker {index} crashed: {e}")
+                code = 1
+            finally:
+                # Never fall back into the master's loop
+                os._exit(code)
+        children[pid] = index
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for index in range(workers):
+        spawn(index)
+    logger.info(f"Serving on {host}:{port} with {workers} pre-forked workers")
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+
+        index = children.pop(pid, None)
+        mark_process_dead(pid)
+        if index is not None and not stopping:
+            logger.warning(f"Worker {index} (pid {pid}) exited with status {status}, restarting")
+            time.sleep(1)
+            spawn(index)
+
+    sock.close()
+    if own_metrics_dir:
+        shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
+    logger.info("All workers stopped")
@@ -0,0 +1,341 @@
+import sqlite3
+import threading
+import time
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from .config import settings
+from .models import CarDetection
+from .records import ListingRecord
+from .utils import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS listings (
+    listing_url TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    price TEXT,
+    price_value INTEGER,
+    year INTEGER,
+    make TEXT NOT NULL COLLATE NOCASE,
+    model TEXT NOT NULL COLLATE NOCASE,
+    trim TEXT,
+    mileage TEXT,
+    mileage_value INTEGER,
+    location TEXT,
+    dealer TEXT,
+    image_url TEXT,
+    source TEXT NOT NULL,
+    vin TEXT,
+    scraped_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_listings_make_model_year ON listings (make, model, year);
+CREATE INDEX IF NOT EXISTS idx_listings_make_model_price ON listings (make, model, price_value);
+CREATE INDEX IF NOT EXISTS idx_listings_scraped_at ON listings (scraped_at);
+CREATE TABLE IF NOT EXISTS detections (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    detected_at REAL NOT NULL,
+    make TEXT NOT NULL,
+    model TEXT NOT NULL,
+    year INTEGER,
+    body_type TEXT,
+    color TEXT,
+    confidence REAL NOT NULL,
+    embedding BLOB  -- little-endian float32 CLIP vector
+);
+CREATE INDEX IF NOT EXISTS idx_detections_detected_at ON detections (detected_at);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS listings_fts USING fts5(
+    title, content='listings', content_rowid='rowid'
+);
+CREATE TRIGGER IF NOT EXISTS listings_ai AFTER INSERT ON listings BEGIN
+    INSERT INTO listings_fts (rowid, title) VALUES (new.rowid, new.title);
+END;
+CREATE TRIGGER IF NOT EXISTS listings_ad AFTER DELETE ON listings BEGIN
+    INSERT INTO listings_fts (listings_fts, rowid, title) VALUES ('delete', old.rowid, old.title);
+END;
+CREATE TRIGGER IF NOT EXISTS listings_au AFTER UPDATE OF title ON listings BEGIN
+    INSERT INTO listings_fts (listings_fts, rowid, title) VALUES ('delete', old.rowid, old.title);
+    INSERT INTO listings_fts (rowid, title) VALUES (new.rowid, new.title);
+END;
+"""
+
+UPSERT = """
+INSERT INTO listings (
+    listing_url, title, price, price_value, year, make, model, trim, mileage,
+    mileage_value, location, dealer, image_url, source, vin, scraped_at
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (listing_url) DO UPDATE SET
+    title = excluded.title,
+    price = excluded.price,
+    price_value = excluded.price_value,
+    year = COALESCE(excluded.year, listings.year),
+    make = excluded.make,
+    model = excluded.model,
+    trim = COALESCE(excluded.trim, listings.trim),
+    mileage = COALESCE(excluded.mileage, listings.mileage),
+    mileage_value = COALESCE(excluded.mileage_value, listings.mileage_value),
+    location = COALESCE(excluded.location, listings.location),
+    dealer = COALESCE(excluded.dealer, listings.dealer),
+    image_url = COALESCE(excluded.image_url, listings.image_url),
+    source = excluded.source,
+    vin = COALESCE(excluded.vin, listings.vin),
+    scraped_at = excluded.scraped_at
+"""
+
+COLUMNS = (
+    "listing_url, title, price, price_value, year, make, model, trim, mileage, "
+    "mileage_value, location, dealer, image_url, source, vin, scraped_at"
+)
+
+DETECTION_COLUMNS = "detected_at, make, model, year, body_type, color, confidence, embedding"
+
+# Tables that can be read in bulk with iter_batches, and their columns
+EXPORT_COLUMNS = {
+    "listings": COLUMNS,
+    "detections": DETECTION_COLUMNS,
+}
+
+def fts_match(query: str) -> str:
+    """FTS5 query matching every term, quoted so input is never parsed as FTS syntax"""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+class ListingStore:
+    """SQLite-backed store of scraped listings keyed by canonical URL
+
+    The database is opened on first use (or by open() at startup), so
+    importing the app never creates files.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.fts_enabled = False
+        self._last_expiry = 0.0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._open_lock = threading.Lock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.open()
+        return self._conn
+
+    def open(self):
+        """Create the database and its schema if this process has not yet"""
+        with self._open_lock:
+            if self._conn is not None:
+                return
+            if self.db_path != ":memory:":
+                Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+
+            conn = self._connect()
+            conn.executescript(SCHEMA)
+            try:
+                conn.executescript(FTS_SCHEMA)
+                self.fts_enabled = True
+            except sqlite3.OperationalError as e:
+                logger.warning(f"SQLite FTS5 not available, title search disabled: {e}")
+                self.fts_enabled = False
+            self._conn = conn
+
+        logger.info(f"Listing store opened at {self.db_path}")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def reopen(self):
+        """Open a fresh connection in a forked worker
+
+        SQLite connections must not be shared across fork, and the
+        inherited one is left alone rather than closed so the parent's
+        handle is not disturbed.
+        """
+        self._lock = threading.Lock()
+        self._open_lock = threading.Lock()
+        if self._conn is not None and self.db_path != ":memory:":
+            self._conn = self._connect()
+
+    def upsert_listings(self, listings: List[ListingRecord]) -> int:
+        """Insert or refresh listings, keyed by canonical listing URL"""
+        rows = [
+            (
+                canonicalize_url(listing.listing_url),
+                listing.title,
+                listing.price,
+                listing.price_value,
+                listing.year,
+                listing.make,
+                listing.model,
+                listing.trim,
+                listing.mileage,
+                listing.mileage_value,
+                listing.location,
+                listing.dealer,
+                listing.image_url,
+                listing.source,
+                listing.vin,
+                listing.scraped_at.timestamp(),
+            )
+            for listing in listings
+            if listing.source != "demo"
+        ]
+        if not rows:
+            return 0
+
+        with self._lock, self.conn:
+            self.conn.executemany(UPSERT, rows)
+
+        # Expire opportunistically so the store never needs its own timer
+        if time.time() - self._last_expiry > settings.listing_store_ttl / 10:
+            self.expire_stale()
+
+        return len(rows)
+
+    def expire_stale(self, max_age: Optional[int] = None) -> int:
+        """Delete listings that have not been seen within max_age seconds"""
+        max_age = max_age if max_age is not None else settings.listing_store_ttl
+        cutoff = time.time() - max_age
+
+        with self._lock, self.conn:
+            cursor = self.conn.execute("DELETE FROM listings WHERE scraped_at < ?", (cutoff,))
+
+        self._last_expiry = time.time()
+        if cursor.rowcount:
+            logger.info(f"Expired {cursor.rowcount} stale listings")
+        return cursor.rowcount
+
+    def record_detections(self, detections: Sequence[CarDetection], embeddings: Sequence) -> int:
+        """Append detections and their CLIP embeddings (numpy arrays or None)"""
+        detected_at = time.time()
+        rows = [
+            (
+                detected_at,
+                detection.make,
+                detection.model,
+                detection.year,
+                detection.body_type,
+                detection.color,
+                detection.confidence,
+                embedding.astype('<f4').tobytes() if embedding is not None else None,
+            )
+            for detection, embedding in zip(detections, embeddings)
+        ]
+
+        with self._lock, self.conn:
+            self.conn.executemany(
+                f"INSERT INTO detections ({DETECTION_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+        return len(rows)
+
+    def iter_batches(self, table: str, batch_size: int = 10000) -> Iterator[List[tuple]]:
+        """Read a whole table in rowid order, one batch of rows at a time
+
+        Keyset pagination keeps the lock free between batches, so bulk
+        reads never stall scrapers writing to the store.
+        """
+        columns = EXPORT_COLUMNS[table]
+        last_rowid = 0
+
+        while True:
+            with self._lock:
+                rows = self.conn.execute(
+                    f"SELECT rowid, {columns} FROM {table} WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                    (last_rowid, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            last_rowid = rows[-1][0]
+            yield [row[1:] for row in rows]
+
+    def _where(self, car_detection: CarDetection, max_age: int) -> Tuple[str, list]:
+        """Build the indexed WHERE clause for a detection
+
+        Listings whose parsed make/model differ from the detection's
+        spelling (e.g. "F150" vs "F-150") are still found when their
+        title contains the make and model, via the FTS index.
+        """
+        self.open()
+        if self.fts_enabled:
+            clauses = [
+                "((make = ? AND model = ?) OR rowid IN "
+                "(SELECT rowid FROM listings_fts WHERE listings_fts MATCH ?))",
+                "scraped_at >= ?",
+            ]
+            match = fts_match(f"{car_detection.make} {car_detection.model}")
+            params = [car_detection.make, car_detection.model, match, time.time() - max_age]
+        else:
+            clauses = ["make = ?", "model = ?", "scraped_at >= ?"]
+            params = [car_detection.make, car_detection.model, time.time() - max_age]
+
+        if car_detection.year:
+            clauses.append("year BETWEEN ? AND ?")
+            params.extend([car_detection.year - 2, car_detection.year + 2])
+
+        return " AND ".join(clauses), params
+
+    def coverage(self, car_detection: CarDetection) -> Tuple[int, Optional[float]]:
+        """Return (matching listing count, newest scrape time) for a detection"""
+        where, params = self._where(car_detection, settings.listing_store_ttl)
+
+        with self._lock:
+            row = self.conn.execute(
+                f"SELECT COUNT(*), MAX(scraped_at) FROM listings WHERE {where}", params
+            ).fetchone()
+
+        return row[0], row[1]
+
+    def search(self, car_detection: CarDetection, limit: int = 20) -> List[ListingRecord]:
+        """Return stored listings matching a detection, freshest first"""
+        where, params = self._where(car_detection, settings.listing_store_ttl)
+
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT {COLUMNS} FROM listings WHERE {where} "
+                f"ORDER BY scraped_at DESC, listing_url LIMIT ?",
+                params + [limit]
+            ).fetchall()
+
+        return [self._to_record(row) for row in rows]
+
+    def _to_record(self, row: tuple) -> ListingRecord:
+        """Convert a listings row back into a listing record"""
+        (listing_url, title, price, price_value, year, make, model, trim, mileage,
+         mileage_value, location, dealer, image_url, source, vin, scraped_at) = row
+
+        return ListingRecord(
+            title=title,
+            price=price,
+            price_value=price_value,
+            year=year,
+            make=make,
+            model=model,
+            trim=trim,
+            mileage=mileage,
+            mileage_value=mileage_value,
+            location=location,
+            dealer=dealer,
+            image_url=image_url,
+            listing_url=listing_url,
+            source=source,
+            vin=vin,
+            scraped_at=datetime.fromtimestamp(scraped_at)
+        )
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+# Global listing store
+listing_store = ListingStore(settings.listing_store_path)
@@ -0,0 +1,246 @@
+import asyncio
+import contextvars
+import hashlib
+import io
+import os
+import threading
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import aiohttp
+from fastapi import HTTPException, status
+from PIL import Image
+
+from .admission import admission_controller
+from .config import settings
+from .egress import BlockedHost, blocked_by_guard, create_session, guarded_request
+from .metrics import stage
+from .tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+def thumb_widths() -> List[int]:
+    return sorted(int(w) for w in settings.thumb_widths.split(",") if w.strip())
+
+def snap_width(width: int) -> int:
+    """Round a requested width up to the nearest configured size, so caches are shared"""
+    widths = thumb_widths()
+    for size in widths:
+        if width <= size:
+            return size
+    return widths[-1]
+
+def etag_for(data: bytes) -> str:
+    """Strong ETag derived from the thumbnail bytes themselves"""
+    return f'"{hashlib.blake2b(data, digest_size=16).hexdigest()}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header covers this ETag"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+def make_thumbnail(contents: bytes, width: int) -> bytes:
+    """Decode just enough of the image for the target width and encode a JPEG"""
+    try:
+        image = Image.open(io.BytesIO(contents))
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Source is not a supported image"
+        )
+
+    if image.width * image.height > settings.max_image_pixels:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Source image too large ({image.width}x{image.height})"
+        )
+
+    with stage("thumb_resize"):
+        height = max(1, round(image.height * width / image.width))
+        try:
+            # JPEG can decode straight to 1/2, 1/4 or 1/8 scale, skipping most of the IDCT work
+            image.draft("RGB", (width, height))
+            if image.mode != "RGB":
+                image = image.convert("RGB")
+            if image.width > width:
+                image = image.resize((width, height), Image.Resampling.LANCZOS, reducing_gap=2.0)
+
+            buffer = io.BytesIO()
+            image.save(buffer, format="JPEG", quality=settings.thumb_quality, optimize=True)
+        except OSError as e:
+            # Pixel data is only decoded here, so truncated or corrupt files fail late
+            logger.info(f"Could not decode source image: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Source is not a supported image"
+            )
+    return buffer.getvalue()
+
+class ThumbnailCache:
+    """Thumbnails on disk with a total size cap, evicting least recently used
+
+    Recency is kept in memory and mirrored to file mtimes, so the order
+    survives restarts. With several workers each keeps its own index over
+    the shared directory; a file another worker evicted is just a miss.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries: Optional[OrderedDict] = None
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.jpg"
+
+    def _load(self) -> OrderedDict:
+        if self._entries is None:
+            files = []
+            if self.directory.is_dir():
+                for path in self.directory.glob("*/*.jpg"):
+                    try:
+                        info = path.stat()
+                    except FileNotFoundError:
+                        continue
+                    files.append((info.st_mtime, path.stem, info.st_size))
+            self._entries = OrderedDict((key, size) for _, key, size in sorted(files))
+            self.total_bytes = sum(self._entries.values())
+        return self._entries
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entries = self._load()
+            path = self._path(key)
+            try:
+                data = path.read_bytes()
+                os.utime(path)
+            except FileNotFoundError:
+                if key in entries:
+                    self.total_bytes -= entries.pop(key)
+                return None
+            if key not in entries:
+                self.total_bytes += len(data)
+            entries[key] = len(data)
+            entries.move_to_end(key)
+            return data
+
+    def put(self, key: str, data: bytes):
+        with self._lock:
+            entries = self._load()
+            path = self._path(key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write then rename, so readers never see a partial file
+            temp = path.with_suffix(f".{os.getpid()}.tmp")
+            temp.write_bytes(data)
+            os.replace(temp, path)
+
+            self.total_bytes += len(data) - entries.pop(key, 0)
+            entries[key] = len(data)
+            while self.total_bytes > self.max_bytes and len(entries) > 1:
+                old_key, size = entries.popitem(last=False)
+                self.total_bytes -= size
+                try:
+                    self._path(old_key).unlink()
+                except FileNotFoundError:
+                    pass
+
+class ThumbnailService:
+    """Fetches listing images and serves cached thumbnails
+
+    Image URLs come from users, so they are fetched over a session of our
+    own whose resolver refuses non-public addresses, and every redirect
+    hop is checked again.
+    """
+
+    def __init__(self, cache: ThumbnailCache):
+        self.cache = cache
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def cache_key(self, url: str, width: int) -> str:
+        return hashlib.sha256(f"{width}:{url}".encode()).hexdigest()
+
+    def get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            timeout = aiohttp.ClientTimeout(total=settings.request_timeout)
+            self._session = create_session(settings.thumb_allow_private_hosts, timeout)
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def fetch(self, url: str) -> bytes:
+        """Download a source image, stopping at the size limit"""
+        with tracer.span("fetch_image", **{"http.url": url}) as span:
+            try:
+                async with guarded_request(
+                    self.get_session(), "GET", url, settings.thumb_allow_private_hosts,
+                    headers={"User-Agent": settings.user_agent}
+                ) as response:
+                    span.set_attribute("http.status_code", response.status)
+                    if response.status != 200:
+                        raise HTTPException(
+                            status_code=status.HTTP_502_BAD_GATEWAY,
+                            detail=f"Image host returned {response.status}"
+                        )
+                    buffer = bytearray()
+                    async for chunk in response.content.iter_chunked(64 * 1024):
+                        buffer.extend(chunk)
+                        if len(buffer) > settings.max_upload_bytes:
+                            raise HTTPException(
+                                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                                detail="Source image too large"
+                            )
+            except ValueError:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Image URL must be http(s)")
+            except BlockedHost:
+                raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Image host not allowed")
+            except asyncio.TimeoutError:
+                logger.warning(f"Timed out fetching image {url}")
+                raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="Image host timed out")
+            except aiohttp.ClientError as e:
+                if blocked_by_guard(e):
+                    raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Image host not allowed")
+                logger.warning(f"Error fetching image {url}: {e}")
+                raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail="Could not fetch image")
+            span.set_attribute("http.response_bytes", len(buffer))
+            return bytes(buffer)
+
+    async def thumbnail(self, url: str, width: int) -> bytes:
+        """Thumbnail bytes from the cache, or built once for concurrent callers"""
+        key = self.cache_key(url, width)
+        loop = asyncio.get_running_loop()
+
+        data = await loop.run_in_executor(None, self.cache.get, key)
+        if data is not None:
+            return data
+
+        pending = self._inflight.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._build(url, width, key))
+            self._inflight[key] = pending
+            pending.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(pending)
+
+    async def _build(self, url: str, width: int, key: str) -> bytes:
+        # Cache misses fetch and decode arbitrary images, so they are admitted like other heavy work
+        async with admission_controller.thumbnails.slot():
+            contents = await self.fetch(url)
+
+            loop = asyncio.get_running_loop()
+            data = await loop.run_in_executor(None, contextvars.copy_context().run, make_thumbnail, contents, width)
+        try:
+            await loop.run_in_executor(None, self.cache.put, key, data)
+        except OSError as e:
+            logger.error(f"Error caching thumbnail: {e}")
+        return data
+
+# Global thumbnail service
+thumbnail_service = ThumbnailService(ThumbnailCache(settings.thumb_cache_dir, settings.thumb_cache_max_bytes))
@@ -0,0 +1,241 @@
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# Canonical make -> models. Multi-word entries are matched as token sequences.
+VOCABULARY: Dict[str, List[str]] = {
+    "Acura": ["ILX", "Integra", "MDX", "RDX", "TLX", "TSX"],
+    "Audi": ["A3", "A4", "A5", "A6", "A7", "A8", "Q3", "Q5", "Q7", "Q8", "e-tron", "TT", "R8"],
+    "BMW": ["1 Series", "2 Series", "3 Series", "4 Series", "5 Series", "7 Series", "8 Series",
+            "X1", "X2", "X3", "X4", "X5", "X6", "X7", "Z4", "i3", "i4", "iX", "M3", "M5"],
+    "Buick": ["Enclave", "Encore", "Encore GX", "Envision", "LaCrosse", "Regal"],
+    "Cadillac": ["CT4", "CT5", "Escalade", "Escalade ESV", "XT4", "XT5", "XT6", "Lyriq"],
+    "Chevrolet": ["Blazer", "Bolt EV", "Camaro", "Colorado", "Corvette", "Cruze", "Equinox",
+                  "Impala", "Malibu", "Silverado 1500", "Silverado 2500HD", "Silverado",
+                  "Spark", "Suburban", "Tahoe", "Trailblazer", "Traverse", "Trax"],
+    "Chrysler": ["200", "300", "Pacifica", "Voyager"],
+    "Dodge": ["Challenger", "Charger", "Durango", "Grand Caravan", "Journey", "Hornet"],
+    "Ford": ["Bronco", "Bronco Sport", "EcoSport", "Edge", "Escape", "Expedition", "Explorer",
+             "F-150", "F-250", "F-350", "Fiesta", "Focus", "Fusion", "Maverick", "Mustang",
+             "Mustang Mach-E", "Ranger", "Transit"],
+    "Genesis": ["G70", "G80", "G90", "GV70", "GV80"],
+    "GMC": ["Acadia", "Canyon", "Sierra 1500", "Sierra", "Terrain", "Yukon", "Yukon XL"],
+    "Honda": ["Accord", "Civic", "CR-V", "Fit", "HR-V", "Insight", "Odyssey", "Passport",
+              "Pilot", "Ridgeline"],
+    "Hyundai": ["Elantra", "Ioniq 5", "Ioniq 6", "Kona", "Palisade", "Santa Fe", "Sonata",
+                "Tucson", "Veloster", "Venue"],
+    "Infiniti": ["Q50", "Q60", "QX50", "QX55", "QX60", "QX80"],
+    "Jaguar": ["E-Pace", "F-Pace", "F-Type", "I-Pace", "XE", "XF"],
+    "Jeep": ["Cherokee", "Compass", "Gladiator", "Grand Cherokee", "Grand Cherokee L",
+             "Renegade", "Wagoneer", "Grand Wagoneer", "Wrangler", "Wrangler Unlimited"],
+    "Kia": ["Carnival", "EV6", "Forte", "K5", "Niro", "Optima", "Rio", "Seltos", "Sorento",
+            "Soul", "Sportage", "Stinger", "Telluride"],
+    "Land Rover": ["Defender", "Discovery", "Discovery Sport", "Range Rover",
+                   "Range Rover Evoque", "Range Rover Sport", "Range Rover Velar"],
+    "Lexus": ["ES", "ES 350", "GX", "GX 460", "IS", "IS 300", "LS", "LX", "NX", "NX 300",
+              "RX", "RX 350", "UX"],
+    "Lincoln": ["Aviator", "Corsair", "MKZ", "Nautilus", "Navigator"],
+    "Mazda": ["CX-3", "CX-30", "CX-5", "CX-50", "CX-9", "CX-90", "MX-5 Miata", "Mazda3", "Mazda6"],
+    "Mercedes-Benz": ["A-Class", "C-Class", "CLA", "E-Class", "G-Class", "GLA", "GLB", "GLC",
+                      "GLE", "GLS", "S-Class", "Sprinter"],
+    "Mini": ["Cooper", "Cooper S", "Countryman", "Clubman"],
+    "Mitsubishi": ["Eclipse Cross", "Mirage", "Outlander", "Outlander Sport"],
+    "Nissan": ["Altima", "Armada", "Frontier", "Kicks", "Leaf", "Maxima", "Murano", "Pathfinder",
+               "Rogue", "Rogue Sport", "Sentra", "Titan", "Versa"],
+    "Porsche": ["718 Boxster", "718 Cayman", "911", "Cayenne", "Macan", "Panamera", "Taycan"],
+    "Ram": ["1500", "2500", "3500", "ProMaster"],
+    "Subaru": ["Ascent", "BRZ", "Crosstrek", "Forester", "Impreza", "Legacy", "Outback", "WRX"],
+    "Tesla": ["Model 3", "Model S", "Model X", "Model Y", "Cybertruck"],
+    "Toyota": ["4Runner", "86", "Avalon", "C-HR", "Camry", "Corolla", "Corolla Cross",
+               "Highlander", "Land Cruiser", "Prius", "RAV4", "Sequoia", "Sienna", "Supra",
+               "Tacoma", "Tundra", "Venza"],
+    "Volkswagen": ["Arteon", "Atlas", "Atlas Cross Sport", "Golf", "GTI", "Golf GTI", "ID.4",
+                   "Jetta", "Passat", "Taos", "Tiguan"],
+    "Volvo": ["S60", "S90", "V60", "XC40", "XC60", "XC90"],
+}
+
+# Alternative spellings seen in listing titles
+MAKE_ALIASES: Dict[str, str] = {
+    "chevy": "Chevrolet",
+    "vw": "Volkswagen",
+    "mercedes": "Mercedes-Benz",
+    "mercedes benz": "Mercedes-Benz",
+    "benz": "Mercedes-Benz",
+    "landrover": "Land Rover",
+    "range rover": "Land Rover",
+}
+
+MODEL_ALIASES: Dict[Tuple[str, str], str] = {
+    ("Ford", "f150"): "F-150",
+    ("Ford", "f 150"): "F-150",
+    ("Ford", "f250"): "F-250",
+    ("Honda", "crv"): "CR-V",
+    ("Honda", "hrv"): "HR-V",
+    ("Mazda", "cx5"): "CX-5",
+    ("Mazda", "3"): "Mazda3",
+    ("Mazda", "6"): "Mazda6",
+    ("Mazda", "mazda 3"): "Mazda3",
+    ("Mazda", "mazda 6"): "Mazda6",
+    ("Mazda", "miata"): "MX-5 Miata",
+    ("BMW", "3-series"): "3 Series",
+    ("BMW", "5-series"): "5 Series",
+    ("Mercedes-Benz", "c class"): "C-Class",
+    ("Mercedes-Benz", "e class"): "E-Class",
+    ("Mercedes-Benz", "c300"): "C-Class",
+    ("Mercedes-Benz", "c 300"): "C-Class",
+    ("Mercedes-Benz", "e350"): "E-Class",
+    ("Toyota", "rav 4"): "RAV4",
+}
+
+TRIMS = [
+    "L", "LE", "SE", "XLE", "XSE", "TRD Off-Road", "TRD Pro", "TRD Sport", "Nightshade",
+    "LX", "EX", "EX-L", "Sport", "Touring", "Sport Touring", "Si", "Type R",
+    "S", "SV", "SL", "SR", "Platinum", "Limited", "Premium", "Premium Plus", "Prestige",
+    "XL", "XLT", "Lariat", "King Ranch", "Raptor", "Titanium", "ST", "GT", "SEL", "SES",
+    "LS", "LT", "LTZ", "RS", "Premier", "High Country", "Z71", "SS", "ZL1",
+    "Sahara", "Rubicon", "Laredo", "Overland", "Summit", "Trailhawk", "Latitude", "Altitude",
+    "Base", "Denali", "AT4", "SLE", "SLT", "Big Horn", "Laramie", "Rebel", "Tradesman",
+    "Long Range", "Performance", "Plaid", "xDrive", "sDrive", "4MATIC", "quattro",
+    "Hybrid", "Plug-In Hybrid", "AWD", "4WD", "FWD", "RWD",
+]
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-.'][a-z0-9]+)*")
+YEAR_PATTERN = re.compile(r"^(19[5-9]\d|20\d{2})$")
+END = "$"  # Trie key holding the value of a complete phrase
+
+class ParsedTitle(NamedTuple):
+    make: Optional[str]
+    model: Optional[str]
+    year: Optional[int]
+    trim: Optional[str]
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens, keeping hyphenated names like CR-V together"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+class PhraseTrie:
+    """Token-level trie for longest-match lookup of multi-word phrases"""
+
+    def __init__(self):
+        self.root: dict = {}
+
+    def add(self, phrase: str, value):
+        """Insert a phrase with the value returned when it matches"""
+        node = self.root
+        for token in tokenize(phrase):
+            node = node.setdefault(token, {})
+        node[END] = value
+
+    def match(self, tokens: List[str], start: int) -> Tuple[Optional[object], int]:
+        """Longest phrase starting at `start`; returns (value, end index)"""
+        node = self.root
+        value, end = None, start
+        for i in range(start, len(tokens)):
+            node = node.get(tokens[i])
+            if node is None:
+                break
+            if END in node:
+                value, end = node[END], i + 1
+        return value, end
+
+class TitleParser:
+    """Extracts make, model, year and trim from listing titles in one pass
+
+    The vocabulary is compiled once into token tries: one for makes, one
+    per make for its models, a global model trie (to infer the make from
+    titles like "Camry SE") and one for trims.
+    """
+
+    def __init__(self, vocabulary: Dict[str, List[str]] = VOCABULARY):
+        self.makes = PhraseTrie()
+        self.models: Dict[str, PhraseTrie] = {}
+        self.all_models = PhraseTrie()
+        self.trims = PhraseTrie()
+
+        model_owners: Dict[str, List[Tuple[str, str]]] = {}
+        for make, models in vocabulary.items():
+            self.makes.add(make, make)
+            trie = self.models[make] = PhraseTrie()
+            for model in models:
+                trie.add(model, model)
+                model_owners.setdefault(" ".join(tokenize(model)), []).append((make, model))
+
+        # Aliases of makes outside the vocabulary would match with no model trie
+        for alias, make in MAKE_ALIASES.items():
+            if make in self.models:
+                self.makes.add(alias, make)
+        for (make, alias), model in MODEL_ALIASES.items():
+            if make in self.models:
+                self.models[make].add(alias, model)
+
+        # Only models that belong to a single make can imply that make
+        for phrase, owners in model_owners.items():
+            if len(owners) == 1:
+                self.all_models.add(phrase, owners[0])
+
+        for trim in TRIMS:
+            self.trims.add(trim, trim)
+
+    def parse(self, title: str) -> ParsedTitle:
+        """Parse a single listing title"""
+        tokens = tokenize(title)
+        make = model = trim = None
+        year = None
+        i = 0
+
+        while i < len(tokens):
+            token = tokens[i]
+
+            if year is None and YEAR_PATTERN.match(token):
+                year = int(token)
+                i += 1
+                continue
+
+            if make is None:
+                value, end = self.makes.match(tokens, i)
+                if value is not None:
+                    make = value
+                    # "Range Rover" is both a make alias and a model
+                    if make == "Land Rover" and tokens[i] == "range":
+                        end = i
+                    i = end
+                    continue
+
+            if model is None:
+                if make is not None:
+                    value, end = self.models[make].match(tokens, i)
+                    if value is not None:
+                        model = value
+                        i = end
+                        continue
+                else:
+                    owner, end = self.all_models.match(tokens, i)
+                    if owner is not None:
+                        make, model = owner
+                        i = end
+                        continue
+
+            if model is not None and trim is None:
+                value, end = self.trims.match(tokens, i)
+                if value is not None:
+                    trim = value
+                    i = end
+                    # Trims follow the model, so nothing useful remains
+                    break
+
+            i += 1
+
+        return ParsedTitle(make, model, year, trim)
+
+    def parse_batch(self, titles: List[str]) -> List[ParsedTitle]:
+        """Parse all titles of a page; repeated titles are parsed once"""
+        memo: Dict[str, ParsedTitle] = {}
+        results = []
+        for title in titles:
+            parsed = memo.get(title)
+            if parsed is None:
+                parsed = memo[title] = self.parse(title)
+            results.append(parsed)
+        return results
+
+# Compiled once at startup and shared by all scrapers
+title_parser = TitleParser()
@@ -0,0 +1,198 @@
+import json
+import os
+import queue
+import random
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+class Span:
+    """One timed operation in a trace, shaped after OpenTelemetry spans"""
+
+    __slots__ = ("trace_id", "span_id", "parent_span_id", "name", "start_ns", "end_ns",
+                 "attributes", "status", "sampled")
+
+    def __init__(self, name: str, trace_id: str, parent_span_id: Optional[str], sampled: bool):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_span_id = parent_span_id
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes: Dict[str, Any] = {}
+        self.status = "ok"
+        self.sampled = sampled
+
+    def set_attribute(self, key: str, value: Any):
+        if self.sampled:
+            self.attributes[key] = value
+
+    @property
+    def traceparent(self) -> str:
+        """W3C traceparent header value for propagating this span"""
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "name": self.name,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "status": self.status,
+            "pid": os.getpid(),
+        }
+
+class _UnsampledSpan(Span):
+    """Shared no-op span used when a trace is not sampled"""
+
+    def __init__(self):
+        super().__init__("unsampled", "0" * 32, None, False)
+
+UNSAMPLED = _UnsampledSpan()
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+class JsonlSpanExporter:
+    """Appends finished spans as JSON lines from a background thread
+
+    The queue is bounded; when the writer falls behind, spans are dropped
+    rather than slowing requests down.
+    """
+
+    def __init__(self, path: str, max_queue: int = 10000):
+        self.path = Path(path)
+        self.queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+
+    def export(self, span: Span):
+        # Started lazily, and again after a fork, so each process has its own writer
+        if self._pid != os.getpid():
+            self._start()
+        try:
+            self.queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self):
+        self._pid = os.getpid()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._thread = threading.Thread(target=self._write_loop, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def _write_loop(self):
+        while True:
+            batch: List[Span] = [self.queue.get()]
+            while len(batch) < 500:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+    def _write(self, batch: List[Span]):
+        try:
+            lines = "".join(json.dumps(span.to_dict(), default=str) + "\n" for span in batch)
+            # One append per batch keeps lines from different workers intact
+            with open(self.path, "a") as f:
+                f.write(lines)
+        except Exception as e:
+            logger.error(f"Error exporting spans: {e}")
+
+    def flush(self, timeout: float = 2.0):
+        """Wait briefly for queued spans to be written"""
+        deadline = time.monotonic() + timeout
+        while not self.queue.empty() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+class Tracer:
+    """Creates spans and tracks the current one through contextvars
+
+    Context follows asyncio tasks automatically; work handed to threads
+    must run in a copy of the caller's context (contextvars.copy_context)
+    or pass the parent span explicitly.
+    """
+
+    def __init__(self, sample_rate: float, exporter: JsonlSpanExporter):
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0
+
+    def current_span(self) -> Span:
+        return _current_span.get() or UNSAMPLED
+
+    def _new_span(self, name: str, parent: Optional[Span], traceparent: Optional[str]) -> Span:
+        if parent is not None:
+            if not parent.sampled:
+                return UNSAMPLED
+            return Span(name, parent.trace_id, parent.span_id, True)
+
+        # Root span: honour an upstream sampling decision, otherwise sample here
+        if traceparent:
+            parts = traceparent.split("-")
+            if len(parts) == 4 and len(parts[1]) == 32 and len(parts[2]) == 16:
+                if parts[3] != "01":
+                    return UNSAMPLED
+                return Span(name, parts[1], parts[2], True)
+
+        if random.random() >= self.sample_rate:
+            return UNSAMPLED
+        return Span(name, f"{random.getrandbits(128):032x}", None, True)
+
+    @contextmanager
+    def span(self, name: str, parent: Optional[Span] = None, traceparent: Optional[str] = None, **attributes):
+        """Run a block inside a new span, a child of the current span by default
+
+        With tracing disabled an incoming traceparent is ignored too, so
+        clients cannot make the server write spans.
+        """
+        if not self.enabled:
+            yield UNSAMPLED
+            return
+
+        span = self._new_span(name, parent if parent is not None else _current_span.get(), traceparent)
+        if not span.sampled:
+            # Children follow the decision instead of sampling new root traces
+            token = _current_span.set(span)
+            try:
+                yield span
+            finally:
+                _current_span.reset(token)
+            return
+
+        span.attributes.update(attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.attributes["exception.type"] = type(e).__name__
+            span.attributes["exception.message"] = str(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end_ns = time.time_ns()
+            self.exporter.export(span)
+
+    def shutdown(self):
+        """Flush spans still waiting to be written"""
+        self.exporter.flush()
+
+# Global tracer
+tracer = Tracer(settings.trace_sample_rate, JsonlSpanExporter(settings.trace_export_path))
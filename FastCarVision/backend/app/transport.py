@@ -0,0 +1,135 @@
+import threading
+import uuid
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Mapping, Optional
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Headers that describe the wire encoding rather than the stored body,
+# which aiohttp has already decompressed and de-chunked
+WIRE_HEADERS = {"content-encoding", "transfer-encoding", "content-length"}
+
+class RecordedResponse:
+    """One recorded marketplace response"""
+
+    __slots__ = ("source", "url", "status", "reason", "headers", "body", "recorded_at")
+
+    def __init__(self, source: str, url: str, status: int, reason: str, headers: Dict[str, str], body: bytes, recorded_at: str):
+        self.source = source
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+        self.recorded_at = recorded_at
+
+def format_record(url: str, status: int, reason: str, headers: Mapping[str, str], body: bytes) -> bytes:
+    """Serialize a response as a WARC/1.0 response record"""
+    http_lines = [f"HTTP/1.1 {status} {reason}"]
+    http_lines.extend(f"{name}: {value}" for name, value in headers.items() if name.lower() not in WIRE_HEADERS)
+    http_lines.append(f"Content-Length: {len(body)}")
+    block = ("\r\n".join(http_lines) + "\r\n\r\n").encode("latin-1", errors="replace") + body
+
+    warc_headers = [
+        "WARC/1.0",
+        "WARC-Type: response",
+        f"WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>",
+        f"WARC-Date: {datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')}",
+        f"WARC-Target-URI: {url}",
+        "Content-Type: application/http; msgtype=response",
+        f"Content-Length: {len(block)}",
+    ]
+    return ("\r\n".join(warc_headers) + "\r\n\r\n").encode("latin-1") + block + b"\r\n\r\n"
+
+def _parse_headers(lines) -> Dict[str, str]:
+    headers = {}
+    for line in lines:
+        name, _, value = line.partition(":")
+        headers[name.strip()] = value.strip()
+    return headers
+
+def read_records(path: Path) -> Iterator[RecordedResponse]:
+    """Response records from an uncompressed WARC file named after its source"""
+    with open(path, "rb") as f:
+        while True:
+            version = f.readline()
+            if not version:
+                return
+            if not version.strip():
+                continue
+
+            lines = []
+            for line in iter(f.readline, b""):
+                if line in (b"\r\n", b"\n"):
+                    break
+                lines.append(line.decode("latin-1").rstrip("\r\n"))
+            warc = _parse_headers(lines)
+            block = f.read(int(warc.get("Content-Length", 0)))
+
+            if warc.get("WARC-Type") != "response":
+                continue
+            head, _, body = block.partition(b"\r\n\r\n")
+            head_lines = head.decode("latin-1").split("\r\n")
+            _, status, reason = (head_lines[0].split(" ", 2) + [""])[:3]
+            yield RecordedResponse(
+                source=path.stem,
+                url=warc.get("WARC-Target-URI", ""),
+                status=int(status),
+                reason=reason,
+                headers=_parse_headers(head_lines[1:]),
+                body=body,
+                recorded_at=warc.get("WARC-Date", "")
+            )
+
+class FixtureStore:
+    """Marketplace responses recorded to WARC files, one file per source
+
+    In record mode every live response is appended; in replay mode pages
+    are served from the store by exact URL, the latest recording winning.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self._index: Optional[Dict[str, RecordedResponse]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        """Whether lookups are answered from memory without reading files"""
+        return self._index is not None
+
+    def record(self, source: str, url: str, status: int, reason: str, headers: Mapping[str, str], body: bytes):
+        """Append a response to the source's WARC file"""
+        record = format_record(url, status, reason, headers, body)
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(self.directory / f"{source}.warc", "ab") as f:
+                f.write(record)
+            if self._index is not None:
+                self._index[url] = RecordedResponse(source, url, status, reason, dict(headers), body, "")
+
+    def load(self) -> Dict[str, RecordedResponse]:
+        """All recorded responses keyed by URL"""
+        with self._lock:
+            if self._index is None:
+                index = {}
+                for path in sorted(self.directory.glob("*.warc")):
+                    for response in read_records(path):
+                        index[response.url] = response
+                self._index = index
+                logger.info(f"Loaded {len(index)} recorded responses from {self.directory}")
+            return self._index
+
+    def get(self, url: str) -> Optional[RecordedResponse]:
+        return self.load().get(url)
+
+    def for_source(self, source: str) -> List[RecordedResponse]:
+        """Recorded responses of one scraper, in URL order"""
+        return sorted((r for r in self.load().values() if r.source == source), key=lambda r: r.url)
+
+# Global fixture store
+fixture_store = FixtureStore(settings.fixture_dir)
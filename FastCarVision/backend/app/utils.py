@@ -0,0 +1,59 @@
+import re
+import hashlib
+from decimal import Decimal
+from typing import Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Query parameters that only track the visit and never identify a listing
+TRACKING_PARAMS = re.compile(
+    r'^(utm_.*|ref|referrer|clicktype|click_type|gclid|fbclid|msclkid|sessionid|'
+    r'searchid|search_id|listingposition|position|page_ref|zip|distance)$',
+    re.IGNORECASE
+)
+
+def canonicalize_url(url: str) -> str:
+    """Normalize a listing URL so the same listing always maps to one key"""
+    parts = urlsplit(url.strip())
+
+    host = parts.hostname or ""
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    path = re.sub(r'/{2,}', '/', parts.path or '/')
+    if len(path) > 1:
+        path = path.rstrip('/')
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=False)
+        if not TRACKING_PARAMS.match(key)
+    )
+
+    return urlunsplit(("https", host.lower(), path, urlencode(query), ""))
+
+def parse_int(text: Optional[str]) -> Optional[int]:
+    """Extract an integer from text such as "$15,999", "50,000 miles" or "1.5K miles"
+
+    A "k" only means thousands as a word of its own, so "12,000 km" is
+    12000. Fractions are kept until after scaling and then truncated.
+    """
+    if not text:
+        return None
+
+    match = re.search(r'(\d[\d,]*)(\.\d+)?\s*([kK]\b)?', text)
+    if not match:
+        return None
+
+    value = Decimal(match.group(1).replace(',', '') + (match.group(2) or ''))
+    if match.group(3):
+        value *= 1000
+    return int(value)
+
+def listing_fingerprint(listing) -> str:
+    """Hash the user-visible content of a listing to detect changes"""
+    content = "\x1f".join(str(value or "") for value in (
+        listing.title, listing.price, listing.mileage,
+        listing.location, listing.dealer, listing.image_url
+    ))
+    return hashlib.blake2b(content.encode(), digest_size=12).hexdigest()
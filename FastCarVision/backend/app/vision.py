@@ -5,15 +5,21 @@ from PIL import Image
 from ultralytics import YOLO
 from typing import List, Tuple, Optional
 import logging
+import time
+import zlib
 from .config import settings
 from .models import CarDetection
+from .store import listing_store
+from .metrics import stage
+from .tracing import tracer
+from .artifacts import ArtifactError, artifact_store, load_clip_safetensors
 
 # Try to import CLIP with fallback
 try:
     import clip
     CLIP_AVAILABLE = True
 except ImportError:
-    print("Warning: CLIP not available. Using placeholder for features.")
+    print("Warning: CLIP not available. Image features will not be extracted.")
     CLIP_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
@@ -32,27 +38,38 @@ class CarVisionModel:
     def load_models(self):
         """Load YOLO and CLIP models"""
         try:
-            # Load YOLO model for car detection
-            self.yolo_model = YOLO(settings.car_detection_model)
-            logger.info(f"YOLO model loaded: {settings.car_detection_model}")
+            # Load YOLO model for car detection, from the staged copy when there is one
+            started = time.perf_counter()
+            artifact = artifact_store.resolve(settings.car_detection_model)
+            self.yolo_model = YOLO(str(artifact["path"]) if artifact else settings.car_detection_model)
+            logger.info(f"YOLO model loaded: {settings.car_detection_model} ({time.perf_counter() - started:.2f}s)")
             
             # Load CLIP model for feature extraction if available
             if CLIP_AVAILABLE:
                 try:
-                    self.clip_model, self.clip_preprocess = clip.load(
-                        settings.clip_model, device=self.device
-                    )
-                    logger.info(f"CLIP model loaded: {settings.clip_model}")
+                    started = time.perf_counter()
+                    self.clip_model, self.clip_preprocess = self._load_clip()
+                    logger.info(f"CLIP model loaded: {settings.clip_model} ({time.perf_counter() - started:.2f}s)")
+                except ArtifactError:
+                    raise
                 except Exception as e:
                     logger.warning(f"Could not load CLIP model: {e}")
                     self.clip_model = None
             else:
-                logger.warning("CLIP not available, features will be placeholder")
+                logger.warning("CLIP not available, image features will not be extracted")
             
         except Exception as e:
             logger.error(f"Error loading models: {e}")
             raise
     
+    def _load_clip(self):
+        artifact = artifact_store.resolve(settings.clip_model)
+        if artifact is None:
+            return clip.load(settings.clip_model, device=self.device)
+        if artifact["format"] == "safetensors":
+            return load_clip_safetensors(artifact["path"], self.device)
+        return clip.load(str(artifact["path"]), device=self.device)
+    
     def preprocess_image(self, image: Image.Image) -> Image.Image:
         """Preprocess image for detection"""
         # Resize if too large
@@ -97,26 +114,34 @@ class CarVisionModel:
             logger.error(f"Error in car detection: {e}")
             return []
     
-    def extract_clip_features(self, image: Image.Image) -> np.ndarray:
-        """Extract CLIP features from image"""
+    def extract_clip_features(self, image: Image.Image) -> Optional[np.ndarray]:
+        """Extract CLIP features from image, or None if CLIP is unavailable"""
+        return self.extract_clip_features_batch([image])[0]
+    
+    def extract_clip_features_batch(self, images: List[Image.Image]) -> List[Optional[np.ndarray]]:
+        """Extract CLIP features for several images in one forward pass
+        
+        Returns None for every image when CLIP is not loaded or fails, so
+        callers never mistake placeholder vectors for embeddings.
+        """
         if not self.clip_model:
-            logger.warning("CLIP model not available, returning placeholder features")
-            return np.random.rand(512)  # Placeholder features
+            logger.warning("CLIP model not available, no features extracted")
+            return [None] * len(images)
         
         try:
-            # Preprocess image for CLIP
-            image_tensor = self.clip_preprocess(image).unsqueeze(0).to(self.device)
+            # Preprocess images for CLIP
+            image_tensor = torch.stack([self.clip_preprocess(image) for image in images]).to(self.device)
             
             # Extract features
             with torch.no_grad():
                 features = self.clip_model.encode_image(image_tensor)
                 features = features / features.norm(dim=-1, keepdim=True)  # Normalize
             
-            return features.cpu().numpy().flatten()
+            return list(features.cpu().numpy())
         
         except Exception as e:
             logger.error(f"Error extracting CLIP features: {e}")
-            return np.random.rand(512)  # Fallback features
+            return [None] * len(images)
     
     def classify_car_attributes(self, image: Image.Image, detection_box: Optional[List[float]] = None) -> dict:
         """Extract car attributes like make, model, color using CLIP and heuristics"""
@@ -182,19 +207,41 @@ class CarVisionModel:
     
     def process_image(self, image: Image.Image) -> List[CarDetection]:
         """Complete image processing pipeline"""
+        # Pixel data is decoded lazily; do it up front so it is timed on its own
+        with stage("decode"):
+            image.load()
+        
         # Preprocess image
-        processed_image = self.preprocess_image(image)
+        with stage("preprocess"), tracer.span("preprocess_image", width=image.width, height=image.height):
+            processed_image = self.preprocess_image(image)
         
         # Detect cars
-        detections = self.detect_cars(processed_image)
+        with stage("yolo"), tracer.span("detect_cars") as span:
+            detections = self.detect_cars(processed_image)
+            span.set_attribute("detections", len(detections))
+        
+        with stage("attributes"):
+            car_results, crops = self._classify_detections(processed_image, detections)
+        
+        if settings.record_detections:
+            self.record_detections(car_results, crops)
+        
+        return car_results
+    
+    def _classify_detections(self, processed_image: Image.Image, detections: List[dict]) -> Tuple[List[CarDetection], List[Image.Image]]:
+        """Attributes for each detection, or for the whole image if nothing was detected
         
+        Also returns the image each result was classified from, so later
+        stages reuse the crops instead of cutting them again.
+        """
         car_results = []
+        crops = []
         for detection in detections:
+            box = detection.get('bbox')
+            crop = processed_image.crop(tuple(int(coord) for coord in box)) if box else processed_image
             # Extract attributes for each detected car
-            attributes = self.classify_car_attributes(
-                processed_image, 
-                detection.get('bbox')
-            )
+            with tracer.span("classify_car_attributes", bbox=box):
+                attributes = self.classify_car_attributes(crop)
             
             car_result = CarDetection(
                 make=attributes['make'],
@@ -205,11 +252,13 @@ class CarVisionModel:
                 color=attributes['color']
             )
             car_results.append(car_result)
+            crops.append(crop)
         
         # If no cars detected, return a default detection
         if not car_results:
             # Try to classify the whole image as a car
-            attributes = self.classify_car_attributes(processed_image)
+            with tracer.span("classify_car_attributes", bbox=None):
+                attributes = self.classify_car_attributes(processed_image)
             car_results.append(
                 CarDetection(
                     make=attributes['make'],
@@ -220,13 +269,75 @@ class CarVisionModel:
                     color=attributes['color']
                 )
             )
+            crops.append(processed_image)
         
-        return car_results
+        return car_results, crops
+    
+    def record_detections(self, car_results: List[CarDetection], crops: List[Image.Image]):
+        """Store detections with a CLIP embedding of each crop for bulk export
+        
+        All crops are embedded in one batch; without CLIP the embeddings
+        are stored as NULL.
+        """
+        try:
+            with stage("clip"):
+                embeddings = self.extract_clip_features_batch(crops)
+            listing_store.record_detections(car_results, embeddings)
+        except Exception as e:
+            logger.error(f"Error recording detections: {e}")
+
+class StubVisionModel:
+    """Deterministic stand-in for the vision pipeline, for benchmarks and load tests
+
+    The same image always yields the same detection, chosen from a small
+    catalogue by a hash of a downscaled copy; an optional sleep stands in
+    for inference time.
+    """
+    
+    CATALOGUE = [
+        ("Toyota", "Camry", 2020, "sedan", "white"),
+        ("Honda", "Civic", 2019, "sedan", "black"),
+        ("Ford", "F-150", 2021, "truck", "blue"),
+        ("Tesla", "Model 3", 2022, "sedan", "red"),
+        ("BMW", "X5", 2018, "suv", "gray"),
+    ]
+    
+    def __init__(self):
+        self.yolo_model = None
+        self.clip_model = None
+    
+    def process_image(self, image: Image.Image) -> List[CarDetection]:
+        with stage("decode"):
+            image.load()
+        
+        with stage("preprocess"), tracer.span("preprocess_image", width=image.width, height=image.height):
+            fingerprint = zlib.crc32(image.convert("L").resize((8, 8)).tobytes())
+        
+        with stage("yolo"), tracer.span("detect_cars", detections=1):
+            if settings.vision_stub_latency > 0:
+                time.sleep(settings.vision_stub_latency)
+        
+        make, model, year, body_type, color = self.CATALOGUE[fingerprint % len(self.CATALOGUE)]
+        return [CarDetection(
+            make=make,
+            model=model,
+            year=year,
+            body_type=body_type,
+            confidence=0.9,
+            color=color
+        )]
 
 # Initialize model when imported, with error handling
 try:
-    vision_model = CarVisionModel()
-    logger.info("Vision model initialized successfully")
+    if settings.vision_stub:
+        vision_model = StubVisionModel()
+        logger.info("Using stub vision model (VISION_STUB is set)")
+    else:
+        vision_model = CarVisionModel()
+        logger.info("Vision model initialized successfully")
+except ArtifactError:
+    # Missing or corrupt weights must stop the server, not fall back to the dummy model
+    raise
 except Exception as e:
     logger.error(f"Failed to initialize vision model: {e}")
     # Create a dummy model that will work for basic testing
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+FastCarVision Response Encoding Benchmark
+
+Compares the per-response cost of FastAPI's default serialization path
+(response_model re-validation + jsonable_encoder + json) with the direct
+orjson and MessagePack encoders used by the search endpoints.
+
+Usage: python benchmarks/bench_encoding.py [--responses 2000] [--listings 20]
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(backend_dir))
+
+from fastapi.encoders import jsonable_encoder
+
+from app.models import CarListing, SearchResults
+from app.responses import encode_json, encode_msgpack, ORJSON_AVAILABLE, MSGPACK_AVAILABLE
+
+def build_results(listing_count: int, seed: int = 1505) -> SearchResults:
+    """A realistic SearchResults payload"""
+    rng = random.Random(seed)
+    listings = []
+    for i in range(listing_count):
+        price = rng.randint(8000, 60000)
+        mileage = rng.randint(1000, 150000)
+        listings.append(CarListing(
+            title=f"{rng.randint(2012, 2024)} Toyota Camry SE",
+            price=f"${price:,}",
+            price_value=price,
+            year=rng.randint(2012, 2024),
+            make="Toyota",
+            model="Camry",
+            trim="SE",
+            mileage=f"{mileage:,} miles",
+            mileage_value=mileage,
+            location="Austin, TX",
+            dealer="Example Motors",
+            image_url=f"https://images.example.com/{i}.jpg",
+            listing_url=f"https://www.example.com/listing/{i}",
+            source="autotrader"
+        ))
+    return SearchResults.construct(
+        query="Toyota Camry",
+        total_results=len(listings),
+        listings=listings,
+        processing_time=1.23,
+        sources_used=["autotrader"]
+    )
+
+def default_path(results: SearchResults) -> bytes:
+    """What FastAPI does with a returned model and a response_model"""
+    validated = SearchResults.validate(results)
+    return json.dumps(jsonable_encoder(validated)).encode("utf-8")
+
+def measure(name: str, encode, results: SearchResults, count: int, baseline: float = None) -> float:
+    """Time `count` encodes and print the per-response cost"""
+    size = len(encode(results))
+    start = time.perf_counter()
+    for _ in range(count):
+        encode(results)
+    per_response = (time.perf_counter() - start) / count
+    speedup = f"  ({baseline / per_response:.1f}x)" if baseline else ""
+    print(f"{name:<28} {per_response * 1e6:8.1f} µs/response  {size:6d} bytes{speedup}")
+    return per_response
+
+def main():
+    """Run the encoding benchmark"""
+    parser = argparse.ArgumentParser(description="Benchmark response encoding")
+    parser.add_argument("--responses", type=int, default=2000)
+    parser.add_argument("--listings", type=int, default=20)
+    args = parser.parse_args()
+
+    print("🚗 FastCarVision Response Encoding Benchmark")
+    print("=" * 50)
+    print(f"Listings per response: {args.listings}")
+    print(f"orjson: {'yes' if ORJSON_AVAILABLE else 'no (stdlib json fallback)'}")
+    print(f"msgpack: {'yes' if MSGPACK_AVAILABLE else 'no'}")
+    print()
+
+    results = build_results(args.listings)
+
+    baseline = measure("FastAPI default", default_path, results, args.responses)
+    measure("Direct JSON", encode_json, results, args.responses, baseline)
+    if MSGPACK_AVAILABLE:
+        measure("Direct MessagePack", encode_msgpack, results, args.responses, baseline)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+FastCarVision Load Test
+
+Starts the real backend (app.main:app) with the deterministic stub vision
+model, points its scrapers at a local fake marketplace, and drives
+/upload-image, /search-cars and /process-and-search at a fixed request
+rate. Reports throughput, p50/p95/p99 latency and error rate per endpoint
+and saves the run as JSON so results can be compared over time.
+
+Requests are sent open-loop on a fixed schedule, and latency is measured
+from the scheduled send time, so a stalled server shows up as latency
+instead of silently lowering the offered load.
+
+Usage: python benchmarks/bench_load.py [--rps 20] [--duration 30] [--endpoints upload-image,search-cars]
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import aiohttp
+from PIL import Image
+
+BENCH_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = BENCH_DIR.parent / "backend"
+ENDPOINTS = ["upload-image", "search-cars", "process-and-search"]
+COLORS = [(200, 30, 30), (30, 30, 200), (240, 240, 240), (20, 20, 20), (120, 120, 120), (30, 160, 60)]
+SEARCHES = [
+    {"make": "Toyota", "model": "Camry", "year": 2020, "confidence": 0.9},
+    {"make": "Honda", "model": "Civic", "year": 2019, "confidence": 0.9},
+    {"make": "Ford", "model": "F-150", "year": 2021, "confidence": 0.9},
+    {"make": "Tesla", "model": "Model 3", "year": 2022, "confidence": 0.9},
+]
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def build_images(size: int) -> List[bytes]:
+    """A few distinct JPEGs, so the stub model returns a mix of detections"""
+    images = []
+    for color in COLORS:
+        image = Image.new("RGB", (size, size * 3 // 4), color)
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=85)
+        images.append(buffer.getvalue())
+    return images
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+async def wait_until_up(url: str, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(url) as response:
+                    if response.status < 500:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+def start_servers(args, workdir: str):
+    """Launch the fake marketplace and the backend as separate processes"""
+    market_port = free_port()
+    market = subprocess.Popen([
+        sys.executable, str(BENCH_DIR / "fake_marketplace.py"),
+        "--port", str(market_port),
+        "--latency-ms", str(args.market_latency_ms),
+        "--jitter-ms", str(args.market_jitter_ms),
+        "--error-rate", str(args.market_error_rate),
+        "--listings", str(args.market_listings),
+        "--page-kb", str(args.market_page_kb),
+        "--markup", args.market_markup,
+    ])
+
+    backend_port = free_port()
+    market_url = f"http://127.0.0.1:{market_port}"
+    env = dict(
+        os.environ,
+        VISION_STUB="true",
+        VISION_STUB_LATENCY=str(args.vision_latency_ms / 1000),
+        AUTOTRADER_BASE_URL=market_url,
+        CARS_COM_BASE_URL=market_url,
+        SEARCH_MODE="live",
+        WARM_CRAWLER_ENABLED="false",
+        LISTING_STORE_PATH=os.path.join(workdir, "listings.db"),
+        JOB_STORE_PATH=os.path.join(workdir, "jobs.db"),
+        SAVED_SEARCH_PATH=os.path.join(workdir, "saved_searches.db"),
+    )
+    backend = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app",
+         "--host", "127.0.0.1", "--port", str(backend_port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env
+    )
+    return market, f"{market_url}/_stats", backend, f"http://127.0.0.1:{backend_port}"
+
+async def send(session: aiohttp.ClientSession, base_url: str, endpoint: str, index: int, images: List[bytes]) -> int:
+    """Issue one request and return its HTTP status"""
+    if endpoint == "search-cars":
+        payload = SEARCHES[index % len(SEARCHES)]
+        async with session.post(f"{base_url}/search-cars", json=payload) as response:
+            await response.read()
+            return response.status
+
+    form = aiohttp.FormData()
+    form.add_field("file", images[index % len(images)], filename=f"car{index}.jpg", content_type="image/jpeg")
+    async with session.post(f"{base_url}/{endpoint}", data=form) as response:
+        await response.read()
+        return response.status
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+async def run_endpoint(base_url: str, endpoint: str, rps: float, duration: float, images: List[bytes], timeout: float) -> Dict:
+    """Drive one endpoint open-loop at a fixed rate"""
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    total = int(rps * duration)
+
+    connector = aiohttp.TCPConnector(limit=0)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout) as session:
+        start = time.perf_counter()
+
+        async def one(index: int):
+            scheduled = start + index / rps
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                status = await send(session, base_url, endpoint, index, images)
+                statuses[str(status)] += 1
+                if status < 400:
+                    latencies.append(time.perf_counter() - scheduled)
+            except asyncio.TimeoutError:
+                statuses["timeout"] += 1
+            except aiohttp.ClientError as e:
+                statuses[type(e).__name__] += 1
+
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - start
+
+    successes = len(latencies)
+    return {
+        "requests": total,
+        "successes": successes,
+        "elapsed": round(elapsed, 3),
+        "offered_rps": rps,
+        "throughput_rps": round(successes / elapsed, 2) if elapsed else 0.0,
+        "error_rate": round(1 - successes / total, 4) if total else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 2),
+            "p95": round(percentile(latencies, 95) * 1000, 2),
+            "p99": round(percentile(latencies, 99) * 1000, 2),
+            "max": round(max(latencies) * 1000, 2) if latencies else 0.0,
+        },
+        "statuses": dict(statuses),
+    }
+
+async def run(args) -> Dict:
+    endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    unknown = set(endpoints) - set(ENDPOINTS)
+    if unknown:
+        raise SystemExit(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+
+    images = build_images(args.image_size)
+    with tempfile.TemporaryDirectory() as workdir:
+        market, market_stats_url, backend, base_url = start_servers(args, workdir)
+        try:
+            await wait_until_up(market_stats_url)
+            await wait_until_up(f"{base_url}/")
+            print(f"🚀 Backend at {base_url}, fake marketplace at {market_stats_url.rsplit('/', 1)[0]}")
+
+            results = {}
+            for endpoint in endpoints:
+                if args.warmup > 0:
+                    await run_endpoint(base_url, endpoint, args.rps, args.warmup, images, args.timeout)
+                print(f"⏱️  /{endpoint}: {args.rps:g} req/s for {args.duration:g}s")
+                results[endpoint] = await run_endpoint(base_url, endpoint, args.rps, args.duration, images, args.timeout)
+
+            async with aiohttp.ClientSession() as session:
+                async with session.get(market_stats_url) as response:
+                    market_stats = await response.json()
+        finally:
+            backend.terminate()
+            market.terminate()
+            backend.wait()
+            market.wait()
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "label": args.label,
+        "commit": git_commit(),
+        "config": {
+            "rps": args.rps,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "image_size": args.image_size,
+            "vision_latency_ms": args.vision_latency_ms,
+            "market_latency_ms": args.market_latency_ms,
+            "market_jitter_ms": args.market_jitter_ms,
+            "market_error_rate": args.market_error_rate,
+            "market_listings": args.market_listings,
+            "market_page_kb": args.market_page_kb,
+            "market_markup": args.market_markup,
+        },
+        "marketplace": market_stats,
+        "results": results,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the FastCarVision API against a fake marketplace")
+    parser.add_argument("--rps", type=float, default=20.0, help="Requests per second offered to each endpoint")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of measured load per endpoint")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Seconds of unmeasured load before each endpoint")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS))
+    parser.add_argument("--timeout", type=float, default=30.0, help="Client timeout per request")
+    parser.add_argument("--image-size", type=int, default=1024, help="Width of the uploaded test images")
+    parser.add_argument("--vision-latency-ms", type=float, default=30.0, help="Simulated inference time per image")
+    parser.add_argument("--market-latency-ms", type=float, default=80.0)
+    parser.add_argument("--market-jitter-ms", type=float, default=40.0)
+    parser.add_argument("--market-error-rate", type=float, default=0.02)
+    parser.add_argument("--market-listings", type=int, default=25)
+    parser.add_argument("--market-page-kb", type=int, default=200)
+    parser.add_argument("--market-markup", choices=["html", "jsonld"], default="html")
+    parser.add_argument("--label", default="", help="Free-form note stored with the results")
+    parser.add_argument("--output", type=Path, help="Results file (default: benchmarks/results/load_<timestamp>.json)")
+    args = parser.parse_args()
+
+    print("🚗 FastCarVision Load Test")
+    print("=" * 40)
+    report = asyncio.run(run(args))
+
+    print(f"\n{'endpoint':<20} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'errors':>8}")
+    for endpoint, result in report["results"].items():
+        latency = result["latency_ms"]
+        print(f"{endpoint:<20} {result['throughput_rps']:>8.1f} {latency['p50']:>7.1f}ms "
+              f"{latency['p95']:>7.1f}ms {latency['p99']:>7.1f}ms {result['error_rate']:>8.1%}")
+
+    output = args.output or BENCH_DIR / "results" / f"load_{datetime.now():%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\n💾 Results saved to {output}")
+
+if __name__ == "__main__":
+    main()
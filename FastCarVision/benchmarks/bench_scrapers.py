@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+FastCarVision Scraper Benchmark
+
+Records marketplace result pages to WARC fixtures once, then measures
+pages/sec and listings/sec per scraper on that corpus, offline and
+repeatably: cold parsing, parsing with a warm element cache, and the
+full get_page + parse path through the replay transport.
+
+Usage: python benchmarks/bench_scrapers.py record [--queries "Toyota Camry 2020,Honda Civic"]
+       python benchmarks/bench_scrapers.py run [--repeats 5] [--latency-ms 50] [--concurrency 8]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(backend_dir))
+
+DEFAULT_QUERIES = "Toyota Camry 2020,Honda Civic 2019,Ford F-150 2021,Tesla Model 3,BMW X5 2018,Chevrolet Silverado"
+
+def parse_query(query: str):
+    """'Toyota Camry 2020' -> CarDetection"""
+    from app.models import CarDetection
+
+    parts = query.split()
+    year = int(parts[-1]) if parts and parts[-1].isdigit() else None
+    if year:
+        parts = parts[:-1]
+    return CarDetection(make=parts[0], model=" ".join(parts[1:]) or "Unknown", year=year, confidence=1.0)
+
+def build_scrapers():
+    from app.scrapers import AutoTraderScraper, CarsComScraper
+    return [AutoTraderScraper(), CarsComScraper()]
+
+async def record(args):
+    """Fetch live result pages for each query and append them to the fixtures"""
+    import aiohttp
+    from app.config import settings
+
+    detections = [parse_query(q.strip()) for q in args.queries.split(",") if q.strip()]
+    timeout = aiohttp.ClientTimeout(total=settings.request_timeout)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        for scraper in build_scrapers():
+            for detection in detections:
+                listings = await scraper.scrape_listings(session, detection)
+                print(f"   {scraper.source:<12} {detection.make} {detection.model}: {len(listings)} listings")
+
+    print(f"\n💾 Fixtures written to {settings.fixture_dir}")
+
+def rate(count: int, seconds: float) -> float:
+    return round(count / seconds, 1) if seconds > 0 else 0.0
+
+def bench_parse(scraper, pages: List[bytes], repeats: int, warm: bool) -> Dict:
+    """Parse every page repeatedly; cold runs clear the element cache first"""
+    timings = []
+    listings = 0
+    if warm:
+        for page in pages:
+            scraper.parse_results(page)
+
+    for _ in range(repeats):
+        if not warm:
+            scraper._parse_cache.clear()
+        start = time.perf_counter()
+        listings = sum(len(scraper.parse_results(page)) for page in pages)
+        timings.append(time.perf_counter() - start)
+
+    median = statistics.median(timings)
+    megabytes = sum(len(page) for page in pages) / (1024 * 1024)
+    return {
+        "seconds_median": round(median, 4),
+        "pages_per_sec": rate(len(pages), median),
+        "listings_per_sec": rate(listings, median),
+        "mb_per_sec": round(megabytes / median, 2) if median > 0 else 0.0,
+        "listings_per_pass": listings,
+    }
+
+async def bench_replay(scraper, urls: List[str], repeats: int, concurrency: int) -> Dict:
+    """Fetch through get_page in replay mode and parse, with bounded concurrency"""
+    import aiohttp
+
+    semaphore = asyncio.Semaphore(concurrency)
+    timings = []
+    listings = 0
+
+    async def one(session, url: str) -> int:
+        async with semaphore:
+            page = await scraper.get_page(session, url)
+            return len(scraper.parse_results(page)) if page else 0
+
+    async with aiohttp.ClientSession() as session:
+        for _ in range(repeats):
+            scraper._parse_cache.clear()
+            start = time.perf_counter()
+            listings = sum(await asyncio.gather(*(one(session, url) for url in urls)))
+            timings.append(time.perf_counter() - start)
+
+    median = statistics.median(timings)
+    return {
+        "seconds_median": round(median, 4),
+        "pages_per_sec": rate(len(urls), median),
+        "listings_per_sec": rate(listings, median),
+    }
+
+async def run(args) -> Dict:
+    from app.config import settings
+    from app.transport import fixture_store
+
+    results = {}
+    for scraper in build_scrapers():
+        recorded = [r for r in fixture_store.for_source(scraper.source) if r.status == 200]
+        if not recorded:
+            print(f"⚠️  No recorded pages for {scraper.source} in {settings.fixture_dir}; run 'record' first")
+            continue
+
+        pages = [r.body for r in recorded]
+        print(f"\n🔍 {scraper.source}: {len(pages)} pages, {sum(map(len, pages)) / 1024:.0f} KB")
+        results[scraper.source] = {
+            "pages": len(pages),
+            "parse_cold": bench_parse(scraper, pages, args.repeats, warm=False),
+            "parse_warm_cache": bench_parse(scraper, pages, args.repeats, warm=True),
+            "replay": await bench_replay(scraper, [r.url for r in recorded], args.repeats, args.concurrency),
+        }
+        for name in ("parse_cold", "parse_warm_cache", "replay"):
+            result = results[scraper.source][name]
+            print(f"   {name:<18} {result['pages_per_sec']:>9.1f} pages/s {result['listings_per_sec']:>10.1f} listings/s")
+
+    return {
+        "repeats": args.repeats,
+        "replay_latency_ms": args.latency_ms,
+        "concurrency": args.concurrency,
+        "results": results,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Record marketplace fixtures and benchmark the scrapers on them")
+    parser.add_argument("--fixture-dir", help="Fixture directory (default: FIXTURE_DIR setting)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="Record live result pages")
+    record_parser.add_argument("--queries", default=DEFAULT_QUERIES, help="Comma-separated 'Make Model [Year]' list")
+
+    run_parser = commands.add_parser("run", help="Benchmark on recorded pages")
+    run_parser.add_argument("--repeats", type=int, default=5)
+    run_parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated latency per replayed page")
+    run_parser.add_argument("--concurrency", type=int, default=8, help="Concurrent replayed fetches")
+    run_parser.add_argument("--output", type=Path, help="Write results as JSON")
+    args = parser.parse_args()
+
+    # Settings are read at import, so choose the transport before importing the app
+    os.environ["SCRAPER_TRANSPORT"] = "record" if args.command == "record" else "replay"
+    if args.command == "run":
+        os.environ["REPLAY_LATENCY"] = str(args.latency_ms / 1000)
+    if args.fixture_dir:
+        os.environ["FIXTURE_DIR"] = args.fixture_dir
+
+    print("🚗 FastCarVision Scraper Benchmark")
+    print("=" * 40)
+
+    if args.command == "record":
+        asyncio.run(record(args))
+        return
+
+    report = asyncio.run(run(args))
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"\n💾 Results saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
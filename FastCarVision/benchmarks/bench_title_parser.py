@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+FastCarVision Title Parser Benchmark
+
+Measures make/model/year/trim extraction throughput of the shared title
+parser on a synthetic corpus of listing titles.
+
+Usage: python benchmarks/bench_title_parser.py [--titles 100000] [--page-size 25]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(backend_dir))
+
+from app.title_parser import TitleParser, VOCABULARY, TRIMS
+
+PREFIXES = ["", "", "Used", "Certified", "Pre-Owned", "New"]
+SUFFIXES = ["", "", "AWD", "4WD", "w/ Navigation", "1-Owner", "Clean Title"]
+
+def build_corpus(count: int, seed: int = 1505) -> list:
+    """Generate realistic-looking listing titles"""
+    rng = random.Random(seed)
+    makes = list(VOCABULARY)
+    titles = []
+    for _ in range(count):
+        make = rng.choice(makes)
+        parts = [
+            rng.choice(PREFIXES),
+            str(rng.randint(2005, 2024)),
+            make,
+            rng.choice(VOCABULARY[make]),
+            rng.choice(TRIMS),
+            rng.choice(SUFFIXES),
+        ]
+        titles.append(" ".join(p for p in parts if p))
+    return titles
+
+def main():
+    """Run the title parser benchmark"""
+    parser = argparse.ArgumentParser(description="Benchmark listing title parsing")
+    parser.add_argument("--titles", type=int, default=100000)
+    parser.add_argument("--page-size", type=int, default=25)
+    args = parser.parse_args()
+
+    print("🚗 FastCarVision Title Parser Benchmark")
+    print("=" * 50)
+
+    start = time.perf_counter()
+    title_parser = TitleParser()
+    compile_time = time.perf_counter() - start
+    print(f"Vocabulary compile time: {compile_time * 1000:.1f} ms")
+
+    titles = build_corpus(args.titles)
+
+    start = time.perf_counter()
+    parsed = [title_parser.parse(title) for title in titles]
+    single_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(0, len(titles), args.page_size):
+        title_parser.parse_batch(titles[i:i + args.page_size])
+    batch_time = time.perf_counter() - start
+
+    matched = sum(1 for p in parsed if p.make and p.model)
+    print(f"Titles:           {len(titles)}")
+    print(f"Make+model found: {matched / len(titles):.1%}")
+    print(f"Single parse:     {len(titles) / single_time:,.0f} titles/s")
+    print(f"Page batches:     {len(titles) / batch_time:,.0f} titles/s (page size {args.page_size})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+FastCarVision Vision Pipeline Benchmark
+
+Times each CarVisionModel stage on its own (preprocess_image, detect_cars,
+extract_clip_features, classify_car_attributes, _get_dominant_color) over
+synthetic images at several resolutions, plus any sample photos placed in
+benchmarks/images/. Reports per-stage latency distributions, images/sec,
+peak RSS and model load time, and can compare against a stored baseline
+to flag regressions.
+
+Usage: python benchmarks/bench_vision.py [--repeats 20] [--resolutions 640x480,1920x1080]
+       python benchmarks/bench_vision.py --save-baseline
+       python benchmarks/bench_vision.py --compare --threshold 0.15
+"""
+
+import argparse
+import json
+import random
+import resource
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+
+# Add the backend directory to Python path
+BENCH_DIR = Path(__file__).resolve().parent
+backend_dir = BENCH_DIR.parent / "backend"
+sys.path.insert(0, str(backend_dir))
+
+SAMPLE_DIR = BENCH_DIR / "images"
+DEFAULT_BASELINE = BENCH_DIR / "baselines" / "vision.json"
+DEFAULT_RESOLUTIONS = "640x480,1280x960,1920x1080,4032x3024"
+STAGES = ["preprocess_image", "detect_cars", "extract_clip_features", "classify_car_attributes", "_get_dominant_color"]
+BODY_COLORS = [(200, 30, 30), (240, 240, 240), (25, 25, 25), (40, 70, 160), (130, 130, 130)]
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def synthetic_car(width: int, height: int, seed: int) -> Image.Image:
+    """A street-scene-like image: sky/road gradient, a car-shaped body, wheels and noise"""
+    rng = random.Random(seed)
+    sky = np.linspace(200, 120, height // 2)[:, None].repeat(width, axis=1)
+    road = np.linspace(90, 60, height - height // 2)[:, None].repeat(width, axis=1)
+    base = np.concatenate([sky, road]).astype(np.uint8)
+    image = Image.fromarray(np.stack([base, base, np.clip(base.astype(int) + 20, 0, 255).astype(np.uint8)], axis=-1))
+
+    draw = ImageDraw.Draw(image)
+    color = rng.choice(BODY_COLORS)
+    left, right = int(width * 0.15), int(width * 0.85)
+    top, bottom = int(height * 0.45), int(height * 0.75)
+    draw.rectangle([left, top, right, bottom], fill=color)
+    draw.polygon([(int(width * 0.3), top), (int(width * 0.4), int(height * 0.3)),
+                  (int(width * 0.65), int(height * 0.3)), (int(width * 0.75), top)], fill=color)
+    wheel = int(height * 0.08)
+    for x in (int(width * 0.28), int(width * 0.72)):
+        draw.ellipse([x - wheel, bottom - wheel, x + wheel, bottom + wheel], fill=(15, 15, 15))
+
+    noise = np.random.default_rng(seed).integers(-12, 12, (height, width, 3))
+    pixels = np.clip(np.asarray(image).astype(int) + noise, 0, 255).astype(np.uint8)
+    return Image.fromarray(pixels).filter(ImageFilter.SMOOTH)
+
+def build_image_set(resolutions: List[Tuple[int, int]]) -> Dict[str, Image.Image]:
+    """Synthetic images per resolution plus sample photos, keyed by label"""
+    images = {}
+    for i, (width, height) in enumerate(resolutions):
+        images[f"synthetic_{width}x{height}"] = synthetic_car(width, height, seed=1505 + i)
+
+    if SAMPLE_DIR.is_dir():
+        for path in sorted(SAMPLE_DIR.iterdir()):
+            if path.suffix.lower() in (".jpg", ".jpeg", ".png", ".bmp"):
+                with Image.open(path) as image:
+                    images[f"sample_{path.stem}"] = image.convert("RGB")
+    return images
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    mean = statistics.mean(ordered)
+    return {
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+        "mean_ms": round(mean * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+        "stdev_ms": round(statistics.pstdev(ordered) * 1000, 3),
+        "images_per_sec": round(1 / mean, 2) if mean > 0 else None,
+    }
+
+def time_stage(func: Callable, make_input: Callable, repeats: int, warmup: int) -> List[float]:
+    """Time func on fresh inputs; building the input is not timed"""
+    samples = []
+    for i in range(warmup + repeats):
+        argument = make_input()
+        start = time.perf_counter()
+        func(argument)
+        elapsed = time.perf_counter() - start
+        if i >= warmup:
+            samples.append(elapsed)
+    return samples
+
+def run(args) -> Dict:
+    from app.vision import CarVisionModel
+
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    model = CarVisionModel()
+    load_time = time.perf_counter() - start
+    rss_after_load = peak_rss_mb()
+    print(f"📦 Models loaded in {load_time:.2f}s (peak RSS {rss_after_load:.0f} MB, "
+          f"YOLO={'yes' if model.yolo_model else 'no'}, CLIP={'yes' if model.clip_model else 'placeholder'})")
+
+    resolutions = [tuple(int(v) for v in r.split("x")) for r in args.resolutions.split(",") if r]
+    images = build_image_set(resolutions)
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+
+    results: Dict[str, Dict[str, Dict]] = {}
+    for label, image in images.items():
+        # Every stage after preprocessing sees what the pipeline would give it
+        processed = model.preprocess_image(image.copy())
+        pixels = np.array(processed)
+        runners = {
+            "preprocess_image": (model.preprocess_image, image.copy),
+            "detect_cars": (model.detect_cars, lambda: processed),
+            "extract_clip_features": (model.extract_clip_features, lambda: processed),
+            "classify_car_attributes": (model.classify_car_attributes, lambda: processed),
+            "_get_dominant_color": (model._get_dominant_color, lambda: pixels),
+        }
+
+        results[label] = {}
+        print(f"\n🖼️  {label} ({image.width}x{image.height})")
+        for stage in stages:
+            func, make_input = runners[stage]
+            summary = summarize(time_stage(func, make_input, args.repeats, args.warmup))
+            results[label][stage] = summary
+            print(f"   {stage:<26} p50 {summary['p50_ms']:>9.2f} ms   p95 {summary['p95_ms']:>9.2f} ms   "
+                  f"{summary['images_per_sec'] or 0:>8.1f} img/s")
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "repeats": args.repeats,
+        "model_load_seconds": round(load_time, 3),
+        "peak_rss_mb": {
+            "before_load": round(rss_before, 1),
+            "after_load": round(rss_after_load, 1),
+            "end": round(peak_rss_mb(), 1),
+        },
+        "models": {"yolo": model.yolo_model is not None, "clip": model.clip_model is not None},
+        "results": results,
+    }
+
+def compare(report: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Stages whose median is slower than the baseline by more than threshold"""
+    regressions = []
+    for label, stages in report["results"].items():
+        for stage, summary in stages.items():
+            reference = baseline.get("results", {}).get(label, {}).get(stage)
+            if not reference or not reference["p50_ms"]:
+                continue
+            change = summary["p50_ms"] / reference["p50_ms"] - 1
+            if change > threshold:
+                regressions.append(f"{label} {stage}: {reference['p50_ms']:.2f} -> {summary['p50_ms']:.2f} ms (+{change:.0%})")
+
+    reference_load = baseline.get("model_load_seconds")
+    if reference_load:
+        change = report["model_load_seconds"] / reference_load - 1
+        if change > threshold:
+            regressions.append(f"model load: {reference_load:.2f} -> {report['model_load_seconds']:.2f} s (+{change:.0%})")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the vision pipeline stage by stage")
+    parser.add_argument("--repeats", type=int, default=20, help="Timed runs per stage and image")
+    parser.add_argument("--warmup", type=int, default=2, help="Untimed runs before measuring")
+    parser.add_argument("--resolutions", default=DEFAULT_RESOLUTIONS, help="Comma-separated WxH list")
+    parser.add_argument("--stages", default=",".join(STAGES), help="Comma-separated subset of stages")
+    parser.add_argument("--output", type=Path, help="Write the full report as JSON")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="Baseline file for --save-baseline/--compare")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline")
+    parser.add_argument("--compare", action="store_true", help="Fail if any stage is slower than the baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown before flagging (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    unknown = set(s.strip() for s in args.stages.split(",") if s.strip()) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    print("🚗 FastCarVision Vision Benchmark")
+    print("=" * 40)
+    report = run(args)
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"\n💾 Report saved to {args.output}")
+
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(report, indent=2))
+        print(f"\n💾 Baseline saved to {args.baseline}")
+
+    if args.compare:
+        if not args.baseline.exists():
+            print(f"\n❌ No baseline at {args.baseline}; run with --save-baseline first")
+            sys.exit(2)
+        regressions = compare(report, json.loads(args.baseline.read_text()), args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) over {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"   {line}")
+            sys.exit(1)
+        print(f"\n✅ No stage slower than baseline by more than {args.threshold:.0%}")
+
+if __name__ == "__main__":
+    main()
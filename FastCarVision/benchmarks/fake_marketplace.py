@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+FastCarVision Fake Marketplace
+
+Serves AutoTrader- and Cars.com-shaped result pages with configurable
+latency, error rate and page size, so load tests exercise the real
+scraping and parsing code without touching the live sites. Point the
+backend at it with AUTOTRADER_BASE_URL / CARS_COM_BASE_URL.
+
+Usage: python benchmarks/fake_marketplace.py [--port 8900] [--latency-ms 80] [--error-rate 0.02]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import zlib
+from dataclasses import dataclass
+
+from aiohttp import web
+
+MODELS = {
+    "toyota": ["Camry", "Corolla", "RAV4"],
+    "honda": ["Civic", "Accord", "CR-V"],
+    "ford": ["F-150", "Escape", "Mustang"],
+    "tesla": ["Model 3", "Model Y"],
+    "bmw": ["X5", "3 Series"],
+}
+TRIMS = ["LE", "SE", "XLE", "Sport", "Touring", "Limited", ""]
+CITIES = ["Austin, TX", "Denver, CO", "Newark, NJ", "Tampa, FL", "Columbus, OH"]
+
+@dataclass
+class MarketplaceConfig:
+    latency_ms: float = 80.0
+    jitter_ms: float = 40.0
+    error_rate: float = 0.0
+    listings: int = 25
+    page_kb: int = 0
+    markup: str = "html"
+    etags: bool = True
+    compress: bool = False
+    seed: int = 1505
+
+def build_listings(make: str, model: str, count: int, seed: int) -> list:
+    """Listings for a query; the same query always gets the same page"""
+    rng = random.Random(zlib.crc32(f"{seed}:{make}:{model}".encode()))
+    make = make.title() if make else rng.choice(list(MODELS)).title()
+    models = [model.title()] if model else MODELS.get(make.lower(), ["Sedan"])
+    listings = []
+    for i in range(count):
+        year = rng.randint(2012, 2024)
+        name = rng.choice(models)
+        listings.append({
+            "id": f"{make[:3].lower()}{zlib.crc32(f'{make}{name}{i}'.encode()):08x}",
+            "title": f"{year} {make} {name} {rng.choice(TRIMS)}".strip(),
+            "year": year,
+            "make": make,
+            "model": name,
+            "price": rng.randint(8000, 65000),
+            "mileage": rng.randint(500, 160000),
+            "location": rng.choice(CITIES),
+        })
+    return listings
+
+def padding(page_kb: int) -> str:
+    """Inert markup that brings a page up to roughly real-site size"""
+    if page_kb <= 0:
+        return ""
+    block = '<div class="promo-tile"><span>Sponsored content placeholder</span></div>\n'
+    return block * (page_kb * 1024 // len(block))
+
+def render_autotrader(listings: list, config: MarketplaceConfig) -> str:
+    if config.markup == "jsonld":
+        return render_jsonld(listings, "/cars-for-sale/vehicledetails.xhtml?listingId=", config)
+    cards = "".join(
+        f'<div class="inventory-listing">'
+        f'<h3>{item["title"]}</h3>'
+        f'<span class="first-price">${item["price"]:,}</span>'
+        f'<div class="item-card-mileage">{item["mileage"]:,} miles</div>'
+        f'<div class="dealer-location">{item["location"]}</div>'
+        f'<a href="/cars-for-sale/vehicledetails.xhtml?listingId={item["id"]}">View</a>'
+        f'<img src="https://images.example.com/{item["id"]}.jpg">'
+        f'</div>\n'
+        for item in listings
+    )
+    return f"<html><body>{padding(config.page_kb)}{cards}</body></html>"
+
+def render_cars_com(listings: list, config: MarketplaceConfig) -> str:
+    if config.markup == "jsonld":
+        return render_jsonld(listings, "/vehicledetail/", config)
+    cards = "".join(
+        f'<div class="vehicle-card">'
+        f'<h2 class="title">{item["title"]}</h2>'
+        f'<span class="primary-price">${item["price"]:,}</span>'
+        f'<a href="/vehicledetail/{item["id"]}/">Details</a>'
+        f'</div>\n'
+        for item in listings
+    )
+    return f"<html><body>{padding(config.page_kb)}{cards}</body></html>"
+
+def render_jsonld(listings: list, path: str, config: MarketplaceConfig) -> str:
+    """Result page carrying schema.org Car objects, for the structured-data fast path"""
+    items = [{
+        "@type": "Car",
+        "name": item["title"],
+        "brand": {"@type": "Brand", "name": item["make"]},
+        "model": item["model"],
+        "vehicleModelDate": str(item["year"]),
+        "mileageFromOdometer": {"@type": "QuantitativeValue", "value": item["mileage"]},
+        "url": f"{path}{item['id']}",
+        "offers": {"@type": "Offer", "price": item["price"], "availableAtOrFrom": item["location"]},
+    } for item in listings]
+    blob = json.dumps({"@context": "https://schema.org", "@graph": items})
+    return (f'<html><head><script type="application/ld+json">{blob}</script></head>'
+            f'<body>{padding(config.page_kb)}</body></html>')
+
+def create_app(config: MarketplaceConfig) -> web.Application:
+    rng = random.Random(config.seed)
+    stats = {"requests": 0, "errors": 0, "not_modified": 0}
+
+    async def respond(request: web.Request, make: str, model: str, render) -> web.Response:
+        stats["requests"] += 1
+        delay = max(0.0, rng.gauss(config.latency_ms, config.jitter_ms)) / 1000
+        await asyncio.sleep(delay)
+        if rng.random() < config.error_rate:
+            stats["errors"] += 1
+            return web.Response(status=503, text="Service Unavailable")
+        listings = build_listings(make, model, config.listings, config.seed)
+        body = render(listings, config).encode()
+        headers = {}
+        if config.etags:
+            # Pages are deterministic per query, so a checksum is a valid validator
+            etag = f'"{zlib.crc32(body):08x}"'
+            headers["ETag"] = etag
+            if request.headers.get("If-None-Match") == etag:
+                stats["not_modified"] += 1
+                return web.Response(status=304, headers=headers)
+        response = web.Response(body=body, content_type="text/html", headers=headers)
+        if config.compress:
+            response.enable_compression()
+        return response
+
+    async def autotrader(request: web.Request) -> web.Response:
+        query = request.query
+        return await respond(request, query.get("makeCodeList", ""), query.get("modelCodeList", ""), render_autotrader)
+
+    async def cars_com(request: web.Request) -> web.Response:
+        return await respond(request, request.query.get("makes[]", ""), "", render_cars_com)
+
+    async def health(request: web.Request) -> web.Response:
+        return web.json_response(stats)
+
+    app = web.Application()
+    app.router.add_get("/cars-for-sale/all-cars", autotrader)
+    app.router.add_get("/shopping/results/", cars_com)
+    app.router.add_get("/_stats", health)
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake AutoTrader/Cars.com server for load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=80.0, help="Mean response latency")
+    parser.add_argument("--jitter-ms", type=float, default=40.0, help="Standard deviation of latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of responses that are 503")
+    parser.add_argument("--listings", type=int, default=25, help="Listings per results page")
+    parser.add_argument("--page-kb", type=int, default=0, help="Extra markup per page, in KB")
+    parser.add_argument("--markup", choices=["html", "jsonld"], default="html")
+    parser.add_argument("--no-etags", action="store_true", help="Never send ETags or answer 304")
+    parser.add_argument("--compress", action="store_true", help="gzip/deflate responses the client accepts")
+    parser.add_argument("--seed", type=int, default=1505)
+    args = parser.parse_args()
+
+    config = MarketplaceConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        listings=args.listings,
+        page_kb=args.page_kb,
+        markup=args.markup,
+        etags=not args.no_etags,
+        compress=args.compress,
+        seed=args.seed,
+    )
+    print(f"🛒 Fake marketplace on http://{args.host}:{args.port} "
+          f"({config.latency_ms:g}±{config.jitter_ms:g} ms, {config.error_rate:.0%} errors, {config.markup})")
+    web.run_app(create_app(config), host=args.host, port=args.port, print=None, access_log=None)
+
+if __name__ == "__main__":
+    main()
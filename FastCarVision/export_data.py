@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+FastCarVision Bulk Export
+
+Writes stored listings and recorded detections to Arrow IPC files (which
+can be memory-mapped with zero copies) or Hive-partitioned Parquet.
+
+Usage: python export_data.py [listings|detections|all] [--format arrow|parquet] [--output exports]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).parent / "backend"
+sys.path.insert(0, str(backend_dir))
+
+from app.config import settings
+from app.export import PYARROW_AVAILABLE, DATASETS, write_ipc_file, write_parquet
+
+def main():
+    """Export the requested datasets"""
+    parser = argparse.ArgumentParser(description="Export listings and detections to Arrow or Parquet")
+    parser.add_argument("dataset", nargs="?", default="all", choices=DATASETS + ("all",))
+    parser.add_argument("--format", choices=["arrow", "parquet"], default="arrow")
+    parser.add_argument("--output", type=Path, default=Path("exports"))
+    parser.add_argument("--batch-size", type=int, default=settings.export_batch_size)
+    args = parser.parse_args()
+
+    print("🚗 FastCarVision Bulk Export")
+    print("=" * 50)
+
+    if not PYARROW_AVAILABLE:
+        print("❌ pyarrow is not installed: pip install pyarrow")
+        sys.exit(1)
+
+    datasets = DATASETS if args.dataset == "all" else (args.dataset,)
+    for dataset in datasets:
+        if args.format == "arrow":
+            path = args.output / f"{dataset}.arrow"
+            rows = write_ipc_file(dataset, path, args.batch_size)
+        else:
+            path = args.output / dataset
+            rows = write_parquet(dataset, path, args.batch_size)
+        print(f"✅ {dataset}: {rows} rows -> {path}")
+
+if __name__ == "__main__":
+    main()
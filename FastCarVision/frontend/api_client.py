@@ -0,0 +1,166 @@
+import io
+import os
+import time
+from typing import Any, Dict, Optional, Tuple, Union
+from urllib.parse import urlencode
+
+import requests
+import streamlit as st
+from PIL import Image, ImageOps
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Backend API configuration
+API_BASE_URL = "http://localhost:8000"
+# The backend as users' browsers reach it; unset means thumbnails are
+# fetched by this server and sent to the browser with the page
+PUBLIC_API_URL = os.getenv("PUBLIC_API_URL", "").rstrip("/")
+HEALTH_TTL = 15  # Seconds a health check result is reused across reruns
+LIMITS_TTL = 300
+THUMB_TTL = 3600
+DEFAULT_MAX_IMAGE_SIZE = 1024
+UPLOAD_JPEG_QUALITY = 85
+JOB_TIMEOUT = 120  # Seconds to wait for a background job
+JOB_POLL_INTERVAL = 0.5
+JOB_STAGE_LABELS = {
+    "queued": "Waiting in queue...",
+    "decoding": "Decoding image...",
+    "detecting": "Detecting vehicles...",
+    "searching": "Searching listings...",
+    "completed": "Done",
+}
+
+@st.cache_resource
+def get_session() -> requests.Session:
+    """One pooled, keep-alive session shared by every rerun and user"""
+    session = requests.Session()
+    retries = Retry(total=2, backoff_factor=0.2, allowed_methods=["GET"], status_forcelist=[502, 503, 504])
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retries)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+@st.cache_data(ttl=HEALTH_TTL, show_spinner=False)
+def check_backend_health() -> bool:
+    """Check if backend is running"""
+    try:
+        response = get_session().get(f"{API_BASE_URL}/health", timeout=3)
+        return response.status_code == 200
+    except requests.exceptions.RequestException:
+        return False
+
+@st.cache_data(ttl=LIMITS_TTL, show_spinner=False)
+def get_max_image_size() -> int:
+    """Longest side the backend processes; larger uploads are downscaled first"""
+    try:
+        limits = get_session().get(f"{API_BASE_URL}/supported-formats", timeout=3).json()
+        return int(limits.get("max_image_size", DEFAULT_MAX_IMAGE_SIZE))
+    except (requests.exceptions.RequestException, ValueError):
+        return DEFAULT_MAX_IMAGE_SIZE
+
+@st.cache_data(ttl=THUMB_TTL, max_entries=500, show_spinner=False)
+def fetch_thumbnail(image_url: str, width: int) -> Optional[bytes]:
+    """Backend-resized listing image, fetched from here rather than by the browser"""
+    try:
+        response = get_session().get(
+            f"{API_BASE_URL}/thumb", params={"url": image_url, "w": width}, timeout=10
+        )
+    except requests.exceptions.RequestException:
+        return None
+    return response.content if response.status_code == 200 else None
+
+def listing_image(image_url: str, width: int) -> Union[str, bytes]:
+    """What to hand st.image for a listing photo
+
+    Falls back to the marketplace's own image if the backend cannot
+    produce a thumbnail.
+    """
+    if PUBLIC_API_URL:
+        return f"{PUBLIC_API_URL}/thumb?{urlencode({'url': image_url, 'w': width})}"
+    return fetch_thumbnail(image_url, width) or image_url
+
+# Raised by Pillow for files that are not images, are truncated or are too large to decode
+IMAGE_ERRORS = (OSError, Image.DecompressionBombError)
+
+def open_upload(image_file) -> Optional[Image.Image]:
+    """Decode an uploaded file for preview, or show an error if it is not a usable image"""
+    try:
+        image = Image.open(image_file)
+        image.load()
+    except IMAGE_ERRORS as e:
+        st.error(f"❌ Could not read this image: {e}")
+        return None
+    finally:
+        image_file.seek(0)
+    return image
+
+def prepare_upload(image_file, max_size: int) -> Tuple[bytes, str]:
+    """
+    Downscale to the backend's working size and re-encode as JPEG, since
+    the backend would discard the extra resolution anyway. Small JPEGs
+    are sent as they are.
+    """
+    original = image_file.getvalue()
+    image = Image.open(io.BytesIO(original))
+    source_format = image.format
+    if source_format == "JPEG" and max(image.size) <= max_size:
+        return original, "image/jpeg"
+
+    # Apply the EXIF orientation before it is lost in re-encoding
+    image = ImageOps.exif_transpose(image)
+    if max(image.size) > max_size:
+        image.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=UPLOAD_JPEG_QUALITY, optimize=True)
+    encoded = buffer.getvalue()
+    if len(encoded) >= len(original) and source_format == "JPEG":
+        return original, "image/jpeg"
+    return encoded, "image/jpeg"
+
+def upload_and_process_image(image_file, progress=None) -> Optional[Dict[str, Any]]:
+    """Submit image as a background job and poll until results are ready"""
+    session = get_session()
+    try:
+        contents, content_type = prepare_upload(image_file, get_max_image_size())
+        files = {"file": ("image.jpg", contents, content_type)}
+        response = session.post(
+            f"{API_BASE_URL}/jobs",
+            files=files,
+            timeout=30
+        )
+
+        if response.status_code != 202:
+            st.error(f"Backend error: {response.status_code}")
+            return None
+
+        status_url = f"{API_BASE_URL}{response.json()['status_url']}"
+        deadline = time.time() + JOB_TIMEOUT
+
+        while time.time() < deadline:
+            job = session.get(status_url, timeout=10).json()
+
+            if progress is not None:
+                progress.info(f"⏳ {JOB_STAGE_LABELS.get(job['stage'], job['stage'])}")
+
+            if job['status'] == 'completed':
+                return job['result']
+            if job['status'] == 'failed':
+                st.error(f"Processing failed: {job.get('error')}")
+                return None
+
+            time.sleep(JOB_POLL_INTERVAL)
+
+        st.error("Timed out waiting for results")
+        return None
+
+    except requests.exceptions.RequestException as e:
+        # Don't keep reporting the backend as online after it went away
+        check_backend_health.clear()
+        st.error(f"Connection error: {str(e)}")
+        return None
+    except IMAGE_ERRORS as e:
+        st.error(f"Could not read the image: {e}")
+        return None
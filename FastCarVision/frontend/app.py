@@ -1,10 +1,6 @@
 import streamlit as st
-import requests
-import json
-from PIL import Image
-import io
-import time
-from typing import Dict, Any
+
+from api_client import check_backend_health, listing_image, open_upload, upload_and_process_image
 
 # Page configuration
 st.set_page_config(
@@ -61,37 +57,6 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Backend API configuration
-API_BASE_URL = "http://localhost:8000"
-
-def check_backend_health() -> bool:
-    """Check if backend is running"""
-    try:
-        response = requests.get(f"{API_BASE_URL}/health", timeout=5)
-        return response.status_code == 200
-    except:
-        return False
-
-def upload_and_process_image(image_file) -> Dict[str, Any]:
-    """Upload image to backend and get results"""
-    try:
-        files = {"file": ("image.jpg", image_file, "image/jpeg")}
-        response = requests.post(
-            f"{API_BASE_URL}/process-and-search", 
-            files=files,
-            timeout=30
-        )
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            st.error(f"Backend error: {response.status_code}")
-            return None
-    
-    except requests.exceptions.RequestException as e:
-        st.error(f"Connection error: {str(e)}")
-        return None
-
 def main():
     # Header
     st.markdown("""
@@ -139,9 +104,9 @@ def main():
             help="Upload a clear side-view image of a car for best results"
         )
         
-        if uploaded_file is not None:
+        image = open_upload(uploaded_file) if uploaded_file is not None else None
+        if image is not None:
             # Display uploaded image
-            image = Image.open(uploaded_file)
             st.image(image, caption="Uploaded Image", use_column_width=True)
             
             # Image info
@@ -158,7 +123,9 @@ def main():
                     uploaded_file.seek(0)
                     
                     # Process image
-                    results = upload_and_process_image(uploaded_file)
+                    progress = st.empty()
+                    results = upload_and_process_image(uploaded_file, progress)
+                    progress.empty()
                     
                     if results:
                         st.session_state['results'] = results
@@ -229,7 +196,7 @@ def main():
                             # Display image if available
                             if listing.get('image_url'):
                                 try:
-                                    st.image(listing['image_url'], width=150)
+                                    st.image(listing_image(listing['image_url'], 150), width=150)
                                 except:
                                     st.info("📷 Image not available")
             else:
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+FastCarVision Model Preparation
+
+Stages the YOLO and CLIP weights into MODEL_DIR with a checksummed
+manifest, so images can be built with their models baked in and run
+with MODEL_OFFLINE=true. CLIP is stored as safetensors when available.
+The server only compares sizes and mtimes at startup (MODEL_VERIFY=stat);
+`verify` checks every sha256, e.g. as the last step of an image build.
+
+Usage: python prepare_models.py [fetch|verify|list] [names...] [--from FILE] [--version V] [--dir models]
+"""
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).parent / "backend"
+sys.path.insert(0, str(backend_dir))
+
+from app.config import settings
+from app.artifacts import (
+    SAFETENSORS_AVAILABLE, ArtifactError, ArtifactStore,
+    artifact_kind, convert_clip, download, expected_sha256, source_url,
+)
+
+def fetch(store: ArtifactStore, name: str, args) -> dict:
+    """Download (or take from --from) one model and pin it in the manifest"""
+    with tempfile.TemporaryDirectory(dir=store.directory) as temp_dir:
+        if args.source:
+            source = Path(args.source)
+            origin = str(source.resolve())
+        else:
+            url = source_url(name)
+            if url is None:
+                raise ArtifactError(f"No known download for {name}; stage it with --from")
+            print(f"⬇️  {name} from {url}")
+            source = Path(temp_dir) / url.rsplit("/", 1)[-1]
+            download(url, source, expected_sha256(url))
+            origin = url
+
+        weights_format = "torch"
+        if artifact_kind(name) == "clip" and SAFETENSORS_AVAILABLE and not args.no_safetensors:
+            converted = Path(temp_dir) / f"{source.stem}.safetensors"
+            convert_clip(source, converted)
+            source, weights_format = converted, "safetensors"
+
+        return store.add(name, source, args.version, origin, weights_format)
+
+def main():
+    """Fetch, verify or list staged model artifacts"""
+    parser = argparse.ArgumentParser(description="Pre-stage model weights with checksums")
+    parser.add_argument("command", nargs="?", default="fetch", choices=["fetch", "verify", "list"])
+    parser.add_argument("names", nargs="*", help="models to fetch (default: the configured YOLO and CLIP models)")
+    parser.add_argument("--dir", default=settings.model_dir, help="artifact directory")
+    parser.add_argument("--from", dest="source", help="stage this local file instead of downloading")
+    parser.add_argument("--version", help="version label (default: sha256 prefix)")
+    parser.add_argument("--no-safetensors", action="store_true", help="keep CLIP in its original format")
+    args = parser.parse_args()
+
+    print("🚗 FastCarVision Model Preparation")
+    print("=" * 50)
+
+    store = ArtifactStore(args.dir)
+    if args.command == "list":
+        for name, entry in sorted(store.manifest().items()):
+            print(f"📦 {name}: {entry['version']} ({entry['format']}, {entry['bytes'] / 1e6:.1f} MB) {entry['file']}")
+        return
+
+    if args.command == "verify":
+        failed = 0
+        for name, entry in sorted(store.manifest().items()):
+            try:
+                store.check(name, entry)
+                print(f"✅ {name} {entry['version']}")
+            except ArtifactError as e:
+                failed += 1
+                print(f"❌ {e}")
+        if failed:
+            sys.exit(1)
+        return
+
+    names = args.names or [settings.car_detection_model, settings.clip_model]
+    if args.source and len(names) != 1:
+        parser.error("--from stages a single model; name it explicitly")
+
+    Path(args.dir).mkdir(parents=True, exist_ok=True)
+    for name in names:
+        try:
+            entry = fetch(store, name, args)
+        except (ArtifactError, OSError) as e:
+            print(f"❌ {name}: {e}")
+            sys.exit(1)
+        print(f"✅ {name} {entry['version']} -> {store.directory / entry['file']}")
+
+if __name__ == "__main__":
+    main()
@@ -3,8 +3,14 @@
 FastCarVision Backend Runner
 
 This script starts the FastCarVision backend server with proper configuration.
+
+Usage: python run_backend.py [--workers N]
+
+With more than one worker the models are loaded once and the workers are
+forked from that process, sharing the weights copy-on-write.
 """
 
+import argparse
 import uvicorn
 import sys
 import os
@@ -16,21 +22,33 @@ sys.path.insert(0, str(backend_dir))
 
 def main():
     """Start the FastCarVision backend server"""
+    from app.config import settings
+
+    parser = argparse.ArgumentParser(description="Start the FastCarVision backend server")
+    parser.add_argument("--workers", type=int, default=settings.serve_workers,
+                        help="pre-forked worker processes (disables auto-reload when > 1)")
+    args = parser.parse_args()
+
     print("🚗 Starting FastCarVision Backend Server...")
     print("=" * 50)
-    
+
     # Create data directory if it doesn't exist
     data_dir = Path(__file__).parent / "data"
     data_dir.mkdir(exist_ok=True)
-    
+
     try:
-        uvicorn.run(
-            "app.main:app",
-            host="0.0.0.0",
-            port=8000,
-            reload=True,
-            log_level="info"
-        )
+        if args.workers > 1:
+            from app.serving import serve_prefork
+            print(f"🧠 Loading models once for {args.workers} workers")
+            serve_prefork("0.0.0.0", 8000, args.workers)
+        else:
+            uvicorn.run(
+                "app.main:app",
+                host="0.0.0.0",
+                port=8000,
+                reload=True,
+                log_level="info"
+            )
     except KeyboardInterrupt:
         print("\n🛑 Server stopped by user")
     except Exception as e:
@@ -38,4 +56,4 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
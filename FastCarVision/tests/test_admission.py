@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+from app.admission import Overloaded, StageLimiter
+from app.config import settings
+
+@pytest.fixture(autouse=True)
+def readiness(monkeypatch):
+    monkeypatch.setattr(settings, "readiness_max_wait", 2.0)
+    monkeypatch.setattr(settings, "readiness_wait_decay", 10.0)
+
+def test_slow_admissions_mark_the_stage_saturated():
+    limiter = StageLimiter("vision", concurrency=1, max_queue=8, timeout=5)
+    assert not limiter.is_saturated()
+
+    for _ in range(30):
+        limiter._record_wait(3.0)
+    assert limiter.is_saturated()
+
+def test_readiness_recovers_once_the_stage_goes_idle():
+    limiter = StageLimiter("vision", concurrency=1, max_queue=8, timeout=5)
+    for _ in range(30):
+        limiter._record_wait(3.0)
+
+    # No admissions for a minute: the average decays instead of staying frozen
+    limiter._wait_at -= 60
+    assert not limiter.is_saturated()
+    assert limiter.snapshot()["avg_wait_seconds"] < 0.01
+
+def test_full_queue_is_saturated():
+    limiter = StageLimiter("vision", concurrency=1, max_queue=2, timeout=5)
+    limiter.waiting = 2
+    assert limiter.is_saturated()
+
+def test_requests_that_cannot_start_in_time_are_shed():
+    limiter = StageLimiter("scraping", concurrency=1, max_queue=1, timeout=0.05)
+
+    async def scenario():
+        async with limiter.slot():
+            with pytest.raises(Overloaded) as shed:
+                async with limiter.slot():
+                    pass
+        return shed.value
+
+    error = asyncio.run(scenario())
+    assert error.status_code == 503
+    assert int(error.headers["Retry-After"]) >= 1
+    assert limiter.rejected == 1
+    assert limiter.in_flight == 0
+    assert limiter.avg_wait > 0
@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+from app import artifacts
+from app.artifacts import ArtifactError, ArtifactStore
+
+@pytest.fixture
+def store(tmp_path):
+    return ArtifactStore(str(tmp_path / "models"))
+
+@pytest.fixture
+def staged(store, tmp_path):
+    source = tmp_path / "yolov8n.pt"
+    source.write_bytes(b"weights" * 1000)
+    entry = store.add("yolov8n.pt", source, version="v1")
+    return entry, store.directory / entry["file"]
+
+def test_add_pins_the_file_in_the_manifest(store, staged):
+    entry, path = staged
+    assert store.manifest()["yolov8n.pt"] == entry
+    assert entry["file"] == "yolo/yolov8n-v1.pt"
+    assert entry["bytes"] == path.stat().st_size
+    assert store.check("yolov8n.pt", entry) == path
+
+def test_check_rejects_a_missing_file(store, staged):
+    entry, path = staged
+    path.unlink()
+    with pytest.raises(ArtifactError, match="missing"):
+        store.check("yolov8n.pt", entry, full=False)
+
+def test_check_rejects_the_wrong_size(store, staged):
+    entry, path = staged
+    path.write_bytes(b"truncated")
+    with pytest.raises(ArtifactError, match="wrong size"):
+        store.check("yolov8n.pt", entry, full=False)
+
+def test_full_check_rejects_changed_contents(store, staged):
+    entry, path = staged
+    stat = path.stat()
+    path.write_bytes(b"W" * stat.st_size)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    with pytest.raises(ArtifactError, match="Checksum mismatch"):
+        store.check("yolov8n.pt", entry)
+
+def test_quick_check_skips_hashing_untouched_files(store, staged, monkeypatch):
+    entry, path = staged
+    monkeypatch.setattr(artifacts, "sha256_file", lambda path: pytest.fail("hashed an untouched file"))
+    assert store.check("yolov8n.pt", entry, full=False) == path
+
+def test_quick_check_hashes_files_whose_mtime_changed(store, staged):
+    entry, path = staged
+    path.write_bytes(b"W" * entry["bytes"])
+    os.utime(path, ns=(entry["mtime_ns"] + 10**9, entry["mtime_ns"] + 10**9))
+    with pytest.raises(ArtifactError, match="Checksum mismatch"):
+        store.check("yolov8n.pt", entry, full=False)
+
+def test_resolve_unstaged_models(store):
+    assert store.resolve("ViT-B/32") is None
+
+    store.offline = True
+    with pytest.raises(ArtifactError, match="downloads are disabled"):
+        store.resolve("ViT-B/32")
@@ -0,0 +1,21 @@
+import asyncio
+
+from app.config import settings
+from app.crawler import WarmCrawler
+
+def start_and_stop(crawler: WarmCrawler) -> bool:
+    """Whether start() launched the crawler task"""
+    async def scenario():
+        crawler.start()
+        started = crawler._task is not None
+        await crawler.stop()
+        return started
+    return asyncio.run(scenario())
+
+def test_crawler_stays_off_in_live_mode(monkeypatch):
+    monkeypatch.setattr(settings, "search_mode", "live")
+    assert not start_and_stop(WarmCrawler(orchestrator=None))
+
+def test_crawler_runs_in_store_first_mode(monkeypatch):
+    monkeypatch.setattr(settings, "search_mode", "store-first")
+    assert start_and_stop(WarmCrawler(orchestrator=None))
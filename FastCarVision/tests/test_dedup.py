@@ -0,0 +1,71 @@
+from datetime import datetime
+from typing import Optional
+
+from app.dedup import ListingDeduplicator
+from app.records import ListingRecord
+
+def listing(url: str, title: str = "2019 Honda Civic EX Sedan", source: str = "autotrader",
+            price: int = 18500, mileage: Optional[int] = 42000, vin: str = None) -> ListingRecord:
+    return ListingRecord(
+        title=title,
+        listing_url=url,
+        source=source,
+        scraped_at=datetime.now(),
+        price=f"${price:,}",
+        price_value=price,
+        mileage=f"{mileage:,} miles" if mileage is not None else None,
+        mileage_value=mileage,
+        vin=vin,
+    )
+
+def test_same_url_is_a_duplicate():
+    dedup = ListingDeduplicator()
+    assert dedup.add(listing("https://www.autotrader.com/listing/1?utm_source=feed"))
+    assert not dedup.add(listing("https://autotrader.com/listing/1/", title="Different title"))
+
+def test_same_vin_is_a_duplicate():
+    dedup = ListingDeduplicator()
+    assert dedup.add(listing("https://www.autotrader.com/listing/1", vin="1hgcv1f34la000001"))
+    assert not dedup.add(listing(
+        "https://www.cars.com/vehicledetail/9", title="Honda Civic", source="cars.com",
+        price=25000, vin="1HGCV1F34LA000001 "
+    ))
+
+def test_same_car_on_two_marketplaces_is_a_duplicate():
+    dedup = ListingDeduplicator()
+    assert dedup.add(listing("https://www.autotrader.com/listing/1"))
+    assert not dedup.add(listing(
+        "https://www.cars.com/vehicledetail/9", title="Used 2019 Honda Civic EX Sedan",
+        source="cars.com", price=18450, mileage=42100
+    ))
+
+def test_similar_listings_from_one_source_are_kept():
+    # Cars.com has no mileage, so a dealer's identical trims look alike
+    dedup = ListingDeduplicator()
+    assert dedup.add(listing("https://www.cars.com/vehicledetail/1", source="cars.com", mileage=None))
+    assert dedup.add(listing("https://www.cars.com/vehicledetail/2", source="cars.com", mileage=None, price=18400))
+
+def test_different_price_is_not_a_duplicate():
+    dedup = ListingDeduplicator()
+    assert dedup.add(listing("https://www.autotrader.com/listing/1"))
+    assert dedup.add(listing("https://www.cars.com/vehicledetail/9", source="cars.com", price=21000))
+
+def test_different_mileage_is_not_a_duplicate():
+    dedup = ListingDeduplicator()
+    assert dedup.add(listing("https://www.autotrader.com/listing/1"))
+    assert dedup.add(listing("https://www.cars.com/vehicledetail/9", source="cars.com", mileage=48000))
+
+def test_different_car_is_not_a_duplicate():
+    dedup = ListingDeduplicator()
+    assert dedup.add(listing("https://www.autotrader.com/listing/1"))
+    assert dedup.add(listing("https://www.cars.com/vehicledetail/9", title="2019 Toyota Camry SE", source="cars.com"))
+
+def test_filter_keeps_the_first_of_each_group_in_order():
+    listings = [
+        listing("https://www.autotrader.com/listing/1"),
+        listing("https://www.autotrader.com/listing/2", title="2019 Toyota Camry SE", price=21000),
+        listing("https://www.autotrader.com/listing/1?utm_medium=email"),
+        listing("https://www.cars.com/vehicledetail/9", title="Used 2019 Honda Civic EX Sedan", source="cars.com"),
+    ]
+    kept = ListingDeduplicator().filter(listings)
+    assert kept == listings[:2]
@@ -0,0 +1,107 @@
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from app import egress
+from app.egress import BlockedHost, GuardedResolver, blocked_by_guard, check_url, guarded_request
+
+@pytest.mark.parametrize("url", [
+    "http://127.0.0.1/x",
+    "http://169.254.169.254/latest/meta-data",
+    "http://10.0.0.5/",
+    "http://[::1]/",
+    "http://[::ffff:127.0.0.1]/",
+])
+def test_check_url_rejects_private_literals(url):
+    with pytest.raises(BlockedHost):
+        check_url(url)
+
+@pytest.mark.parametrize("url", ["ftp://example.com/a.jpg", "file:///etc/passwd", "http:///nohost"])
+def test_check_url_rejects_other_schemes(url):
+    with pytest.raises(ValueError):
+        check_url(url)
+
+def test_check_url_allows_public_hosts_and_private_when_enabled():
+    check_url("https://images.example.com/a.jpg")
+    check_url("http://93.184.216.34/a.jpg")
+    check_url("http://127.0.0.1/a.jpg", allow_private=True)
+
+class FakeResolver:
+    def __init__(self, addresses):
+        self.addresses = addresses
+
+    async def resolve(self, host, port=0, family=0):
+        return [{"hostname": host, "host": self.addresses[host], "port": port,
+                 "family": family, "proto": 0, "flags": 0}]
+
+    async def close(self):
+        pass
+
+def guarded_resolver(addresses, allow_private=False):
+    async def build():
+        resolver = GuardedResolver(allow_private)
+        await resolver.close()
+        resolver._resolver = FakeResolver(addresses)
+        return resolver
+    return asyncio.run(build())
+
+def test_resolver_refuses_names_resolving_to_private_addresses():
+    resolver = guarded_resolver({"rebind.example": "10.1.2.3", "public.example": "93.184.216.34"})
+    assert asyncio.run(resolver.resolve("public.example", 80))[0]["host"] == "93.184.216.34"
+    with pytest.raises(BlockedHost):
+        asyncio.run(resolver.resolve("rebind.example", 80))
+
+def test_resolver_allows_private_addresses_when_enabled():
+    resolver = guarded_resolver({"intranet": "10.1.2.3"}, allow_private=True)
+    assert asyncio.run(resolver.resolve("intranet", 80))[0]["host"] == "10.1.2.3"
+
+async def fetch_via_redirect(monkeypatch, target: str, addresses=None, max_redirects=egress.MAX_REDIRECTS):
+    """Serve a redirect to target from 127.0.0.1, treated as public for the test"""
+    real_is_public = egress.is_public_address
+    monkeypatch.setattr(egress, "is_public_address", lambda host: host == "127.0.0.1" or real_is_public(host))
+
+    async def redirect(request):
+        raise web.HTTPFound(target)
+
+    async def ok(request):
+        return web.Response(text="ok")
+
+    app = web.Application()
+    app.router.add_get("/redirect", redirect)
+    app.router.add_get("/ok", ok)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+
+    resolver = GuardedResolver()
+    await resolver.close()
+    resolver._resolver = FakeResolver(addresses or {})
+    session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(resolver=resolver))
+    try:
+        async with guarded_request(session, "GET", f"http://127.0.0.1:{port}/redirect",
+                                   max_redirects=max_redirects) as response:
+            return response.status, await response.text()
+    finally:
+        await session.close()
+        await runner.cleanup()
+
+def test_redirect_to_private_literal_is_blocked(monkeypatch):
+    with pytest.raises(BlockedHost):
+        asyncio.run(fetch_via_redirect(monkeypatch, "http://169.254.169.254/latest/meta-data"))
+
+def test_redirect_to_name_resolving_privately_is_blocked(monkeypatch):
+    with pytest.raises(aiohttp.ClientError) as error:
+        asyncio.run(fetch_via_redirect(monkeypatch, "http://internal.example/", {"internal.example": "10.0.0.7"}))
+    assert blocked_by_guard(error.value)
+
+def test_redirects_are_followed_to_allowed_hosts(monkeypatch):
+    status, text = asyncio.run(fetch_via_redirect(monkeypatch, "/ok"))
+    assert (status, text) == (200, "ok")
+
+def test_redirects_are_returned_when_disabled(monkeypatch):
+    status, _ = asyncio.run(fetch_via_redirect(monkeypatch, "/ok", max_redirects=0))
+    assert status == 302
@@ -0,0 +1,41 @@
+import json
+
+from app.extractors import StructuredDataExtractor
+
+def json_ld_page(*nodes) -> bytes:
+    blob = json.dumps({"@context": "https://schema.org", "@graph": list(nodes)})
+    return f'<html><head><script type="application/ld+json">{blob}</script></head></html>'.encode()
+
+def titles(page: bytes):
+    return [item["title"] for item in StructuredDataExtractor().extract(page)]
+
+def test_car_nodes_are_extracted():
+    page = json_ld_page({
+        "@type": "Car",
+        "name": "2019 Honda Civic EX",
+        "url": "/listing/1",
+        "offers": {"@type": "Offer", "price": 18500},
+    })
+    items = StructuredDataExtractor().extract(page)
+    assert len(items) == 1
+    assert items[0]["listing_url"] == "/listing/1"
+    assert items[0]["price"] == 18500
+
+def test_plain_products_are_not_vehicles():
+    page = json_ld_page(
+        {"@type": "Product", "name": "All-weather floor mats", "url": "/mats", "offers": {"price": 49}},
+        {"@type": "Product", "name": "2020 Ford Focus SE", "url": "/listing/2", "vehicleModelDate": "2020"},
+    )
+    assert titles(page) == ["2020 Ford Focus SE"]
+
+def test_type_lists_match_any_vehicle_type():
+    page = json_ld_page({"@type": ["Product", "Car"], "name": "2018 Mazda 3", "url": "/listing/3"})
+    assert titles(page) == ["2018 Mazda 3"]
+
+def test_hydration_state_objects_need_vehicle_and_listing_keys():
+    state = {"results": [
+        {"make": "Toyota", "model": "Camry", "year": 2021, "vdpUrl": "/listing/4"},
+        {"make": "Toyota", "model": "Camry"},
+    ]}
+    page = f'<script id="__NEXT_DATA__">{json.dumps(state)}</script>'.encode()
+    assert titles(page) == ["2021 Toyota Camry"]
@@ -0,0 +1,138 @@
+import asyncio
+import io
+
+import pytest
+from fastapi import HTTPException
+from PIL import Image
+
+from app.config import settings
+from app.ingestion import (
+    MULTIPART_OVERHEAD, BodySizeLimitMiddleware, is_supported, open_image, read_upload, sniff_format
+)
+
+def encode(image_format: str, size=(8, 8)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, (10, 20, 30)).save(buffer, format=image_format)
+    return buffer.getvalue()
+
+class FakeUpload:
+    """The parts of UploadFile that read_upload uses"""
+
+    def __init__(self, data: bytes, content_type: str = "image/jpeg"):
+        self.file = io.BytesIO(data)
+        self.content_type = content_type
+        self.filename = "upload"
+        self.bytes_read = 0
+
+    async def read(self, size: int = -1) -> bytes:
+        data = self.file.read(size)
+        self.bytes_read += len(data)
+        return data
+
+    async def seek(self, offset: int):
+        self.file.seek(offset)
+
+def call_middleware(chunks, headers=()):
+    """Send a request body through BodySizeLimitMiddleware, returning (status, bytes the app read)"""
+    messages = [
+        {"type": "http.request", "body": chunk, "more_body": i < len(chunks) - 1}
+        for i, chunk in enumerate(chunks)
+    ]
+    received = []
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    async def app(scope, receive, send):
+        while True:
+            message = await receive()
+            received.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    scope = {"type": "http", "path": "/detect", "headers": [(k.encode(), v.encode()) for k, v in headers]}
+    asyncio.run(BodySizeLimitMiddleware(app)(scope, receive, send))
+    return sent[0]["status"], sum(len(body) for body in received)
+
+@pytest.mark.parametrize("image_format, expected", [
+    ("JPEG", "jpg"),
+    ("PNG", "png"),
+    ("BMP", "bmp"),
+    ("GIF", "gif"),
+    ("TIFF", "tif"),
+    ("WEBP", "webp"),
+])
+def test_sniff_format_from_leading_bytes(image_format, expected):
+    assert sniff_format(encode(image_format)[:16]) == expected
+
+@pytest.mark.parametrize("head", [b"", b"%PDF-1.7", b"<html>", b"RIFF\x00\x00\x00\x00WAVE"])
+def test_sniff_format_rejects_non_images(head):
+    assert sniff_format(head) is None
+
+def test_is_supported_follows_settings(monkeypatch):
+    monkeypatch.setattr(settings, "supported_formats", ["jpeg", "png"])
+    assert is_supported("jpg")
+    assert is_supported("png")
+    assert not is_supported("bmp")
+    assert not is_supported(None)
+
+def test_read_upload_returns_the_whole_file():
+    data = encode("JPEG", size=(64, 64))
+    assert asyncio.run(read_upload(FakeUpload(data))) == data
+
+def test_read_upload_rejects_unsupported_content_early(monkeypatch):
+    monkeypatch.setattr(settings, "supported_formats", ["jpg", "jpeg", "png"])
+    upload = FakeUpload(b"%PDF-1.7" + b"\x00" * 10000)
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(read_upload(upload))
+    assert error.value.status_code == 415
+    assert upload.bytes_read < 100
+
+def test_read_upload_rejects_oversized_files_without_loading_them(monkeypatch):
+    monkeypatch.setattr(settings, "max_upload_bytes", 2048)
+    upload = FakeUpload(encode("JPEG")[:3] + b"\x00" * 100000)
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(read_upload(upload))
+    assert error.value.status_code == 413
+    assert upload.bytes_read < 100
+
+def test_middleware_cuts_off_bodies_of_unknown_length(monkeypatch):
+    monkeypatch.setattr(settings, "max_upload_bytes", 1024)
+    chunks = [b"\x00" * 16 * 1024] * 20
+    status, read = call_middleware(chunks)
+    assert status == 413
+    assert read < 1024 + MULTIPART_OVERHEAD
+
+def test_middleware_refuses_declared_oversized_bodies_unread(monkeypatch):
+    monkeypatch.setattr(settings, "max_upload_bytes", 1024)
+    status, read = call_middleware([b"\x00" * 100], headers=[("content-length", str(10**9))])
+    assert status == 413
+    assert read == 0
+
+def test_middleware_passes_bodies_under_the_limit(monkeypatch):
+    monkeypatch.setattr(settings, "max_upload_bytes", 1024)
+    status, read = call_middleware([b"\x00" * 1000] * 3)
+    assert status == 200
+    assert read == 3000
+
+def test_read_upload_requires_an_image_content_type():
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(read_upload(FakeUpload(encode("PNG"), content_type="text/plain")))
+    assert error.value.status_code == 400
+
+def test_open_image_rejects_oversized_dimensions(monkeypatch):
+    monkeypatch.setattr(settings, "max_image_pixels", 100)
+    with pytest.raises(HTTPException) as error:
+        open_image(encode("PNG", size=(20, 20)))
+    assert error.value.status_code == 413
+
+def test_open_image_rejects_corrupt_data():
+    with pytest.raises(HTTPException) as error:
+        open_image(b"\xff\xd8\xff" + b"garbage")
+    assert error.value.status_code == 400
@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("torch")
+
+from app.jobs import InMemoryJobStore, JobManager, JobStore, SqliteJobStore
+from app.models import JobStageEvent, JobStatus
+
+def new_job(job_id: str = "j1") -> JobStatus:
+    return JobStatus(job_id=job_id, status="queued", stage="queued", stages=[JobStageEvent(stage="queued")])
+
+def process(manager: JobManager, *items):
+    """Run one worker over the queued items and wait for them"""
+    async def scenario():
+        manager.queue = asyncio.Queue()
+        worker = asyncio.get_running_loop().create_task(manager._worker())
+        for item in items:
+            manager.queue.put_nowait(item)
+        await asyncio.wait_for(manager.queue.join(), 5)
+        assert not worker.done()
+        worker.cancel()
+    asyncio.run(scenario())
+
+def test_job_store_is_abstract():
+    with pytest.raises(TypeError):
+        JobStore()
+
+def test_sqlite_store_is_shared_between_connections(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    first, second = SqliteJobStore(path), SqliteJobStore(path)
+
+    first.save(new_job())
+    assert second.get("j1").status == "queued"
+    assert second.get("missing") is None
+
+def test_worker_skips_jobs_that_expired():
+    process(JobManager(InMemoryJobStore()), ("gone", b"", None))
+
+def test_failed_jobs_record_their_error():
+    store = InMemoryJobStore()
+    store.save(new_job())
+    process(JobManager(store), ("j1", b"not an image", None))
+
+    job = store.get("j1")
+    assert job.status == "failed"
+    assert job.error
+    assert [event.stage for event in job.stages] == ["queued", "decoding", "failed"]
+
+def test_submit_and_get_go_through_the_store(tmp_path):
+    manager = JobManager(SqliteJobStore(str(tmp_path / "jobs.db")))
+
+    async def scenario():
+        manager.queue = asyncio.Queue(maxsize=1)
+        job = await manager.submit(b"image")
+        return job, await manager.get(job.job_id)
+
+    job, stored = asyncio.run(scenario())
+    assert stored == job
+    assert manager.queue.qsize() == 1
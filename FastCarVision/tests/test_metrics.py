@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("prometheus_client")
+
+WORKER = """
+import os
+from app.metrics import QUEUE_DEPTH, SCRAPER_RESPONSES, gauge_function, publish_gauges
+SCRAPER_RESPONSES.labels("cars.com", "200").inc()
+gauge_function(QUEUE_DEPTH.labels("vision"), lambda: 2)
+publish_gauges()
+print(os.getpid())
+"""
+
+RENDER = """
+import sys
+from app.metrics import mark_process_dead, render_metrics
+for pid in sys.argv[1:]:
+    mark_process_dead(int(pid))
+sys.stdout.write(render_metrics().decode())
+"""
+
+def run(code: str, metrics_dir, *args) -> str:
+    """Run code in a fresh process, as a pre-forked worker would"""
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(metrics_dir), PYTHONPATH=os.pathsep.join(sys.path))
+    return subprocess.run(
+        [sys.executable, "-c", code, *args], env=env, check=True, capture_output=True, text=True
+    ).stdout
+
+def test_metrics_are_summed_across_worker_processes(tmp_path):
+    run(WORKER, tmp_path)
+    run(WORKER, tmp_path)
+    output = run(RENDER, tmp_path)
+    assert 'fastcarvision_scraper_responses_total{source="cars.com",status="200"} 2.0' in output
+    assert 'fastcarvision_queue_depth{queue="vision"} 4.0' in output
+
+def test_dead_workers_leave_live_gauges(tmp_path):
+    run(WORKER, tmp_path)
+    dead = run(WORKER, tmp_path).strip()
+    output = run(RENDER, tmp_path, dead)
+    assert 'fastcarvision_queue_depth{queue="vision"} 2.0' in output
+    # Counters keep what the dead worker did
+    assert 'fastcarvision_scraper_responses_total{source="cars.com",status="200"} 2.0' in output
@@ -0,0 +1,120 @@
+import asyncio
+import time
+from datetime import datetime
+
+import pytest
+
+from app.config import settings
+from app.models import SavedSearch, SavedSearchCreate
+from app.records import ListingRecord
+from app.saved_searches import SavedSearchManager, SavedSearchState, SavedSearchStore
+
+def listing(n: int, source: str = "autotrader", price: str = "$20,000") -> ListingRecord:
+    return ListingRecord(
+        title=f"2019 Honda Civic #{n}",
+        listing_url=f"https://www.example.com/listing/{n}?utm_source=feed",
+        source=source,
+        scraped_at=datetime.now(),
+        price=price,
+    )
+
+@pytest.fixture
+def manager():
+    return SavedSearchManager(orchestrator=None, store=SavedSearchStore(":memory:"))
+
+@pytest.fixture
+def state():
+    return SavedSearchState(SavedSearch(id="s1", make="Honda", model="Civic"))
+
+def kinds(changes):
+    return sorted((change.change, change.listing.title) for change in changes)
+
+def test_first_run_adds_everything(manager, state):
+    changes = manager._diff(state, [listing(1), listing(2)], {"autotrader"})
+    assert kinds(changes) == [("added", "2019 Honda Civic #1"), ("added", "2019 Honda Civic #2")]
+
+def test_unchanged_listings_produce_no_changes(manager, state):
+    manager._diff(state, [listing(1)], {"autotrader"})
+    assert manager._diff(state, [listing(1)], {"autotrader"}) == []
+
+def test_content_changes_are_reported(manager, state):
+    manager._diff(state, [listing(1)], {"autotrader"})
+    changes = manager._diff(state, [listing(1, price="$18,500")], {"autotrader"})
+    assert kinds(changes) == [("changed", "2019 Honda Civic #1")]
+
+def test_removed_only_after_consecutive_misses(manager, state, monkeypatch):
+    monkeypatch.setattr(settings, "saved_search_removal_misses", 2)
+    manager._diff(state, [listing(1), listing(2)], {"autotrader"})
+
+    assert manager._diff(state, [listing(1)], {"autotrader"}) == []
+    changes = manager._diff(state, [listing(1)], {"autotrader"})
+    assert kinds(changes) == [("removed", "2019 Honda Civic #2")]
+
+def test_reappearing_listing_resets_its_misses(manager, state, monkeypatch):
+    monkeypatch.setattr(settings, "saved_search_removal_misses", 2)
+    manager._diff(state, [listing(1), listing(2)], {"autotrader"})
+
+    manager._diff(state, [listing(1)], {"autotrader"})
+    assert manager._diff(state, [listing(1), listing(2)], {"autotrader"}) == []
+    assert manager._diff(state, [listing(1)], {"autotrader"}) == []
+
+def test_failed_source_does_not_remove_its_listings(manager, state, monkeypatch):
+    monkeypatch.setattr(settings, "saved_search_removal_misses", 1)
+    manager._diff(state, [listing(1), listing(2, source="cars.com")], {"autotrader", "cars.com"})
+
+    # cars.com returned nothing this run, so its listing is not counted as missing
+    assert manager._diff(state, [listing(1)], {"autotrader"}) == []
+    assert len(state.snapshot) == 2
+
+class StubOrchestrator:
+    def __init__(self, runs):
+        self.runs = list(runs)
+
+    async def scrape_sources(self, car_detection, deduplicate=True):
+        # Diffs must see every source's copy of a cross-post
+        assert not deduplicate
+        return self.runs.pop(0)
+
+def test_empty_run_keeps_the_snapshot(monkeypatch):
+    monkeypatch.setattr(settings, "saved_search_removal_misses", 1)
+    orchestrator = StubOrchestrator([([listing(1)], {"autotrader"}), ([], set())])
+    manager = SavedSearchManager(orchestrator, SavedSearchStore(":memory:"))
+    search = manager.create(SavedSearchCreate(make="Honda", model="Civic"))
+
+    assert len(asyncio.run(manager.run(search.id))) == 1
+    assert asyncio.run(manager.run(search.id)) == []
+    assert manager.get(search.id).tracked_listings == 1
+
+def test_state_is_shared_between_workers(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "saved_search_removal_misses", 1)
+    path = str(tmp_path / "saved_searches.db")
+    runs = [([listing(1), listing(2)], {"autotrader"}), ([listing(1)], {"autotrader"})]
+    scheduler = SavedSearchManager(StubOrchestrator(runs), SavedSearchStore(path))
+    api = SavedSearchManager(orchestrator=None, store=SavedSearchStore(path))
+
+    search = api.create(SavedSearchCreate(make="Honda", model="Civic"))
+    assert scheduler.store.due(time.time()) == [search.id]
+
+    added = asyncio.run(scheduler.run(search.id))
+    assert [change.seq for change in added] == [1, 2]
+    assert scheduler.store.due(time.time()) == []
+
+    removed = asyncio.run(scheduler.run(search.id))
+    assert kinds(removed) == [("removed", "2019 Honda Civic #2")]
+
+    polled = api.changes_since(search.id, since=2)
+    assert [change.seq for change in polled.changes] == [3]
+    assert polled.cursor == api.last_seq(search.id) == 3
+    assert api.get(search.id).tracked_listings == 1
+
+    assert api.delete(search.id)
+    assert asyncio.run(scheduler.run(search.id)) == []
+
+@pytest.mark.parametrize("url", [
+    "http://169.254.169.254/latest/meta-data",
+    "http://127.0.0.1:8080/hook",
+    "ftp://example.com/hook",
+])
+def test_webhooks_must_be_public_http_urls(manager, url):
+    with pytest.raises(ValueError):
+        manager.create(SavedSearchCreate(make="Honda", model="Civic", webhook_url=url))
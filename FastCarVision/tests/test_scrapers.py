@@ -0,0 +1,89 @@
+import asyncio
+import re
+from datetime import datetime
+
+from app.models import CarDetection
+from app.records import ListingRecord
+from app import scrapers
+from app.config import settings
+from app.scrapers import ScrapingOrchestrator, split_listing_fragments
+from app.store import ListingStore
+
+SELECTOR = re.compile(r'^(?:vehicle-card|listing)$')
+
+def test_fragments_span_balanced_divs_and_skip_nested_matches():
+    page = (
+        b'<html><body><div class="promo-tile"><div>ad</div></div>'
+        b'<div class="vehicle-card"><div class="listing-price">$1</div><h2>A</h2></div>'
+        b"<div class='vehicle-card featured'><h2>B</h2></div>"
+        b'</body></html>'
+    )
+    assert split_listing_fragments(page, SELECTOR, 10) == [
+        b'<div class="vehicle-card"><div class="listing-price">$1</div><h2>A</h2></div>',
+        b"<div class='vehicle-card featured'><h2>B</h2></div>",
+    ]
+
+def test_fragments_are_limited():
+    page = b''.join(b'<div class="vehicle-card">%d</div>' % i for i in range(20))
+    assert len(split_listing_fragments(page, SELECTOR, 10)) == 10
+
+def test_classes_are_matched_per_name():
+    page = b'<div class="nolisting-here x"></div><div class="x listing"></div>'
+    assert split_listing_fragments(page, re.compile(r'listing'), 10) == [b'<div class="x listing"></div>']
+
+def test_wrappers_named_like_a_listing_are_not_fragments():
+    page = (
+        b'<div class="listings-container">'
+        b'<div class="vehicle-card"><h2>A</h2></div><div class="vehicle-card"><h2>B</h2></div>'
+        b'</div>'
+    )
+    assert split_listing_fragments(page, SELECTOR, 10) == [
+        b'<div class="vehicle-card"><h2>A</h2></div>',
+        b'<div class="vehicle-card"><h2>B</h2></div>',
+    ]
+
+def test_fragments_holding_several_listings_fall_back_to_the_full_parse():
+    page = b'<div class="listing"><div class="vehicle-card">A</div><div class="vehicle-card">B</div></div>'
+    assert split_listing_fragments(page, SELECTOR, 10) == []
+
+def cross_posted(source: str) -> ListingRecord:
+    return ListingRecord(
+        title="2019 Honda Civic EX", listing_url=f"https://{source}/listing/1", source=source,
+        scraped_at=datetime.now(), make="Honda", model="Civic", price="$18,500", price_value=18500, mileage_value=42000
+    )
+
+def orchestrator_with(delays):
+    """Orchestrator whose scrapers return the same car after the given delays"""
+    orchestrator = ScrapingOrchestrator()
+    orchestrator.scrapers = list(delays)
+    orchestrator.get_page_client = lambda: None
+
+    async def scrape(source, session, car_detection):
+        await asyncio.sleep(delays[source])
+        return [cross_posted(source)]
+
+    orchestrator._scrape_and_store = scrape
+    return orchestrator
+
+DETECTION = CarDetection(make="Honda", model="Civic", confidence=1.0)
+
+def test_cross_posts_keep_the_copy_of_the_first_scraper():
+    for delays in ({"autotrader": 0.02, "cars.com": 0}, {"autotrader": 0, "cars.com": 0.02}):
+        listings, responded = asyncio.run(orchestrator_with(delays).scrape_sources(DETECTION))
+        assert [listing.source for listing in listings] == ["autotrader"]
+        assert responded == {"autotrader", "cars.com"}
+
+def test_scrape_sources_can_keep_every_copy():
+    orchestrator = orchestrator_with({"autotrader": 0, "cars.com": 0})
+    listings, _ = asyncio.run(orchestrator.scrape_sources(DETECTION, deduplicate=False))
+    assert [listing.source for listing in listings] == ["autotrader", "cars.com"]
+
+def test_store_first_results_are_deduplicated(monkeypatch):
+    store = ListingStore(":memory:")
+    store.upsert_listings([cross_posted("autotrader"), cross_posted("cars.com")])
+    monkeypatch.setattr(scrapers, "listing_store", store)
+    monkeypatch.setattr(settings, "store_min_results", 1)
+
+    orchestrator = orchestrator_with({})
+    listings = asyncio.run(orchestrator.search(DETECTION, "store-first"))
+    assert len(listings) == 1
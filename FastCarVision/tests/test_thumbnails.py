@@ -0,0 +1,66 @@
+import asyncio
+import io
+from contextlib import asynccontextmanager
+
+import pytest
+from fastapi import HTTPException
+from PIL import Image
+
+from app import thumbnails
+from app.admission import StageLimiter, admission_controller
+from app.thumbnails import ThumbnailCache, ThumbnailService, etag_for, etag_matches, make_thumbnail
+
+def jpeg(width: int, height: int, color=(200, 30, 30)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), color).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+def test_etag_follows_thumbnail_content():
+    red = make_thumbnail(jpeg(800, 600), 150)
+    blue = make_thumbnail(jpeg(800, 600, (30, 30, 200)), 150)
+    assert etag_for(red) == etag_for(make_thumbnail(jpeg(800, 600), 150))
+    assert etag_for(red) != etag_for(blue)
+
+def test_etag_matches_lists_weak_tags_and_wildcards():
+    etag = etag_for(b"thumb")
+    assert etag_matches(f'"other", {etag}', etag)
+    assert etag_matches(f"W/{etag}", etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches('"other"', etag)
+
+def test_thumbnail_is_resized_to_width():
+    thumb = Image.open(io.BytesIO(make_thumbnail(jpeg(1200, 800), 300)))
+    assert thumb.format == "JPEG"
+    assert thumb.size == (300, 200)
+
+def test_truncated_source_is_unsupported():
+    data = jpeg(1200, 800)
+    with pytest.raises(HTTPException) as error:
+        make_thumbnail(data[:len(data) // 2], 300)
+    assert error.value.status_code == 415
+
+def test_image_host_timeout_is_a_gateway_timeout(monkeypatch, tmp_path):
+    @asynccontextmanager
+    async def slow_request(*args, **kwargs):
+        raise asyncio.TimeoutError()
+        yield
+
+    monkeypatch.setattr(thumbnails, "guarded_request", slow_request)
+    service = ThumbnailService(ThumbnailCache(str(tmp_path), 1024 * 1024))
+    monkeypatch.setattr(service, "get_session", lambda: None)
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(service.fetch("https://images.example.com/car.jpg"))
+    assert error.value.status_code == 504
+
+def test_cache_misses_are_shed_when_the_stage_is_full(monkeypatch, tmp_path):
+    monkeypatch.setattr(admission_controller, "thumbnails", StageLimiter("thumbnails", 1, 0, 1.0))
+    service = ThumbnailService(ThumbnailCache(str(tmp_path), 1024 * 1024))
+
+    async def fetch(url):
+        pytest.fail("fetched past a full stage")
+
+    monkeypatch.setattr(service, "fetch", fetch)
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(service.thumbnail("https://images.example.com/car.jpg", 150))
+    assert error.value.status_code == 503
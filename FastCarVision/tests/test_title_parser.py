@@ -0,0 +1,39 @@
+import pytest
+
+from app.title_parser import ParsedTitle, TitleParser, title_parser
+
+@pytest.mark.parametrize("title, expected", [
+    ("2020 Toyota Camry SE", ("Toyota", "Camry", 2020, "SE")),
+    ("Used 2018 Honda CR-V EX-L AWD", ("Honda", "CR-V", 2018, "EX-L")),
+    ("2021 Chevy Silverado 1500 LT Z71", ("Chevrolet", "Silverado 1500", 2021, "LT")),
+    ("2019 Ford F150 XLT SuperCrew", ("Ford", "F-150", 2019, "XLT")),
+    ("2017 Mercedes Benz C300 4MATIC", ("Mercedes-Benz", "C-Class", 2017, "4MATIC")),
+    ("2022 Jeep Grand Cherokee L Limited", ("Jeep", "Grand Cherokee L", 2022, "Limited")),
+    ("2016 Range Rover Sport HSE", ("Land Rover", "Range Rover Sport", 2016, None)),
+    ("2015 Mazda 3 Touring", ("Mazda", "Mazda3", 2015, "Touring")),
+])
+def test_parses_make_model_year_and_trim(title, expected):
+    assert title_parser.parse(title) == ParsedTitle(*expected)
+
+def test_infers_the_make_from_a_unique_model():
+    assert title_parser.parse("2019 Camry XLE") == ParsedTitle("Toyota", "Camry", 2019, "XLE")
+
+def test_shared_model_names_do_not_imply_a_make():
+    # A model name used by two makes cannot say which one it is
+    parser = TitleParser({"Ram": ["1500"], "GMC": ["1500"]})
+    assert parser.parse("2020 1500 Big Horn") == ParsedTitle(None, None, 2020, None)
+
+def test_custom_vocabulary_ignores_aliases_of_other_makes():
+    parser = TitleParser({"Toyota": ["Camry"]})
+    assert parser.parse("2019 Chevy Malibu") == ParsedTitle(None, None, 2019, None)
+    assert parser.parse("2019 Toyota Camry LE") == ParsedTitle("Toyota", "Camry", 2019, "LE")
+
+def test_unknown_titles_leave_fields_empty():
+    assert title_parser.parse("Great commuter car, must see!") == ParsedTitle(None, None, None, None)
+
+def test_trims_are_only_read_after_the_model():
+    assert title_parser.parse("Limited 2020 Toyota Camry").trim is None
+
+def test_parse_batch_matches_parse():
+    titles = ["2020 Toyota Camry SE", "2019 Honda Civic LX", "2020 Toyota Camry SE"]
+    assert title_parser.parse_batch(titles) == [title_parser.parse(title) for title in titles]
@@ -0,0 +1,45 @@
+from app.tracing import UNSAMPLED, Tracer
+
+TRACEPARENT = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+
+class RecordingExporter:
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span)
+
+def test_disabled_tracing_ignores_sampled_traceparent():
+    exporter = RecordingExporter()
+    tracer = Tracer(0.0, exporter)
+
+    with tracer.span("http_request", traceparent=TRACEPARENT) as root:
+        with tracer.span("child") as child:
+            pass
+
+    assert root is UNSAMPLED and child is UNSAMPLED
+    assert exporter.spans == []
+
+def test_sampled_traceparent_continues_the_trace():
+    exporter = RecordingExporter()
+    tracer = Tracer(1e-9, exporter)
+
+    with tracer.span("http_request", traceparent=TRACEPARENT) as root:
+        with tracer.span("child") as child:
+            assert tracer.current_span() is child
+
+    assert [span.name for span in exporter.spans] == ["child", "http_request"]
+    assert root.trace_id == child.trace_id == "0af7651916cd43dd8448eb211c80319c"
+    assert root.parent_span_id == "b7ad6b7169203331"
+    assert child.parent_span_id == root.span_id
+
+def test_unsampled_traceparent_is_not_traced():
+    exporter = RecordingExporter()
+    tracer = Tracer(1.0, exporter)
+
+    with tracer.span("http_request", traceparent=TRACEPARENT[:-2] + "00") as root:
+        with tracer.span("child") as child:
+            pass
+
+    assert root is UNSAMPLED and child is UNSAMPLED
+    assert exporter.spans == []
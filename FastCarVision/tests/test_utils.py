@@ -0,0 +1,25 @@
+import pytest
+
+from app.utils import canonicalize_url, parse_int
+
+@pytest.mark.parametrize("text, expected", [
+    ("$15,999", 15999),
+    ("50,000 miles", 50000),
+    ("50K miles", 50000),
+    ("15k", 15000),
+    ("1.5K miles", 1500),
+    ("2.25k", 2250),
+    ("12,000 km", 12000),
+    ("12,000km", 12000),
+    ("$18,499.99", 18499),
+    ("Call for price", None),
+    ("", None),
+    (None, None),
+])
+def test_parse_int(text, expected):
+    assert parse_int(text) == expected
+
+def test_canonicalize_url_drops_tracking_params_and_www():
+    assert canonicalize_url("http://www.Cars.com/vehicledetail/123/?utm_source=x&zip=10001") == \
+        "https://cars.com/vehicledetail/123"
+    assert canonicalize_url("https://cars.com/v?b=2&a=1") == "https://cars.com/v?a=1&b=2"